@@ -2,6 +2,7 @@
 ASGI config for RGUKTInfoGuru project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests go to Django, websocket connections to the consumers in chat_app/routing.py.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -13,4 +14,19 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'RGUKTInfoGuru.settings')
 
-application = get_asgi_application()
+# Loads the apps before the consumers import the models
+django_asgi_app = get_asgi_application()
+
+from chat_app.agent.agent_executor import AgentExecutor  # noqa: E402
+
+# The server loads the models and the index before its first request, management commands never do
+AgentExecutor.get_instance()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+
+from chat_app.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    "http": django_asgi_app,
+    "websocket": URLRouter(websocket_urlpatterns),
+})
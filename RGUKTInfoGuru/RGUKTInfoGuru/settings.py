@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
+import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -55,7 +56,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'chat_app.authentication.CachedJWTAuthentication',
     ),
 }
 
@@ -75,7 +76,84 @@ SIMPLE_JWT = {
     "TOKEN_BLACKLIST": True,
 }
 
+# With REDIS_URL set (needs the redis package) the cache is shared by every worker. The default
+# LocMemCache is per process: saving a user only drops the copy cached by the worker that saved it.
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds an authenticated user stays cached before it is read from the database again. Without a
+# shared cache, this is how long the other workers keep serving a user that was changed or deactivated.
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60" if REDIS_URL else "5"))
+
+# Maximum number of recently verified tokens kept in memory by /auth/check-login
+VERIFIED_TOKEN_CACHE_SIZE = 10000
+
+# Seconds between incremental refreshes and full reloads of the in-memory token blacklist
+TOKEN_BLACKLIST_REFRESH_SECONDS = 5
+TOKEN_BLACKLIST_RELOAD_SECONDS = 300
+
+# Expired outstanding and blacklisted tokens are purged in the background at this interval
+TOKEN_PURGE_INTERVAL_SECONDS = 3600
+TOKEN_PURGE_BATCH_SIZE = 1000
+
+# Rows fetched per database round trip when streaming the /list export
+USER_EXPORT_CHUNK_SIZE = 2000
+
+# Number of rows removed per DELETE statement when purging soft deleted chats
+CHAT_PURGE_BATCH_SIZE = 1000
+
+# Chats without a new message for this many days are moved to cold storage by `manage.py archive_messages`
+MESSAGE_ARCHIVE_AFTER_DAYS = 180
+
+# Workers check this often whether `manage.py build_index` activated a new index version, 0 turns the watch off
+INDEX_WATCH_INTERVAL_SECONDS = 30
+
+# Questions naming a department or topic are searched in the matching chunks only, with a fallback to the whole index
+QUERY_ROUTING_ENABLED = True
+
+# First questions of a chat this similar (cosine) to a question of the FAQ list are answered from the
+# answers `manage.py build_faq` generated, without calling the LLM
+FAQ_ENABLED = True
+FAQ_MATCH_THRESHOLD = 0.9
+
+# Torch threads of every gunicorn worker forked by a preloading master, None splits the CPUs between the workers
+TORCH_THREADS_PER_WORKER = None
+
+# Unix socket of `manage.py retrieval_server`. When set, workers embed and search through it instead of
+# loading the model and the index themselves, and fall back to in-process retrieval while it is down.
+RETRIEVAL_SERVER_SOCKET = os.getenv("RETRIEVAL_SERVER_SOCKET")
+RETRIEVAL_SERVER_TIMEOUT_SECONDS = 5
+
+# Write-behind message persistence: the messages of an answer are queued and inserted by a background thread
+# in batches of MESSAGE_WRITE_BATCH_SIZE, MESSAGE_WRITE_FLUSH_SECONDS after the first of them was queued.
+# Queued messages are journaled in MESSAGE_JOURNAL_DIR and flushed on exit. They are only visible to the
+# process that queued them until then.
+MESSAGE_WRITE_BEHIND = os.getenv("MESSAGE_WRITE_BEHIND", "0") == "1"
+MESSAGE_WRITE_BATCH_SIZE = 500
+MESSAGE_WRITE_FLUSH_SECONDS = 0.2
+MESSAGE_JOURNAL_DIR = BASE_DIR / "message_journal"
+
+# Questions of one /ask/batch request and the llm calls it runs at the same time
+BATCH_QUESTIONS_MAX = 100
+BATCH_QUESTIONS_CONCURRENCY = int(os.getenv("BATCH_QUESTIONS_CONCURRENCY", "8"))
+
 MIDDLEWARE = [
+    'chat_app.middleware.RequestIdMiddleware',
+    # Compresses the responses last, after every other middleware is done with them
+    'chat_app.middleware.StreamingGZipMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -142,6 +220,41 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# PASSWORD_HASHER_PROFILE picks the preferred hasher, every profile keeps the others so
+# existing hashes still verify and are re-encoded with the preferred one on login.
+# "argon2" needs argon2-cffi and "bcrypt" needs bcrypt installed.
+
+PASSWORD_HASHER_PROFILE = os.getenv("PASSWORD_HASHER_PROFILE", "default")
+
+PASSWORD_HASHER_ITERATIONS = int(os.getenv("PASSWORD_HASHER_ITERATIONS", "600000"))
+
+PASSWORD_HASHER_PROFILES = {
+    "default": 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    "tuned": 'chat_app.hashers.TunedPBKDF2PasswordHasher',
+    "argon2": 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    "bcrypt": 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    "scrypt": 'django.contrib.auth.hashers.ScryptPasswordHasher',
+}
+
+PASSWORD_HASHERS = [PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for hasher in [
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+    ] if hasher != PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]
+]
+
+# Password hashes run on a bounded thread pool, logins beyond the concurrency limit
+# wait at most LOGIN_QUEUE_TIMEOUT_SECONDS before failing with 503. The request thread
+# blocks until its hash is done, the pool only caps how many hashes run at once.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or None
+LOGIN_CONCURRENCY_LIMIT = int(os.getenv("LOGIN_CONCURRENCY_LIMIT", "0")) or None
+LOGIN_QUEUE_TIMEOUT_SECONDS = 0.5
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -164,36 +277,66 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Logging runs off the request threads: records are put on a queue and written by a listener thread,
+# one JSON object per line in django_debug.log. Verbose payload logs (the full agent responses) are
+# kept for LOG_PAYLOAD_SAMPLE_RATE of the requests, messages and payloads are cut to LOG_MAX_LENGTH,
+# on the console too.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+LOG_MAX_LENGTH = 2000
+LOG_QUEUE_SIZE = 10000
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
     "formatters": {
         "verbose": {
-            "format": "{asctime} - {levelname} - {name} - {module}.{funcName}:{lineno} - {message}",
+            "()": "chat_app.utils.log.TruncatingFormatter",
+            "format": "{asctime} - {levelname} - {name} - {request_id} - {module}.{funcName}:{lineno} - {message}",
             "style": "{",
+            "max_length": LOG_MAX_LENGTH,
         },
         "simple": {
             "format": "{levelname} - {message}",
             "style": "{",
         },
+        "json": {
+            "()": "chat_app.utils.log.JsonFormatter",
+            "max_length": LOG_MAX_LENGTH,
+        },
+    },
+    "filters": {
+        "request_id": {
+            "()": "chat_app.utils.log.RequestIdFilter",
+        },
+        "sampling": {
+            "()": "chat_app.utils.log.SamplingFilter",
+            "rate": LOG_PAYLOAD_SAMPLE_RATE,
+        },
     },
     "handlers": {
         "file": {
             "level": "DEBUG",
             "class": "logging.FileHandler",
             "filename": "django_debug.log",
-            "formatter": "verbose",
+            "formatter": "json",
         },
         "console": {
             "level": "DEBUG",
             "class": "logging.StreamHandler",
             "formatter": "verbose",
         },
+        "queue": {
+            "()": "chat_app.utils.log.QueueListenerHandler",
+            "handlers": ["console", "file"],
+            "queue_size": LOG_QUEUE_SIZE,
+            "filters": ["request_id", "sampling"],
+        },
     },
     "loggers": {
-        "chat_app": {  # Replace with your actual app name
-            "handlers": ["console", "file"],
-            "level": "DEBUG",
+        "chat_app": {
+            "handlers": ["queue"],
+            "level": LOG_LEVEL,
             "propagate": False,
         },
     },
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'RGUKTInfoGuru.settings')
 
 application = get_wsgi_application()
+
+from chat_app.agent.agent_executor import AgentExecutor  # noqa: E402
+
+# The server loads the models and the index before its first request, management commands never do
+AgentExecutor.get_instance()
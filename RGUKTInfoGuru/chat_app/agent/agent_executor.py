@@ -1,4 +1,8 @@
+import contextvars
 import os
+import signal
+import threading
+from django.conf import settings
 from rest_framework.permissions import IsAuthenticated
 from ..utils.response import CustomResponse
 import logging
@@ -8,14 +12,22 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.chains import create_history_aware_retriever, create_retrieval_chain
 from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_chroma import Chroma
 from ..dao.impl.chat_dao_impl import ChatDaoImpl
-from pprint import pformat
 from ..utils.utils import MODELS
+from ..ingestion.config import CHROMA_DB_PATH, EMBEDDING_MODEL_NAME
+from ..ingestion.versions import resolve_index_path
+from .faq_store import FaqStore
+from .index_state import IndexState
+from .query_router import QueryRouter, build_retriever, search_batch, served_retriever_name
+from .remote_retrieval import RemoteEmbeddings, RemoteVectorStore, RetrievalClient, RetrievalServerError, RetrievalServerUnavailable
+from ..utils import prefork
 
 from .prompts import Context_Prompt, System_Prompt, Chat_Title_Prompt
 from ..utils.response import remove_think_tags
@@ -23,7 +35,6 @@ from ..utils.response import remove_think_tags
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 MODEL_NAME = os.getenv("MODEL_NAME")
-CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH")
 DATASET_PATH = os.getenv("DATASET_PATH")
 HF_TOKEN=os.getenv("HF_TOKEN")
 
@@ -31,6 +42,15 @@ HF_TOKEN=os.getenv("HF_TOKEN")
 logger = logging.getLogger(__name__)
 
 
+def build_rag_chain(llm, retriever):
+    """
+    Builds the history aware retrieval chain that answers with the llm from the retrieved chunks
+    """
+    history_aware_retriever = create_history_aware_retriever(llm, retriever, Context_Prompt)
+    document_chain = create_stuff_documents_chain(llm, System_Prompt)
+    return create_retrieval_chain(history_aware_retriever, document_chain)
+
+
 class AgentExecutor:
     """
     This class is responsible for executing the llm and generating the responses.
@@ -38,6 +58,7 @@ class AgentExecutor:
 
     permission_classes = [IsAuthenticated]
     _instance = None
+    _init_lock = threading.Lock()
     
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
@@ -47,42 +68,210 @@ class AgentExecutor:
     def __init__(self, **kwargs):
         if not hasattr(self, "initialized"):
             super().__init__(**kwargs)
-            self.initialized = True
             self.Response = CustomResponse()
             self.chat_dao = ChatDaoImpl()
 
-            self.embeddings = HuggingFaceEmbeddings(model_name="all-MiniLm-L6-v2")
-            self.vectordb = self.load_chroma_db()
-            self.retriever = self.vectordb.as_retriever()
+            self.create_embeddings()
             self.chat_history = ChatMessageHistory()
-            self.llm = ChatGroq(groq_api_key=GROQ_API_KEY, model_name=MODEL_NAME)
-
-            self.model_chains = {}
+            self.create_llms()
+            self.router = QueryRouter()
+            self.retriever_name = served_retriever_name()
 
-            for model in MODELS:
-                llm = ChatGroq(groq_api_key=GROQ_API_KEY, model_name=model)
-                history_aware_retriever = create_history_aware_retriever(llm, self.retriever, Context_Prompt)
-                document_chain = create_stuff_documents_chain(llm, System_Prompt)
-                rag_chain = create_retrieval_chain(history_aware_retriever, document_chain)
+            self.index_lock = threading.Lock()
+            self.state = self.load_index_state()
 
-                self.model_chains[model] = rag_chain
+            # A preloading gunicorn master serves nothing, its workers install the triggers
+            if not prefork.in_master():
+                self.install_reload_triggers()
 
+            # Set last, a failed build is retried by the next get_instance()
+            self.initialized = True
             logger.info("All models initialized successfully.")
             logger.info("AgentExecutor is initialized successfully")
 
 
     @classmethod
     def get_instance(cls):
-        return cls.__new__(cls)
+        """
+        Returns the executor, built on first use. The servers build it at startup (wsgi.py, asgi.py),
+        management commands that never answer a question do not load the models or the index.
+        """
+        instance = cls._instance
+        if instance is not None and hasattr(instance, "initialized"):
+            return instance
+
+        with cls._init_lock:
+            return cls()
+
+    def create_embeddings(self):
+        """
+        Uses the retrieval server when RETRIEVAL_SERVER_SOCKET is set, the model is then only loaded if it is down
+        """
+        socket_path = getattr(settings, "RETRIEVAL_SERVER_SOCKET", None)
+
+        if socket_path:
+            self.retrieval_client = RetrievalClient(
+                socket_path, timeout=getattr(settings, "RETRIEVAL_SERVER_TIMEOUT_SECONDS", 5)
+            )
+            self.embeddings = RemoteEmbeddings(
+                self.retrieval_client, lambda: HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+            )
+        else:
+            self.retrieval_client = None
+            self.embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+
+    def create_llms(self):
+        self.llm = ChatGroq(groq_api_key=GROQ_API_KEY, model_name=MODEL_NAME)
+        self.llms = {model: ChatGroq(groq_api_key=GROQ_API_KEY, model_name=model) for model in MODELS}
+        # Answer from chunks retrieved beforehand, for the batch questions
+        self.answer_chains = {model: create_stuff_documents_chain(llm, System_Prompt) for model, llm in self.llms.items()}
+
+    def after_fork(self):
+        """
+        Re-creates the fork-unsafe parts in a gunicorn worker forked from a preloading master.
+        The embedding model stays shared with the master, the Groq HTTP clients and the Chroma
+        client, with its SQLite connections, are the worker's own. The index is loaded again,
+        the master may hold an older version than the one activated since.
+        """
+        from chromadb.api.shared_system_client import SharedSystemClient
+
+        self.index_lock = threading.Lock()
+        self.create_llms()
+
+        # The master's connections to the retrieval server must not be shared
+        if self.retrieval_client is not None:
+            self.create_embeddings()
+
+        # The master's Chroma system is dropped, not stopped, it is still in use there
+        SharedSystemClient.clear_system_cache()
+        self.state = self.load_index_state()
+
+    @property
+    def vectordb(self):
+        return self.state.vectordb
+
+    @property
+    def retriever(self):
+        return self.state.retriever
+
+    @property
+    def model_chains(self):
+        return self.state.model_chains
+
+    def load_index_state(self, path=None):
+        """
+        Loads the index at the path, the served version by default, and builds the model chains on it
+        """
+        path = path or resolve_index_path(CHROMA_DB_PATH)
+
+        if not os.path.exists(path):
+            logger.warning(f"No index at {path}, questions are refused until `manage.py build_index` builds one")
+            return IndexState(path, None, None, {}, faq=FaqStore(path))
+
+        if self.retrieval_client is not None:
+            vectordb = RemoteVectorStore(self.retrieval_client, path, lambda: self.load_chroma_db(path))
+        else:
+            vectordb = self.load_chroma_db(path)
+
+        retriever = build_retriever(vectordb, self.retriever_name, router=self.router)
+        model_chains = {model: build_rag_chain(llm, retriever) for model, llm in self.llms.items()}
+
+        return IndexState(path, vectordb, retriever, model_chains, faq=FaqStore(path))
+
+    def reload_index(self, force=False):
+        """
+        Switches to the index version the current symlink points at. Requests already
+        running finish on the old index, which is released once they are done.
+
+        Args:
+            force (bool): Reload even when the served version did not change.
+
+        Returns:
+            dict: The served version and whether it changed.
+        """
+        with self.index_lock:
+            path = resolve_index_path(CHROMA_DB_PATH)
+            old_state = self.state
+
+            if not force and not self.index_changed(path, old_state):
+                return {"version": old_state.version, "reloaded": False}
+
+            self.state = self.load_index_state(path)
+
+        old_state.retire()
+        logger.info(f"Switched the index from version {old_state.version} to {self.state.version}")
+
+        return {"version": self.state.version, "previous_version": old_state.version, "reloaded": True}
+
+    @contextmanager
+    def use_state(self):
+        """
+        The served state, held until the block ends. A reload can retire the state read from
+        self.state before it is acquired, it is then read again and the new one is used.
+        """
+        while True:
+            state = self.state
+            if state.acquire():
+                break
+
+        try:
+            yield state
+        finally:
+            state.release()
+
+    @staticmethod
+    def index_changed(path, state):
+        """
+        Whether the index at path is not the one the state serves, or was built since the state found none
+        """
+        return path != state.path or (not state.loaded and os.path.exists(path))
+
+    def get_index_status(self):
+        state = self.state
+        status = {"version": state.version, "path": state.path, "loaded": state.loaded, "in_flight": state.in_flight}
+
+        if self.retrieval_client is not None:
+            try:
+                status["retrieval_server"] = self.retrieval_client.request({"op": "status"})
+            except (RetrievalServerUnavailable, RetrievalServerError):
+                status["retrieval_server"] = None
+
+        return status
 
-    def load_chroma_db(self):
+    def install_reload_triggers(self):
         """
-        Load the Chroma Database
+        Reloads the index on SIGHUP and, when INDEX_WATCH_INTERVAL_SECONDS is set, whenever the current symlink moves
+        """
+        def reload_in_background(*args):
+            threading.Thread(target=self.reload_index, name="index-reload", daemon=True).start()
+
+        if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGHUP, reload_in_background)
+
+        interval = getattr(settings, "INDEX_WATCH_INTERVAL_SECONDS", 0)
+        watch_thread = getattr(self, "watch_thread", None)
+
+        if interval and (watch_thread is None or not watch_thread.is_alive()):
+            def watch():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        if self.index_changed(resolve_index_path(CHROMA_DB_PATH), self.state):
+                            self.reload_index()
+                    except Exception as e:
+                        logger.error(f"Error reloading the index: {str(e)}")
+
+            self.watch_thread = threading.Thread(target=watch, name="index-watch", daemon=True)
+            self.watch_thread.start()
+
+    def load_chroma_db(self, path):
+        """
+        Load the Chroma Database built by `manage.py build_index`
         """
         try: 
-            if os.path.exists(CHROMA_DB_PATH):
-                logger.info("Loading Chroma Database...")
-                return Chroma(persist_directory=CHROMA_DB_PATH, embedding_function=self.embeddings)
+            if os.path.exists(path):
+                logger.info(f"Loading Chroma Database from {path}...")
+                return Chroma(persist_directory=path, embedding_function=self.embeddings)
             
             else:
                 raise CustomException(detail="Chroma Database not found, please check the path", status_code=404)
@@ -91,6 +280,11 @@ class AgentExecutor:
             logger.info("An Exception occured while loading the Chroma Database")
             raise CustomException(detail=str(e), status_code=404)
 
+    @staticmethod
+    def require_index(state):
+        if not state.loaded:
+            raise CustomException(detail="The index is not built yet, run `manage.py build_index`", status_code=503)
+
     def get_session_history(self, user_id, chat_id):
         """
         Function to retrieve chat messages for RunnableWithMessageHistory.
@@ -124,49 +318,192 @@ class AgentExecutor:
             str: The response of the Chatbot.
         """
 
-        logger.info(f"Executing model '{model}' with message: {message}")
+        logger.info(f"Executing model '{model}' with a message of {len(message)} characters")
 
-        if model not in self.model_chains:
+        if model not in MODELS:
             raise CustomException(f"Model {model} is not supported", 400)
 
-        try:
+        # The state is taken once, a reload during the request does not change the index it runs on
+        with self.use_state() as state:
+            self.require_index(state)
+
+            try:
+
+                rag_agent = RunnableWithMessageHistory(
+                    state.model_chains[model],
+                    get_session_history=lambda session_id: self.get_session_history(user_id, session_id),
+                    input_messages_key="input",
+                    history_messages_key="chat_history",
+                    output_messages_key="response"
+                )
+
+                start_time = time.process_time()
+
+                response_content = rag_agent.invoke(
+                    {
+                        "input": message
+                    },
+                    config={
+                        "configurable": {
+                            "session_id": chat_id
+                        }
+                    }
+                )
 
-            self.deepseek_rag_agent = RunnableWithMessageHistory(
-                self.model_chains[model],
-                get_session_history=lambda session_id: self.get_session_history(user_id, session_id),
-                input_messages_key="input",
-                history_messages_key="chat_history",
-                output_messages_key="response"
-            )
+                elapsed_time = time.process_time() - start_time
 
-            start_time = time.process_time()
+                logger.info(f"Model response generated in {elapsed_time:.2f} seconds.")
+                # The full response with every retrieved chunk, for a sample of the requests
+                logger.debug("Generated Response", extra={"payload": response_content, "sample": True})
 
-            response_content = self.deepseek_rag_agent.invoke(
-                {
-                    "input": message
-                },
-                config={
-                    "configurable": {
-                        "session_id": chat_id
+                return {
+                        "response": response_content,
+                        "time_taken_seconds": round(elapsed_time, 2),
+                        "source": "rag",
                     }
+            
+
+            except Exception as e:
+                logger.error(f"An error occured in executing the model: {str(e)}")
+                raise CustomException(detail=str(e), status_code=404)
+        
+    def execute_batch(self, messages, model=MODELS[0], max_concurrency=8):
+        """
+        Answers many independent messages together. They are embedded in one batch, matched
+        against the FAQ answers, and the others retrieved with one search per routing filter.
+        The llm calls run concurrently, at most max_concurrency at a time.
+
+        Args:
+            messages (list): The messages to be asked the Chatbot.
+
+        Yields:
+            tuple: The index of the message and its response in the shape `execute` returns, or
+            the exception it failed with, in the order the responses complete.
+        """
+        logger.info(f"Executing model '{model}' with a batch of {len(messages)} messages")
+
+        if model not in MODELS:
+            raise CustomException(f"Model {model} is not supported", 400)
+
+        with self.use_state() as state:
+            self.require_index(state)
+            vectors = self.embeddings.embed_documents(messages)
+            use_faq = getattr(settings, "FAQ_ENABLED", True) and state.faq.available
+            remaining = []
+
+            for index, (message, vector) in enumerate(zip(messages, vectors)):
+                match = state.faq.match(vector, settings.FAQ_MATCH_THRESHOLD) if use_faq else None
+
+                if match is None:
+                    remaining.append(index)
+                    continue
+
+                yield index, {
+                    "response": {"input": message, "answer": match[0]["answer"], "context": []},
+                    "time_taken_seconds": 0,
+                    "source": "faq",
                 }
+
+            if not remaining:
+                return
+
+            router = self.router if self.retriever_name == "routed" else None
+            contexts = search_batch(
+                state.vectordb,
+                [messages[index] for index in remaining],
+                [vectors[index] for index in remaining],
+                k=getattr(state.retriever, "k", 4),
+                router=router,
             )
 
-            elapsed_time = time.process_time() - start_time
+            def answer(message, context):
+                start_time = time.monotonic()
+                result = self.answer_chains[model].invoke({"input": message, "context": context, "chat_history": []})
 
-            logger.info(f"Model response generated in {elapsed_time:.2f} seconds.")
-            logger.info(f"Generated Response: {pformat(response_content)}")
+                return {
+                    "response": {"input": message, "answer": result, "context": context},
+                    "time_taken_seconds": round(time.monotonic() - start_time, 2),
+                    "source": "rag",
+                }
 
-            return {
-                    "response": response_content,
-                    "time_taken_seconds": round(elapsed_time, 2),
+            # Every call runs in a copy of the request's context, its logs keep the request id
+            pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="batch-llm")
+
+            try:
+                futures = {
+                    pool.submit(contextvars.copy_context().run, answer, messages[index], context): index
+                    for index, context in zip(remaining, contexts)
                 }
-            
 
+                for future in as_completed(futures):
+                    try:
+                        yield futures[future], future.result()
+                    except Exception as e:
+                        logger.error(f"An error occured in answering a batch message: {str(e)}")
+                        yield futures[future], e
+            finally:
+                # A client that stopped reading does not keep the queued llm calls
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    async def astream(self, message, chat_history, model=MODELS[0]):
+        """
+        Streams the answer to the message as the llm generates it.
+
+        Args:
+            message (str): The message to be asked the Chatbot.
+            chat_history (list): The conversation so far as (role, content) pairs.
+
+        Yields:
+            str: The next part of the answer.
+        """
+        logger.info(f"Streaming model '{model}' with a message of {len(message)} characters")
+
+        if model not in MODELS:
+            raise CustomException(f"Model {model} is not supported", 400)
+
+        with self.use_state() as state:
+            self.require_index(state)
+
+            async for chunk in state.model_chains[model].astream({"input": message, "chat_history": chat_history}):
+                if "answer" in chunk:
+                    yield chunk["answer"]
+
+    def answer_from_faq(self, message):
+        """
+        Answers the message from the FAQ answers of the served index when it matches an FAQ question closely enough.
+
+        Returns:
+            dict: The response in the shape `execute` returns plus the FAQ title as chat name, or None.
+        """
+        if not getattr(settings, "FAQ_ENABLED", True):
+            return None
+
+        start_time = time.process_time()
+
+        try:
+            with self.use_state() as state:
+                # No question is embedded while the index has no current FAQ answers
+                if not state.faq.available:
+                    return None
+
+                match = state.faq.match(self.embeddings.embed_query(message), settings.FAQ_MATCH_THRESHOLD)
         except Exception as e:
-            logger.error(f"An error occured in executing the model: {str(e)}")
-            raise CustomException(detail=str(e), status_code=404)
-        
+            logger.error(f"An error occured in matching the FAQ answers: {str(e)}")
+            return None
+
+        if match is None:
+            return None
+
+        entry, score = match
+        logger.info(f"Answered from the FAQ entry '{entry['title']}' with similarity {score:.3f}")
+
+        return {
+            "response": {"input": message, "answer": entry["answer"], "context": []},
+            "time_taken_seconds": round(time.process_time() - start_time, 2),
+            "source": "faq",
+            "chat_name": entry["title"],
+        }
+
     def generate_chat_name(self, message):
         """
         This function is used to generate the chat name based on the message""
@@ -0,0 +1,178 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from ..ingestion.config import FAQ_STORE_FILE_NAME, MANIFEST_FILE_NAME
+from ..ingestion.versions import index_fingerprint
+from ..utils.response import remove_think_tags
+
+logger = logging.getLogger(__name__)
+
+FAQ_QUESTIONS_PATH = os.getenv("FAQ_QUESTIONS_PATH") or os.path.join(os.path.dirname(__file__), "faq_questions.json")
+
+# An answer starting with one of these did not find its answer in the index and is not stored
+REFUSALS = ("i'm sorry", "i am sorry", "could you please clarify")
+
+
+def load_faq_questions(path=FAQ_QUESTIONS_PATH):
+    """
+    Loads the curated FAQ list, each entry has a title, a question, variants of the question and
+    the phrases a generated answer must contain. An entry with an "answer" is served as written.
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def vet_answer(entry, answer):
+    """
+    Returns why a generated answer can not be served, or None when it can
+    """
+    if not answer.strip():
+        return "empty answer"
+
+    if answer.strip().lower().startswith(REFUSALS):
+        return "the index does not answer it"
+
+    missing = [phrase for phrase in entry.get("expected", []) if phrase.lower() not in answer.lower()]
+    if missing:
+        return f"missing {', '.join(missing)}"
+
+    return None
+
+
+def build_faq_store(index_path, questions, embeddings, rag_chain, model_name):
+    """
+    Answers every FAQ entry with the RAG chain on the index and writes the vetted answers,
+    with the embeddings of their questions, next to the index.
+
+    Returns:
+        tuple: The number of stored answers and the (title, reason) of the rejected ones.
+    """
+    entries = []
+    rejected = []
+
+    for entry in questions:
+        answer = entry.get("answer")
+
+        if answer is None:
+            response = rag_chain.invoke({"input": entry["question"], "chat_history": []})
+            answer = remove_think_tags(response["answer"])
+
+            reason = vet_answer(entry, answer)
+            if reason:
+                logger.warning(f"Skipped the FAQ answer to '{entry['question']}': {reason}")
+                rejected.append((entry["title"], reason))
+                continue
+
+        phrasings = [entry["question"], *entry.get("variants", [])]
+        entries.append(
+            {
+                "title": entry["title"],
+                "question": entry["question"],
+                "answer": answer,
+                "embeddings": embeddings.embed_documents(phrasings),
+            }
+        )
+
+    data = {
+        "index_fingerprint": index_fingerprint(index_path),
+        "model": model_name,
+        "generated_at": time.time(),
+        "entries": entries,
+    }
+
+    # Written atomically, servers may be reading the previous file
+    path = os.path.join(index_path, FAQ_STORE_FILE_NAME)
+    fd, tmp_path = tempfile.mkstemp(dir=index_path, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+    logger.info(f"Stored {len(entries)} FAQ answers for the index at {index_path}")
+    return len(entries), rejected
+
+
+class FaqStore:
+    """
+    The FAQ answers generated for one index directory. The file is read again when it or
+    the index manifest changes, and answers generated for other index content are not served.
+    """
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self.path = os.path.join(index_path, FAQ_STORE_FILE_NAME)
+        self._key = None
+        # (entries, entry position of every matrix row, normalized question embeddings), swapped as a whole
+        self._loaded = ([], [], None)
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        try:
+            manifest_path = os.path.join(self.index_path, MANIFEST_FILE_NAME)
+            key = (os.stat(self.path).st_mtime_ns, os.stat(manifest_path).st_mtime_ns)
+        except FileNotFoundError:
+            key = None
+
+        if key == self._key:
+            return
+
+        with self._lock:
+            if key == self._key:
+                return
+
+            self._loaded = self.load() if key else ([], [], None)
+            self._key = key
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        if data["index_fingerprint"] != index_fingerprint(self.index_path):
+            logger.warning(
+                f"The FAQ answers at {self.path} were generated for another build of the index, "
+                f"run `manage.py build_faq`"
+            )
+            return [], [], None
+
+        rows = []
+        owners = []
+        for position, entry in enumerate(data["entries"]):
+            rows.extend(entry["embeddings"])
+            owners.extend([position] * len(entry["embeddings"]))
+
+        matrix = None
+        if rows:
+            matrix = np.asarray(rows, dtype=np.float32)
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+
+        logger.info(f"Loaded {len(data['entries'])} FAQ answers from {self.path}")
+        return data["entries"], owners, matrix
+
+    @property
+    def available(self):
+        self.refresh()
+        return self._loaded[2] is not None
+
+    def match(self, embedding, threshold):
+        """
+        Returns the entry with a question at least threshold cosine similar to the embedding, and the similarity
+        """
+        self.refresh()
+        entries, owners, matrix = self._loaded
+
+        if matrix is None:
+            return None
+
+        query = np.asarray(embedding, dtype=np.float32)
+        scores = matrix @ (query / np.linalg.norm(query))
+        best = int(np.argmax(scores))
+
+        if scores[best] < threshold:
+            return None
+
+        return entries[owners[best]], float(scores[best])
@@ -0,0 +1,85 @@
+import gc
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class IndexState:
+    """
+    Everything that serves one index version: the vector store, its retriever, the
+    model chains built on it and the FAQ answers generated from it. AgentExecutor swaps the whole object on reload,
+    requests hold on to the state they started with until they finish.
+    """
+
+    def __init__(self, path, vectordb, retriever, model_chains, faq=None):
+        self.path = path
+        self.version = os.path.basename(path)
+        self.vectordb = vectordb
+        self.retriever = retriever
+        self.model_chains = model_chains
+        self.faq = faq
+        self.in_flight = 0
+        self.retired = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        """
+        False while no index was built at the path, the state then serves no questions
+        """
+        return self.vectordb is not None
+
+    def acquire(self):
+        """
+        Marks a request as running on this state. Returns False once the state is retired,
+        the request then takes the state that replaced it.
+        """
+        with self._lock:
+            if self.retired:
+                return False
+
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        """
+        Ends a request started with acquire(), the state is closed only after the last one finishes
+        """
+        with self._lock:
+            self.in_flight -= 1
+            close = self.retired and self.in_flight == 0
+
+        if close:
+            self.close()
+
+    def retire(self):
+        """
+        Stops the state from being handed out and closes it once it is idle
+        """
+        with self._lock:
+            self.retired = True
+            close = self.in_flight == 0
+
+        if close:
+            self.close()
+
+    def close(self):
+        """
+        Releases the Chroma client so the old index is dropped from memory
+        """
+        # A RemoteVectorStore closes the in-process index it fell back to, if any
+        close = getattr(self.vectordb, "close", None) or getattr(getattr(self.vectordb, "_client", None), "close", None)
+
+        try:
+            if close is not None:
+                close()
+        except Exception as e:
+            logger.error(f"Error closing the index at {self.path}: {e}")
+
+        self.vectordb = self.retriever = None
+        self.model_chains = {}
+        self.faq = None
+        gc.collect()
+        logger.info(f"Released the index version {self.version}")
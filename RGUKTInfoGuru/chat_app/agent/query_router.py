@@ -0,0 +1,223 @@
+import json
+import logging
+import re
+from collections import defaultdict
+from functools import partial
+from typing import Any
+
+from django.conf import settings
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from ..ingestion.config import DEPARTMENT_ALIASES
+
+logger = logging.getLogger(__name__)
+
+# Words that point a question at a category of the index
+CATEGORY_KEYWORDS = {
+    "scholarship": ["scholarship", "scholarships", "epass", "e-pass", "fee reimbursement", "reimbursed"],
+    "placements": [
+        "placement", "placements", "placed", "recruiter", "recruiters", "recruitment", "internship",
+        "internships", "tnp", "t&p", "lpa", "package", "placement drive",
+    ],
+    "academic": [
+        "exam", "exams", "examination", "examinations", "certificate", "certificates", "revaluation",
+        "transcript", "migration", "tatkal", "grade", "grades", "registrar", "controller of examinations",
+        "vice chancellor", "director", "administration", "administrative",
+    ],
+    "about": [
+        "hostel", "hostels", "campus", "facilities", "facility", "counseling", "counselling", "counselor",
+        "mess", "established", "history", "parents", "visiting",
+    ],
+}
+
+
+# Department aliases that are also everyday words ("hostel management", "study materials", "computers in the
+# library"). A question is routed on them only when it also says it is about a department.
+AMBIGUOUS_ALIASES = {"management", "materials", "computers"}
+DEPARTMENT_CONTEXT_WORDS = [
+    "department", "departments", "dept", "branch", "hod", "faculty", "professor", "professors",
+    "engineering", "btech", "b.tech", "course", "courses", "syllabus", "curriculum", "lab", "labs",
+]
+
+
+def _compile(words_by_key):
+    return {
+        key: re.compile(r"\b(?:" + "|".join(re.escape(word) for word in words) + r")\b", re.IGNORECASE)
+        for key, words in words_by_key.items()
+        if words
+    }
+
+
+class QueryRouter:
+    """
+    Picks the part of the index a question is about from the departments and topics it names
+    """
+
+    def __init__(self, department_aliases=None, category_keywords=None, ambiguous_aliases=AMBIGUOUS_ALIASES):
+        department_aliases = department_aliases or DEPARTMENT_ALIASES
+        self.department_patterns = _compile({
+            department: [alias for alias in aliases if alias not in ambiguous_aliases]
+            for department, aliases in department_aliases.items()
+        })
+        self.ambiguous_patterns = _compile({
+            department: [alias for alias in aliases if alias in ambiguous_aliases]
+            for department, aliases in department_aliases.items()
+        })
+        self.context_pattern = _compile({"department": DEPARTMENT_CONTEXT_WORDS})["department"]
+        self.category_patterns = _compile(category_keywords or CATEGORY_KEYWORDS)
+
+    def route(self, query):
+        """
+        Returns the Chroma `where` filter for the question, or None to search the whole index.
+        A named department wins over a topic, it is the narrower of the two.
+        """
+        departments = [department for department, pattern in self.department_patterns.items() if pattern.search(query)]
+
+        if self.context_pattern.search(query):
+            departments += [
+                department
+                for department, pattern in self.ambiguous_patterns.items()
+                if department not in departments and pattern.search(query)
+            ]
+
+        if len(departments) == 1:
+            return {"department": departments[0]}
+        if departments:
+            return {"department": {"$in": departments}}
+
+        categories = [category for category, pattern in self.category_patterns.items() if pattern.search(query)]
+
+        if len(categories) == 1:
+            return {"category": categories[0]}
+
+        # Several topics at once, e.g. "placements and scholarships", are answered from the whole index
+        return None
+
+
+class RoutedRetriever(BaseRetriever):
+    """
+    Searches the part of the index the router picks for the question. When the filtered
+    search returns fewer than k chunks, for example on an index built before chunks were
+    tagged, the rest is filled from a search over the whole index. Without a router every
+    question is searched in the whole index.
+
+    Only similarity_search is used, so the vector store can also be a RemoteVectorStore.
+    """
+
+    vectordb: Any
+    router: Any
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        where = self.router.route(query) if self.router else None
+
+        if where is None:
+            return self.vectordb.similarity_search(query, k=self.k)
+
+        documents = self.vectordb.similarity_search(query, k=self.k, filter=where)
+        logger.info(f"Routed the question to {where}, {len(documents)} chunks found")
+
+        if len(documents) < self.k:
+            fill(documents, self.vectordb.similarity_search(query, k=self.k), self.k)
+
+        return documents
+
+
+def fill(documents, extra, k):
+    """
+    Appends the extra documents not found yet until there are k
+    """
+    seen = {(document.metadata.get("source"), document.page_content) for document in documents}
+
+    for document in extra:
+        key = (document.metadata.get("source"), document.page_content)
+        if key not in seen and len(documents) < k:
+            documents.append(document)
+            seen.add(key)
+
+    return documents
+
+
+def search_by_vectors(vectordb, vectors, k=4, filter=None):
+    """
+    Searches a Chroma store for many query vectors with a single query of its collection.
+
+    Returns:
+        list: The documents found for every vector, in order.
+    """
+    result = vectordb._collection.query(
+        query_embeddings=vectors, n_results=k, where=filter or None, include=["documents", "metadatas"]
+    )
+
+    return [
+        [Document(page_content=text, metadata=metadata or {}) for text, metadata in zip(texts, metadatas)]
+        for texts, metadatas in zip(result["documents"], result["metadatas"])
+    ]
+
+
+def search_batch(vectordb, queries, vectors, k=4, router=None):
+    """
+    Retrieves the chunks of many questions together, the way RoutedRetriever does for one.
+    The questions are grouped by the filter the router picks, every group is searched with
+    one query and the questions that found fewer than k chunks are filled from one query
+    over the whole index.
+
+    Args:
+        vectordb: A Chroma store, or any store with a search_by_vectors method like RemoteVectorStore.
+        queries (list): The questions.
+        vectors (list): The embedding of every question.
+
+    Returns:
+        list: The documents of every question, in order.
+    """
+    search = getattr(vectordb, "search_by_vectors", None) or partial(search_by_vectors, vectordb)
+
+    wheres = [router.route(query) if router else None for query in queries]
+    groups = defaultdict(list)
+
+    for index, where in enumerate(wheres):
+        groups[json.dumps(where, sort_keys=True)].append(index)
+
+    results = [None] * len(queries)
+
+    for key, indexes in groups.items():
+        found = search([vectors[index] for index in indexes], k=k, filter=json.loads(key))
+        for index, documents in zip(indexes, found):
+            results[index] = documents
+
+    short = [index for index, where in enumerate(wheres) if where is not None and len(results[index]) < k]
+
+    if short:
+        for index, extra in zip(short, search([vectors[index] for index in short], k=k)):
+            fill(results[index], extra, k)
+
+    logger.info(f"Searched {len(queries)} questions with {len(groups) + bool(short)} queries")
+
+    return results
+
+
+# Retrievers AgentExecutor can serve, `manage.py evaluate_retrieval` compares them
+RETRIEVERS = ("routed", "similarity", "mmr")
+
+
+def served_retriever_name():
+    return "routed" if getattr(settings, "QUERY_ROUTING_ENABLED", True) else "similarity"
+
+
+def build_retriever(vectordb, name="routed", k=4, router=None):
+    """
+    Builds the named retriever on the vector store. AgentExecutor and the retrieval
+    evaluation both build their retriever here, so the evaluation measures what is served.
+    """
+    if name == "routed":
+        return RoutedRetriever(vectordb=vectordb, router=router or QueryRouter(), k=k)
+    if name == "similarity":
+        return RoutedRetriever(vectordb=vectordb, router=None, k=k)
+    if name == "mmr":
+        return vectordb.as_retriever(search_type="mmr", search_kwargs={"k": k, "fetch_k": k * 5})
+
+    raise ValueError(f"Unknown retriever {name}, expected one of {', '.join(RETRIEVERS)}")
@@ -0,0 +1,189 @@
+import json
+import logging
+import socket
+import threading
+import time
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalServerUnavailable(Exception):
+    pass
+
+
+class RetrievalServerError(Exception):
+    """
+    The retrieval server answered with an error, the request itself failed. It is raised to
+    the caller, retrying in-process would fail the same way and load the model for nothing.
+    """
+
+
+class RetrievalClient:
+    """
+    Talks to `manage.py retrieval_server` over its Unix socket, one JSON request and one JSON
+    response per line. Every thread keeps its own connection. After a failure the server is
+    not tried again for retry_seconds, callers fall back to in-process retrieval meanwhile.
+    """
+
+    def __init__(self, socket_path, timeout=5.0, retry_seconds=30):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self.down_until = 0.0
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+
+        if connection is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            connection = self._local.connection = (sock, sock.makefile("rwb"))
+
+        return connection
+
+    def _drop_connection(self):
+        connection = getattr(self._local, "connection", None)
+        self._local.connection = None
+
+        if connection is not None:
+            try:
+                connection[1].close()
+                connection[0].close()
+            except OSError:
+                pass
+
+    def request(self, payload):
+        """
+        Sends one request and returns the response. Raises RetrievalServerUnavailable when the server
+        can not answer, RetrievalServerError when it answered with an error.
+        """
+        if time.monotonic() < self.down_until:
+            raise RetrievalServerUnavailable(f"The retrieval server at {self.socket_path} is marked down")
+
+        # A connection the server closed since the last request is only noticed on use, it is retried once
+        for attempt in range(2):
+            try:
+                _, stream = self._connection()
+                stream.write(json.dumps(payload).encode("utf-8") + b"\n")
+                stream.flush()
+                line = stream.readline()
+
+                if not line:
+                    raise ConnectionResetError("The retrieval server closed the connection")
+
+                response = json.loads(line)
+                break
+            except (OSError, ValueError) as e:
+                self._drop_connection()
+
+                if attempt == 1 or isinstance(e, (FileNotFoundError, ConnectionRefusedError, socket.timeout)):
+                    self.down_until = time.monotonic() + self.retry_seconds
+                    raise RetrievalServerUnavailable(f"The retrieval server at {self.socket_path} failed: {e}") from e
+
+        if "error" in response:
+            raise RetrievalServerError(f"The retrieval server failed: {response['error']}")
+
+        return response
+
+    def is_available(self):
+        try:
+            self.request({"op": "status"})
+            return True
+        except (RetrievalServerUnavailable, RetrievalServerError):
+            return False
+
+
+class RemoteEmbeddings(Embeddings):
+    """
+    Embeds on the retrieval server, or with the in-process model when the server is unavailable.
+    The local model is only loaded on the first fallback.
+    """
+
+    def __init__(self, client, load_local):
+        self.client = client
+        self.load_local = load_local
+        self._local = None
+        self._lock = threading.Lock()
+
+    @property
+    def local(self):
+        with self._lock:
+            if self._local is None:
+                logger.warning("Loading the embedding model in-process, the retrieval server is unavailable")
+                self._local = self.load_local()
+
+        return self._local
+
+    def embed_documents(self, texts):
+        try:
+            return self.client.request({"op": "embed", "texts": list(texts)})["embeddings"]
+        except RetrievalServerUnavailable as e:
+            logger.warning(f"Embedding in-process: {e}")
+            return self.local.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class RemoteVectorStore:
+    """
+    Searches the index on the retrieval server. When the server is unavailable the index
+    at index_path is opened in-process and searched there, until the server is back.
+    """
+
+    def __init__(self, client, index_path, load_local):
+        self.client = client
+        self.index_path = index_path
+        self.load_local = load_local
+        self._local = None
+        self._lock = threading.Lock()
+
+    @property
+    def local(self):
+        with self._lock:
+            if self._local is None:
+                logger.warning(f"Opening the index at {self.index_path} in-process, the retrieval server is unavailable")
+                self._local = self.load_local()
+
+        return self._local
+
+    def similarity_search(self, query, k=4, filter=None):
+        try:
+            response = self.client.request(
+                {"op": "search", "query": query, "k": k, "filter": filter, "index": self.index_path}
+            )
+        except RetrievalServerUnavailable as e:
+            logger.warning(f"Searching in-process: {e}")
+            return self.local.similarity_search(query, k=k, filter=filter)
+
+        return [Document(page_content=item["page_content"], metadata=item["metadata"]) for item in response["documents"]]
+
+    def search_by_vectors(self, vectors, k=4, filter=None):
+        """
+        Searches the index for many query vectors at once, see query_router.search_batch
+        """
+        from .query_router import search_by_vectors
+
+        try:
+            response = self.client.request(
+                {"op": "search_vectors", "vectors": vectors, "k": k, "filter": filter, "index": self.index_path}
+            )
+        except RetrievalServerUnavailable as e:
+            logger.warning(f"Searching in-process: {e}")
+            return search_by_vectors(self.local, vectors, k=k, filter=filter)
+
+        return [
+            [Document(page_content=item["page_content"], metadata=item["metadata"]) for item in documents]
+            for documents in response["results"]
+        ]
+
+    def close(self):
+        client = getattr(self._local, "_client", None)
+
+        if client is not None:
+            client.close()
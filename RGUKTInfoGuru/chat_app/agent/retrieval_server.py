@@ -0,0 +1,235 @@
+import json
+import logging
+import os
+import queue
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from ..ingestion.versions import IndexVersions, resolve_index_path
+from .index_state import IndexState
+from .query_router import search_by_vectors
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Collects the texts of concurrent callers and embeds them together. A batch is sent to
+    the model once it holds batch_size texts or its first text waited max_wait_seconds.
+    """
+
+    def __init__(self, embeddings, batch_size=32, max_wait_seconds=0.005):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.batches = 0
+        self.texts = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def embed(self, texts):
+        futures = []
+
+        for text in texts:
+            future = Future()
+            self._queue.put((text, future))
+            futures.append(future)
+
+        return [future.result() for future in futures]
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait_seconds
+
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                vectors = self.embeddings.embed_documents([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(batch)
+
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+
+class RetrievalServer:
+    """
+    Owns the embedding model and the served index for every Django worker on the machine.
+    Workers send queries over a Unix socket (see RemoteVectorStore), the queries of all
+    workers are embedded in shared batches. The index follows the current version like
+    AgentExecutor does: on a reload request, or when a worker asks for the newer version.
+
+    Every search is answered from the version the worker asked for, so a worker that has
+    not reloaded yet keeps getting results from its own version. Up to max_open_versions
+    versions stay open, the least recently used one is closed once its searches finish.
+    """
+
+    def __init__(self, socket_path, index_root, embeddings, load_vectordb, batch_size=32, max_wait_seconds=0.005,
+                 max_open_versions=2):
+        self.socket_path = socket_path
+        self.index_root = index_root
+        self.embeddings = embeddings
+        self.load_vectordb = load_vectordb
+        self.batcher = EmbeddingBatcher(embeddings, batch_size, max_wait_seconds)
+        self.max_open_versions = max_open_versions
+        self.index_lock = threading.Lock()
+        self.index_path = None
+        # index path -> IndexState, least recently used first
+        self.indexes = OrderedDict()
+        self.requests = 0
+        self.reload()
+
+    @property
+    def vectordb(self):
+        return self.indexes[self.index_path].vectordb
+
+    def reload(self, force=False):
+        with self.index_lock:
+            path = resolve_index_path(self.index_root)
+
+            if path != self.index_path or force:
+                if force and path in self.indexes:
+                    self.indexes.pop(path).retire()
+
+                self.open_index(path)
+                previous, self.index_path = self.index_path, path
+                logger.info(f"Serving the index at {path}" + (f", previously {previous}" if previous else ""))
+
+        return {"index": self.index_path, "version": os.path.basename(self.index_path)}
+
+    def open_index(self, path):
+        """
+        Opens an index version next to the open ones and retires the least recently used
+        beyond max_open_versions, never the served one. Called with index_lock held.
+        """
+        if path not in self.indexes:
+            self.indexes[path] = IndexState(path, self.load_vectordb(path), None, {})
+
+        self.indexes.move_to_end(path)
+        evictable = [open_path for open_path in self.indexes if open_path not in (path, self.index_path)]
+
+        for open_path in evictable[:max(len(self.indexes) - self.max_open_versions, 0)]:
+            self.indexes.pop(open_path).retire()
+
+    def is_index_version(self, path):
+        """
+        True for the served index and the built versions under the index root, no other directory is opened
+        """
+        real_path = os.path.realpath(path)
+
+        return os.path.isdir(real_path) and (
+            real_path == os.path.realpath(resolve_index_path(self.index_root))
+            or os.path.dirname(real_path) == os.path.realpath(IndexVersions(self.index_root).versions_dir)
+        )
+
+    def acquire(self, path=None):
+        """
+        Returns the state of the requested index version, or of the served one, opened when needed.
+        The caller releases it when its search is done.
+        """
+        with self.index_lock:
+            path = path or self.index_path
+
+            if path not in self.indexes:
+                if not self.is_index_version(path):
+                    raise ValueError(f"The index {path} is not available, reload the index and retry")
+
+                self.open_index(path)
+
+            state = self.indexes[path]
+            # States in self.indexes are never retired, retire() also runs under index_lock
+            state.acquire()
+
+        return state
+
+    def handle(self, request):
+        op = request.get("op")
+        self.requests += 1
+
+        if op == "embed":
+            return {"embeddings": self.batcher.embed(request["texts"])}
+
+        if op in ("search", "search_vectors"):
+            index = request.get("index")
+
+            # A worker that already switched to a newer version pulls the server along
+            if index and index not in self.indexes and index == resolve_index_path(self.index_root):
+                self.reload()
+
+            state = self.acquire(index)
+
+            try:
+                if op == "search":
+                    [vector] = self.batcher.embed([request["query"]])
+                    documents = state.vectordb.similarity_search_by_vector(
+                        vector, k=request.get("k", 4), filter=request.get("filter")
+                    )
+
+                    return {"documents": [_serialize(document) for document in documents]}
+
+                results = search_by_vectors(
+                    state.vectordb, request["vectors"], k=request.get("k", 4), filter=request.get("filter")
+                )
+
+                return {"results": [[_serialize(document) for document in documents] for documents in results]}
+            finally:
+                state.release()
+
+        if op == "reload":
+            return self.reload(force=request.get("force", False))
+
+        if op == "status":
+            return {
+                "index": self.index_path,
+                "version": os.path.basename(self.index_path),
+                "open_versions": [os.path.basename(path) for path in self.indexes],
+                "requests": self.requests,
+                "batches": self.batcher.batches,
+                "embedded_texts": self.batcher.texts,
+            }
+
+        return {"error": f"Unknown op {op}"}
+
+    def serve_forever(self):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        response = server.handle(json.loads(line))
+                    except Exception as e:
+                        logger.error(f"Error handling a retrieval request: {e}")
+                        response = {"error": str(e)}
+
+                    self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+                    self.wfile.flush()
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        with socketserver.ThreadingUnixStreamServer(self.socket_path, Handler) as unix_server:
+            unix_server.daemon_threads = True
+            logger.info(f"Retrieval server listening on {self.socket_path}")
+            unix_server.serve_forever()
+
+
+def _serialize(document):
+    return {"page_content": document.page_content, "metadata": document.metadata}
@@ -1,7 +1,4 @@
 from django.apps import AppConfig
-from django.core.cache import cache
-cache.clear()
-
 
 
 class ChatAppConfig(AppConfig):
@@ -9,6 +6,4 @@ class ChatAppConfig(AppConfig):
     name = 'chat_app'
 
     def ready(self):
-        from .agent.agent_executor import AgentExecutor
-        AgentExecutor()
-        
\ No newline at end of file
+        from . import signals  # noqa: F401
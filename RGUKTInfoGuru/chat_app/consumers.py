@@ -0,0 +1,164 @@
+import logging
+import time
+import uuid
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .agent.agent_executor import AgentExecutor
+from .authentication import CachedJWTAuthentication
+from .serializers.chat_serailizer import ChatSocketSerializer
+from .services.impl.chat_service_impl import ChatServiceImpl
+from .utils.log import request_id_var
+from .utils.response import remove_think_tags, visible_answer
+from .utils.utils import MODELS
+
+logger = logging.getLogger(__name__)
+
+# Close code sent when the access token is missing, invalid or expired
+UNAUTHORIZED_CLOSE_CODE = 4001
+
+
+def run_sync(func):
+    # The llm calls inside must not wait for each other on the single thread sensitive executor
+    return database_sync_to_async(func, thread_sensitive=False)
+
+
+class ChatConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Chat over one websocket connection. The client authenticates once, then asks any number
+    of questions. The chat and its history stay in memory for the connection, answers are
+    streamed as they are generated and every exchange is saved like the ones of /chat.
+
+    Client messages:
+        {"type": "auth", "token": "<access token>"}
+        {"type": "ask", "message": "...", "chat_id": "<optional, continues a saved chat>", "model": "<optional>"}
+        {"type": "new_chat"}
+
+    Server messages: auth_ok, start (the chat), token (the next part of the answer),
+    end (the answer and the saved messages) and error.
+    """
+
+    async def connect(self):
+        self.user = None
+        self.token_expires_at = None
+        self.chat = None
+        self.history = []
+        self.connection_id = uuid.uuid4().hex
+        self.chat_service = ChatServiceImpl()
+        self.agent_executor = AgentExecutor.get_instance()
+
+        await self.accept()
+
+    async def receive_json(self, content, **kwargs):
+        request_id_var.set(self.connection_id)
+        kind = content.get("type")
+
+        if kind == "auth":
+            await self.authenticate(content.get("token", ""))
+        elif self.user is None or time.time() >= self.token_expires_at:
+            await self.send_json({"type": "error", "message": "Authenticate with a valid access token first"})
+            await self.close(code=UNAUTHORIZED_CLOSE_CODE)
+        elif kind == "ask":
+            await self.ask(content)
+        elif kind == "new_chat":
+            self.chat = None
+            self.history = []
+        else:
+            await self.send_json({"type": "error", "message": f"Unknown message type {kind}"})
+
+    async def authenticate(self, token):
+        authentication = CachedJWTAuthentication()
+
+        try:
+            validated_token = authentication.get_validated_token(token)
+            user = await run_sync(authentication.get_user)(validated_token)
+        except (AuthenticationFailed, InvalidToken) as e:
+            logger.info(f"Websocket authentication failed: {str(e)}")
+            await self.send_json({"type": "error", "message": "Invalid access token"})
+            await self.close(code=UNAUTHORIZED_CLOSE_CODE)
+            return
+
+        self.user = user
+        self.token_expires_at = validated_token["exp"]
+        logger.info(f"The user with id {user.id} is connected to the chat websocket")
+
+        await self.send_json({"type": "auth_ok", "user_id": str(user.id)})
+
+    async def ask(self, content):
+        serializer = ChatSocketSerializer(data=content)
+
+        if not serializer.is_valid():
+            await self.send_json({"type": "error", "message": "Invalid question", "errors": serializer.errors})
+            return
+
+        data = serializer.validated_data
+        message = data["message"]
+        model = data.get("model") or MODELS[0]
+        chat_id = data.get("chat_id")
+
+        try:
+            response = None
+
+            if chat_id is not None and (self.chat is None or chat_id != self.chat.chat_id):
+                self.chat, messages = await run_sync(self.chat_service.open_chat)(self.user.id, chat_id)
+                self.history = [(msg.role, msg.content) for msg in messages]
+            elif self.chat is None:
+                self.chat, response = await run_sync(self.chat_service.start_chat)(self.user.id, message)
+                self.history = []
+
+            await self.send_json(
+                {"type": "start", "chat_id": str(self.chat.chat_id), "chat_name": self.chat.chat_name}
+            )
+
+            start_time = time.monotonic()
+
+            if response is not None:
+                answer = response["response"]["answer"]
+                await self.send_json({"type": "token", "content": answer})
+            else:
+                answer = await self.stream_answer(message, model)
+
+            messages = await run_sync(self.chat_service.save_exchange)(self.chat, message, answer)
+            self.history += [("user", message), ("assistant", answer)]
+
+            await self.send_json(
+                {
+                    "type": "end",
+                    "chat_id": str(self.chat.chat_id),
+                    "response": answer,
+                    "time_taken_seconds": round(time.monotonic() - start_time, 2),
+                    "source": response["source"] if response is not None else "rag",
+                    "messages": [
+                        {
+                            "role": msg.role,
+                            "content": msg.content,
+                            "message_id": str(msg.message_id),
+                            "created_at": msg.timestamp.isoformat(),
+                        }
+                        for msg in messages
+                    ],
+                }
+            )
+
+        except Exception as e:
+            logger.error(f"An error occured in answering over the websocket: {str(e)}")
+            await self.send_json({"type": "error", "message": str(e)})
+
+    async def stream_answer(self, message, model):
+        """
+        Sends the answer as it is generated, without its think blocks, and returns it
+        """
+        text = ""
+        sent = ""
+
+        async for part in self.agent_executor.astream(message, self.history, model):
+            text += part
+            visible = visible_answer(text)
+
+            if len(visible) > len(sent):
+                await self.send_json({"type": "token", "content": visible[len(sent):]})
+                sent = visible
+
+        return remove_think_tags(text)
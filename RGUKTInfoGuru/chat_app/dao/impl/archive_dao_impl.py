@@ -0,0 +1,190 @@
+from ..interface.archive_dao_interface import ArchiveDaoInterface
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import timedelta
+from rest_framework import status
+from ...exceptions import CustomException
+from ...models import Chat, Message, ArchivedChat
+import json
+import logging
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Message ids per DELETE, below the query parameter limit of SQLite
+DELETE_BATCH_SIZE = 500
+
+class ArchiveDaoImpl(ArchiveDaoInterface):
+    """
+    Implementation of ArchiveDaoInterface.
+
+    Messages of chats that have been inactive for a while are moved out of the
+    Message table into one zlib compressed JSON blob per chat, and moved back the
+    first time the chat is opened again.
+    """
+    _instance = None
+    def __new__(cls, *args, **kwargs):
+        """
+        Implements the Singleton pattern to ensure only one instance is created.
+        """
+        if cls._instance is None:
+            cls._instance = super(ArchiveDaoImpl, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, **kwargs):
+        if not hasattr(self, "initialized"):
+            super().__init__(**kwargs)
+            self.initialized = True
+
+    def get_inactive_chat_ids(self, days: int):
+        """
+        Returns the IDs of the chats whose latest message is older than the given days
+        """
+
+        cutoff = timezone.now() - timedelta(days=days)
+
+        return (
+            Chat.objects.filter(is_archived=False, is_deleted=False)
+            .annotate(last_activity=Max("messages__timestamp"))
+            .filter(last_activity__lt=cutoff)
+            .values_list("chat_id", flat=True)
+        )
+
+    def archive_inactive_chats(self, days: int, batch_size: int = 100):
+        """
+        Moves the messages of the chats inactive for the given days into the archive
+
+        Args:
+            days (int): The number of days without a new message after which a chat is archived.
+            batch_size (int): The number of chats archived per transaction.
+
+        Returns:
+            dict: The number of archived chats and messages.
+        """
+
+        archived = {"chats": 0, "messages": 0}
+
+        try:
+            while True:
+                chat_ids = list(self.get_inactive_chat_ids(days)[:batch_size])
+
+                if not chat_ids:
+                    break
+
+                for chat_id in chat_ids:
+                    archived["messages"] += self.archive_chat(chat_id)
+                    archived["chats"] += 1
+
+            logger.info(f"Archived {archived['chats']} chats with {archived['messages']} messages.")
+
+            return archived
+
+        except Exception as e:
+            logger.info(f"An error Occured in archiving chats: {str(e)}")
+            raise CustomException(detail=str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def archive_chat(self, chat_id):
+        """
+        Compresses the messages of a single chat into the archive and removes them from the Message table
+
+        Returns:
+            int: The number of archived messages.
+        """
+
+        with transaction.atomic():
+            chat = Chat.objects.select_for_update().get(chat_id=chat_id)
+
+            messages = list(
+                Message.objects.filter(chat=chat)
+                .order_by("timestamp")
+                .values_list("message_id", "role", "content", "timestamp")
+            )
+            rows = [
+                [str(message_id), role, content, timestamp.isoformat()]
+                for message_id, role, content, timestamp in messages
+            ]
+
+            payload = zlib.compress(json.dumps(rows).encode("utf-8"))
+
+            ArchivedChat.objects.update_or_create(
+                chat=chat,
+                defaults={
+                    "payload": payload,
+                    "message_count": len(rows),
+                    "compressed_size": len(payload),
+                },
+            )
+            # Only what was archived, a message saved since the read stays in the table
+            archived_ids = [message[0] for message in messages]
+            for start in range(0, len(archived_ids), DELETE_BATCH_SIZE):
+                Message.objects.filter(message_id__in=archived_ids[start:start + DELETE_BATCH_SIZE])._raw_delete(
+                    DEFAULT_DB_ALIAS
+                )
+
+            chat.is_archived = True
+            chat.save(update_fields=["is_archived"])
+
+        return len(rows)
+
+    def rehydrate_chat(self, chat: Chat):
+        """
+        Moves the archived messages of the chat back into the Message table
+
+        Args:
+            chat (Chat): The archived chat.
+
+        Returns:
+            int: The number of restored messages.
+        """
+
+        try:
+            with transaction.atomic():
+                chat = Chat.objects.select_for_update().get(chat_id=chat.chat_id)
+
+                if not chat.is_archived:
+                    return 0
+
+                archive = ArchivedChat.objects.filter(chat=chat).first()
+                rows = json.loads(zlib.decompress(bytes(archive.payload))) if archive else []
+
+                Message.objects.bulk_create(
+                    [
+                        Message(message_id=message_id, chat=chat, role=role, content=content, timestamp=parse_datetime(timestamp))
+                        for message_id, role, content, timestamp in rows
+                    ],
+                    ignore_conflicts=True,
+                )
+
+                if archive:
+                    archive.delete()
+
+                chat.is_archived = False
+                chat.save(update_fields=["is_archived"])
+
+            logger.info(f"Restored {len(rows)} archived messages of the chat {chat.chat_id}")
+
+            return len(rows)
+
+        except Exception as e:
+            logger.info(f"An error Occured in restoring archived chat: {str(e)}")
+            raise CustomException(detail=str(e), status_code=status.HTTP_404_NOT_FOUND)
+
+    def get_stats(self):
+        """
+        Returns the hot vs cold row counts of the message storage
+        """
+
+        cold = ArchivedChat.objects.aggregate(
+            messages=Sum("message_count"),
+            compressed_bytes=Sum("compressed_size"),
+        )
+
+        return {
+            "hot_messages": Message.objects.count(),
+            "hot_chats": Chat.objects.filter(is_archived=False, is_deleted=False).count(),
+            "cold_messages": cold["messages"] or 0,
+            "cold_chats": ArchivedChat.objects.count(),
+            "cold_compressed_bytes": cold["compressed_bytes"] or 0,
+        }
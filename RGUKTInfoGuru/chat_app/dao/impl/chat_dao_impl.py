@@ -1,8 +1,15 @@
 from ..interface.chat_dao_interface import ChatDaoInterface
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
 from rest_framework import status
 from ...exceptions import CustomException
 from ...models import User, Chat, Message
 from .user_auth_dao_impl import UserAuthDaoImpl
+from .archive_dao_impl import ArchiveDaoImpl
+from ...utils.message_writer import MessageWriter
 import logging 
 
 logger = logging.getLogger(__name__)
@@ -29,6 +36,8 @@ class ChatDaoImpl(ChatDaoInterface):
             super().__init__(**kwargs)
             self.initialized = True
             self.user_dao = UserAuthDaoImpl()
+            self.archive_dao = ArchiveDaoImpl()
+            self.message_writer = MessageWriter() if getattr(settings, "MESSAGE_WRITE_BEHIND", False) else None
 
 
     def create_chat(self, user_id, chat_name="Chat1"):
@@ -70,19 +79,53 @@ class ChatDaoImpl(ChatDaoInterface):
         """
         try:
             message = Message.objects.create(chat=chat, role=role, content=content)
-            logger.info(f"The message is saved. with role {role} and content {content}")
+            logger.info(f"The message is saved with role {role}")
             return message
         except Exception as e:
             logger.info(f"An error occured in saving message, {str(e)}")
             raise CustomException(detail=str(e), status_code=status.HTTP_404_NOT_FOUND)
-        
+
+    def save_messages(self, chat: Chat, messages):
+        """
+        Saves the messages of one exchange. With MESSAGE_WRITE_BEHIND they are queued
+        for the MessageWriter, otherwise they are inserted right away in one query.
+
+        Args:
+            chat (Chat): The chat object.
+            messages (list): (role, content) pairs, in order.
+
+        Returns:
+            list: The message objects.
+        """
+        try:
+            now = timezone.now()
+            # Distinct timestamps keep the order of the exchange when sorting by timestamp
+            rows = [
+                Message(chat=chat, role=role, content=content, timestamp=now + timedelta(microseconds=index))
+                for index, (role, content) in enumerate(messages)
+            ]
+
+            if self.message_writer is not None:
+                self.message_writer.queue(rows)
+                logger.info(f"{len(rows)} messages are queued for the chat {chat.chat_id}")
+            else:
+                with transaction.atomic():
+                    Message.objects.bulk_create(rows)
+                    Chat.objects.filter(chat_id=chat.chat_id).update(updated_at=now)
+                logger.info(f"{len(rows)} messages are saved for the chat {chat.chat_id}")
+
+            return rows
+        except Exception as e:
+            logger.info(f"An error occured in saving messages, {str(e)}")
+            raise CustomException(detail=str(e), status_code=status.HTTP_404_NOT_FOUND)
+
     def get_chat_by_id(self, chat_id):
         """
         Retrieves chat by ID
         """
 
         try:
-            chat = Chat.objects.get(chat_id=chat_id)
+            chat = Chat.objects.get(chat_id=chat_id, is_deleted=False)
             return chat
         except Exception as e:
             raise CustomException(detail=str(e), status_code=status.HTTP_404_NOT_FOUND)
@@ -95,26 +138,64 @@ class ChatDaoImpl(ChatDaoInterface):
         logger.info("Retrieving chat messages")
         
         try:
-            chat = Chat.objects.filter(chat_id=chat_id, user__id=user_id).first()
+            chat = Chat.objects.filter(chat_id=chat_id, user__id=user_id, is_deleted=False).first()
 
             if chat is None:
                 logger.info("Chat for this user is not found")
                 raise CustomException(detail="Chat for this user not found", status_code=status.HTTP_404_NOT_FOUND)
-            
+
+            if chat.is_archived:
+                self.archive_dao.rehydrate_chat(chat)
+
+            # Read before the stored messages, a message inserted in between is then found in both
+            pending = self.message_writer.pending(chat.chat_id) if self.message_writer is not None else []
+
             messages = Message.objects.filter(chat__chat_id=chat_id).order_by("timestamp")
+
+            if pending:
+                stored = list(messages)
+                stored_ids = {msg.message_id for msg in stored}
+                messages = sorted(
+                    stored + [msg for msg in pending if msg.message_id not in stored_ids], key=lambda msg: msg.timestamp
+                )
+
             return messages
         
         except Exception as e:
             logger.info(f"An error Occured in getting chat messages: {str(e)}")
             raise CustomException(detail=str(e), status_code=status.HTTP_404_NOT_FOUND)
 
+    def get_chat_last_modified(self, user_id, chat_id):
+        """
+        Returns when the chat of the user or its messages last changed, including the queued
+        messages, without loading them. None when the chat is not found.
+        """
+        updated_at = (
+            Chat.objects.filter(chat_id=chat_id, user__id=user_id, is_deleted=False)
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+
+        if updated_at is None or self.message_writer is None:
+            return updated_at
+
+        return max([updated_at] + [msg.timestamp for msg in self.message_writer.pending(chat_id)])
+
+    def get_chats_version(self, user_id):
+        """
+        Returns the number of chats of the user and when the latest of them changed, in one aggregate query
+        """
+        return Chat.objects.filter(user__id=user_id, is_deleted=False).aggregate(
+            count=Count("chat_id"), last_modified=Max("updated_at")
+        )
+
     def get_chats_by_user(self, user_id):
         """
         Retrieves chats by user
         """
 
         try:
-            chats = Chat.objects.filter(user__id=user_id).order_by("-created_at")
+            chats = Chat.objects.filter(user__id=user_id, is_deleted=False).order_by("-created_at")
 
             return chats
         except Exception as e:
@@ -131,7 +212,7 @@ class ChatDaoImpl(ChatDaoInterface):
         """
 
         try:
-            chat = Chat.objects.get(chat_id=chat_id)
+            chat = Chat.objects.get(chat_id=chat_id, is_deleted=False)
 
             if(chat is None):
                 logger.info(f"Chat is not found with the given chat id : {chat_id}")
@@ -156,7 +237,7 @@ class ChatDaoImpl(ChatDaoInterface):
         """
 
         try:
-            chat = Chat.objects.get(chat_id=chat_id)
+            chat = Chat.objects.get(chat_id=chat_id, is_deleted=False)
 
             if(chat is None):
                 logger.info(f"Chat is not found with the given chat id : {chat_id}")
@@ -181,7 +262,7 @@ class ChatDaoImpl(ChatDaoInterface):
         """
 
         try:
-            chat = Chat.objects.get(chat_id=chat_id)
+            chat = Chat.objects.get(chat_id=chat_id, is_deleted=False)
 
             if(chat is None):
                 logger.info(f"Chat is not found with the given chat id : {chat_id}")
@@ -198,25 +279,102 @@ class ChatDaoImpl(ChatDaoInterface):
 
     def delete_chat(self, chat_id):
         """
-        Deletes the chat
+        Soft deletes the chat. The chat is hidden from every listing right away,
+        its messages are purged later by purge_deleted_chats.
         
         Args: 
-            chat_id (str): The ID of the chat to rename.
+            chat_id (str): The ID of the chat to delete.
         """
 
         try:
-            chat = Chat.objects.get(chat_id=chat_id)
+            now = timezone.now()
+            deleted = Chat.objects.filter(chat_id=chat_id, is_deleted=False).update(
+                is_deleted=True, deleted_at=now, updated_at=now
+            )
 
-            if(chat is None):
+            if deleted == 0:
                 logger.info(f"Chat is not found with the given chat_id : {chat_id}")
                 raise CustomException(detail="Chat is not found", status_code=status.HTTP_404_NOT_FOUND)
-            
-            chat.delete()  # This deletes the chat and all related messages due to CASCADE
 
-            logger.info(f"Chat with chat_id {chat_id} deleted successfully.")
+            logger.info(f"Chat with chat_id {chat_id} is marked as deleted.")
 
         except Exception as e:
             logger.info(f"An error Occured in deleting chat: {str(e)}")
             raise CustomException(detail=str(e), status_code=status.HTTP_404_NOT_FOUND)
-                
-    
\ No newline at end of file
+
+    def delete_chats_by_user(self, user_id, chat_ids=None):
+        """
+        Soft deletes many chats of the user in a single UPDATE
+
+        Args:
+            user_id (str): The user's ID.
+            chat_ids (list, optional): The chats to delete. Deletes all the chats of the user when None.
+
+        Returns:
+            int: The number of chats marked as deleted.
+        """
+
+        try:
+            chats = Chat.objects.filter(user__id=user_id, is_deleted=False)
+
+            if chat_ids is not None:
+                chats = chats.filter(chat_id__in=chat_ids)
+
+            now = timezone.now()
+            deleted = chats.update(is_deleted=True, deleted_at=now, updated_at=now)
+
+            logger.info(f"{deleted} chats of the user {user_id} are marked as deleted.")
+
+            return deleted
+
+        except Exception as e:
+            logger.info(f"An error Occured in deleting chats: {str(e)}")
+            raise CustomException(detail=str(e), status_code=status.HTTP_404_NOT_FOUND)
+
+    def purge_deleted_chats(self, batch_size=1000):
+        """
+        Permanently removes soft deleted chats and their messages.
+
+        Rows are removed in batches of primary keys, so every transaction stays short
+        whatever the size of the chat. Message has no signals and nothing cascades from
+        it, so Django deletes the messages with one DELETE per batch without loading them,
+        and the chats take their archives with them the same way.
+
+        Args:
+            batch_size (int): The number of rows removed per DELETE statement.
+
+        Returns:
+            dict: The number of chats and messages removed.
+        """
+
+        purged = {"chats": 0, "messages": 0}
+
+        try:
+            while True:
+                chat_ids = list(
+                    Chat.objects.filter(is_deleted=True).values_list("chat_id", flat=True)[:batch_size]
+                )
+
+                if not chat_ids:
+                    break
+
+                while True:
+                    message_ids = list(
+                        Message.objects.filter(chat_id__in=chat_ids).values_list("message_id", flat=True)[:batch_size]
+                    )
+
+                    if not message_ids:
+                        break
+
+                    purged["messages"] += Message.objects.filter(message_id__in=message_ids).delete()[0]
+
+                _, deleted = Chat.objects.filter(chat_id__in=chat_ids).delete()
+                purged["chats"] += deleted.get(Chat._meta.label, 0)
+
+            logger.info(f"Purged {purged['chats']} deleted chats and {purged['messages']} messages.")
+
+            return purged
+
+        except Exception as e:
+            logger.info(f"An error Occured in purging deleted chats: {str(e)}")
+            raise CustomException(detail=str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,81 @@
+from ..interface.token_dao_interface import TokenDaoInterface
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework import status
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+from ...exceptions import CustomException
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TokenDaoImpl(TokenDaoInterface):
+    """
+    Implementation of TokenDaoInterface on top of the simplejwt token_blacklist tables.
+    """
+    _instance = None
+    def __new__(cls, *args, **kwargs):
+        """
+        Implements the Singleton pattern to ensure only one instance is created.
+        """
+        if cls._instance is None:
+            cls._instance = super(TokenDaoImpl, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, **kwargs):
+        if not hasattr(self, "initialized"):
+            super().__init__(**kwargs)
+            self.initialized = True
+
+    def get_blacklisted_jtis(self, after_id: int = 0):
+        """
+        Returns (id, jti) pairs of the blacklisted tokens added after the given id, oldest first
+        """
+
+        return (
+            BlacklistedToken.objects.filter(id__gt=after_id)
+            .order_by("id")
+            .values_list("id", "token__jti")
+        )
+
+    def purge_expired_tokens(self, batch_size: int = 1000):
+        """
+        Removes expired outstanding and blacklisted tokens in batches of primary keys
+
+        Args:
+            batch_size (int): The number of rows removed per DELETE statement.
+
+        Returns:
+            dict: The number of outstanding and blacklisted tokens removed.
+        """
+
+        purged = {"outstanding": 0, "blacklisted": 0}
+        now = aware_utcnow()
+
+        try:
+            while True:
+                ids = list(
+                    BlacklistedToken.objects.filter(token__expires_at__lte=now).values_list("id", flat=True)[:batch_size]
+                )
+
+                if not ids:
+                    break
+
+                purged["blacklisted"] += BlacklistedToken.objects.filter(id__in=ids)._raw_delete(DEFAULT_DB_ALIAS)
+
+            while True:
+                ids = list(
+                    OutstandingToken.objects.filter(expires_at__lte=now).values_list("id", flat=True)[:batch_size]
+                )
+
+                if not ids:
+                    break
+
+                purged["outstanding"] += OutstandingToken.objects.filter(id__in=ids)._raw_delete(DEFAULT_DB_ALIAS)
+
+            logger.info(f"Purged {purged['outstanding']} outstanding and {purged['blacklisted']} blacklisted tokens.")
+
+            return purged
+
+        except Exception as e:
+            logger.info(f"An error Occured in purging expired tokens: {str(e)}")
+            raise CustomException(detail=str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1,9 +1,12 @@
 from ..interface.user_auth_dao_interface import UserAuthDaoInterface
-from django.contrib.auth.hashers import make_password, check_password
-from rest_framework import status
 from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.db.models.functions import Lower
+from rest_framework import status
 from ...exceptions import CustomException
 from ...models import User
+from ...utils.user_cache import UserCache
+from ...utils.password_executor import PasswordHashExecutor
 
 class UserAuthDaoImpl(UserAuthDaoInterface):
     """
@@ -26,6 +29,15 @@ class UserAuthDaoImpl(UserAuthDaoInterface):
         if not hasattr(self, "initialized"):
             super().__init__(**kwargs)
             self.initialized = True
+            self.user_cache = UserCache()
+            self.password_executor = PasswordHashExecutor()
+
+    @staticmethod
+    def normalize_email(email: str):
+        """
+        Normalizes the email the same way at signup and at lookup time
+        """
+        return email.strip().lower()
 
     def create_user(self, email: str, password: str, user_name:str = "", avatar:str = ""):
         """
@@ -40,11 +52,11 @@ class UserAuthDaoImpl(UserAuthDaoInterface):
         Returns:
             User: The newly created user object.
         """
-        try:
-            hashed_password = make_password(password)
+        hashed_password = self.password_executor.run(make_password, password)
 
+        try:
             user = User.objects.create(
-                email=email,
+                email=self.normalize_email(email),
                 password=hashed_password,
                 username=user_name,
                 avatar=avatar
@@ -60,30 +72,62 @@ class UserAuthDaoImpl(UserAuthDaoInterface):
         Retrieves user by email
         """
 
-        return User.objects.filter(email__iexact=email).first()
+        return (
+            User.objects.alias(email_lower=Lower("email"))
+            .filter(email_lower=self.normalize_email(email))
+            .first()
+        )
 
     def validate_user(self, email: str, password: str):
         """
         Handles user login process
+
+        Goes through authenticate(), so AUTHENTICATION_BACKENDS and the user_login_failed
+        signal apply. User.check_password and set_password hash on the PasswordHashExecutor
+        pool, including the hash ModelBackend spends on unknown emails.
         """
 
         try:
-            user = authenticate(email=email.strip(), password=password)
+            user = authenticate(email=self.normalize_email(email), password=password)
 
             if not user:
                 raise CustomException(detail="Invalid email or password", status_code=status.HTTP_401_UNAUTHORIZED)
 
             return user
 
+        except CustomException as e:
+            if e.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+                raise
+            raise CustomException(detail=str(e), status_code=status.HTTP_404_NOT_FOUND)
+
         except Exception as e:
             raise CustomException(detail=str(e), status_code=status.HTTP_404_NOT_FOUND)
-        
+
+    def get_cached_user_by_id(self, user_id):
+        """
+        Retrieves user by id from the user cache, falling back to the database.
+        Returns None when the user does not exist.
+        """
+        user = self.user_cache.get(user_id)
+
+        if user is None:
+            user = User.objects.filter(id=user_id).first()
+
+            if user is not None:
+                self.user_cache.set(user)
+
+        return user
+
     def get_user_by_id(self, user_id):
         """
         Retrieves user by id
         """
         try:
-            user = User.objects.get(id=user_id)
+            user = self.get_cached_user_by_id(user_id)
+
+            if user is None:
+                raise User.DoesNotExist("User matching query does not exist.")
+
             return user
         
         except Exception as e:
@@ -0,0 +1,19 @@
+from abc import ABC, abstractmethod
+from ...models import Chat
+
+class ArchiveDaoInterface(ABC):
+    """
+    Interface for Message Archive DAO
+    """
+
+    @abstractmethod
+    def archive_inactive_chats(self, days: int, batch_size: int):
+        pass
+
+    @abstractmethod
+    def rehydrate_chat(self, chat: Chat):
+        pass
+
+    @abstractmethod
+    def get_stats(self):
+        pass
@@ -12,4 +12,8 @@ class ChatDaoInterface(ABC):
 
     @abstractmethod
     def save_message(self, chat: Chat, role, content):
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def save_messages(self, chat: Chat, messages):
+        pass
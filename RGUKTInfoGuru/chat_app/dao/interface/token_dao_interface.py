@@ -0,0 +1,14 @@
+from abc import ABC, abstractmethod
+
+class TokenDaoInterface(ABC):
+    """
+    Interface for JWT Token DAO
+    """
+
+    @abstractmethod
+    def get_blacklisted_jtis(self, after_id: int):
+        pass
+
+    @abstractmethod
+    def purge_expired_tokens(self, batch_size: int):
+        pass
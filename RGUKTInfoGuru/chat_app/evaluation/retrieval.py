@@ -0,0 +1,130 @@
+import json
+import math
+import os
+import re
+import time
+import unicodedata
+
+GOLDEN_SET_PATH = os.path.join(os.path.dirname(__file__), "golden_set.json")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def load_golden_set(path=GOLDEN_SET_PATH):
+    """
+    Loads the golden set, a list of questions with the dataset files that answer
+    them and the phrases a retrieved chunk must contain to count as relevant.
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def normalize(text):
+    """
+    NFKC folds the ligatures pypdf extracts (e.g. "ﬁ"), whitespace differences are ignored
+    """
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip().lower()
+
+
+def estimate_tokens(text):
+    """
+    Counts tokens with tiktoken when it is installed, otherwise estimates 4 characters per token
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return len(text) // 4
+
+    return len(tiktoken.get_encoding("cl100k_base").encode(text))
+
+
+def percentile(values, share):
+    """
+    Nearest rank percentile, share between 0 and 1
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(share * len(ordered)) - 1)]
+
+
+def evaluate_case(case, documents):
+    """
+    Scores the documents retrieved for one golden question.
+
+    Returns:
+        dict: The share of expected phrases found in chunks from the expected sources, whether
+            any expected source was retrieved, the rank of the first chunk containing an expected
+            phrase and its reciprocal, and the prompt tokens of the question with the context.
+    """
+    phrases = [normalize(phrase) for phrase in case["answer_contains"]]
+    sources = set(case.get("sources", []))
+    found = set()
+    first_hit = None
+
+    for rank, document in enumerate(documents, start=1):
+        if sources and document.metadata.get("source") not in sources:
+            continue
+
+        text = normalize(document.page_content)
+        matched = {phrase for phrase in phrases if phrase in text}
+
+        if matched and first_hit is None:
+            first_hit = rank
+        found |= matched
+
+    context = "\n\n".join(document.page_content for document in documents)
+    retrieved_sources = [document.metadata.get("source") for document in documents]
+
+    return {
+        "question": case["question"],
+        "recall": len(found) / len(phrases),
+        "source_hit": not sources or any(source in sources for source in retrieved_sources),
+        "first_hit": first_hit,
+        "reciprocal_rank": 1 / first_hit if first_hit else 0.0,
+        "prompt_tokens": estimate_tokens(f"{case['question']}\n\n{context}"),
+        "sources": retrieved_sources,
+    }
+
+
+def evaluate_retrieval(search, golden_set, k=4):
+    """
+    Runs every golden question through the search function and times each search
+
+    Args:
+        search (callable): Returns the top k Documents of a question, called as search(question, k).
+        golden_set (list): The golden questions.
+        k (int): The number of chunks retrieved per question.
+
+    Returns:
+        dict: Mean recall@k, hit rate, source hit rate, MRR and prompt tokens, the
+            p50/p99 search latency in milliseconds and the per question results.
+    """
+    cases = []
+
+    for case in golden_set:
+        started = time.perf_counter()
+        documents = search(case["question"], k)
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        cases.append({**evaluate_case(case, documents), "latency_ms": round(latency_ms, 2)})
+
+    count = len(cases) or 1
+    latencies = [case["latency_ms"] for case in cases]
+
+    return {
+        "questions": len(cases),
+        "k": k,
+        "recall": sum(case["recall"] for case in cases) / count,
+        "hit_rate": sum(case["first_hit"] is not None for case in cases) / count,
+        "source_hit_rate": sum(case["source_hit"] for case in cases) / count,
+        "mrr": sum(case["reciprocal_rank"] for case in cases) / count,
+        "avg_prompt_tokens": sum(case["prompt_tokens"] for case in cases) / count,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.5),
+            "p99": percentile(latencies, 0.99),
+            "mean": sum(latencies) / count,
+        },
+        "cases": cases,
+    }
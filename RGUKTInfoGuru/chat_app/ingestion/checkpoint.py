@@ -0,0 +1,89 @@
+import fcntl
+import json
+import os
+import time
+
+from .config import BUILD_CHECKPOINT_FILE_NAME, BUILD_LOCK_FILE_NAME
+
+
+class BuildLocked(Exception):
+    """
+    Raised when another build holds the lock of the index directory
+    """
+
+
+class BuildLock:
+    """
+    Exclusive, non-blocking lock on an index directory, so scheduled builds never overlap.
+    The lock is released by the OS if the process dies.
+    """
+
+    def __init__(self, persist_directory):
+        self.path = os.path.join(persist_directory, BUILD_LOCK_FILE_NAME)
+        self._file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, "w")
+
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._file.close()
+            raise BuildLocked(f"Another build is running on {os.path.dirname(self.path)}")
+
+        return self
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+class BuildCheckpoint:
+    """
+    Progress of a running build. The manifest already records every finished file,
+    so a resumed build only redoes the files that were in flight; the checkpoint
+    tells the next run that a build was interrupted and how far it got.
+    """
+
+    def __init__(self, persist_directory):
+        self.path = os.path.join(persist_directory, BUILD_CHECKPOINT_FILE_NAME)
+        self.data = None
+
+    def load(self):
+        """
+        Returns the checkpoint of an interrupted build or None
+        """
+        if not os.path.exists(self.path):
+            return None
+
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self):
+        self.data["updated_at"] = time.time()
+        tmp_path = f"{self.path}.tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+
+        os.replace(tmp_path, self.path)
+
+    def start(self, total_files, previous=None):
+        self.data = {
+            "started_at": previous["started_at"] if previous else time.time(),
+            "resumes": previous["resumes"] + 1 if previous else 0,
+            "total_files": total_files,
+            "files_done": 0,
+            "chunks_done": 0,
+        }
+        self.save()
+
+    def file_done(self, chunk_count):
+        self.data["files_done"] += 1
+        self.data["chunks_done"] += chunk_count
+        self.save()
+
+    def finish(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
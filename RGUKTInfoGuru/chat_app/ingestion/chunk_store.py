@@ -0,0 +1,246 @@
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+from langchain_core.documents import Document
+
+from .config import CHUNK_STORE_FILE_NAME
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    page INTEGER,
+    text TEXT NOT NULL,
+    metadata TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS chunks_source_position ON chunks (source, position);
+CREATE TABLE IF NOT EXISTS chunk_signatures (
+    chunk_id TEXT PRIMARY KEY,
+    signature BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS chunk_bands (
+    band_key TEXT NOT NULL,
+    chunk_id TEXT NOT NULL,
+    PRIMARY KEY (band_key, chunk_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS chunk_bands_chunk ON chunk_bands (chunk_id);
+CREATE TABLE IF NOT EXISTS chunk_sources (
+    chunk_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    page INTEGER
+);
+CREATE INDEX IF NOT EXISTS chunk_sources_chunk ON chunk_sources (chunk_id);
+CREATE INDEX IF NOT EXISTS chunk_sources_source ON chunk_sources (source);
+"""
+
+
+class ChunkStore:
+    """
+    On-disk store of the raw chunk text and metadata keyed by chunk id.
+
+    Backed by SQLite with memory-mapped reads, so callers fetch just the chunks
+    they need (by id, by source, or the neighbours of a chunk) without loading
+    the corpus into memory, and nothing is ever unpickled.
+    """
+
+    def __init__(self, path, readonly=False, mmap_size=256 * 1024 * 1024):
+        self.path = path
+        self.readonly = readonly
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+
+        if not readonly:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with self.connection:
+                self.connection.executescript(SCHEMA)
+
+    @classmethod
+    def for_index(cls, persist_directory, readonly=False):
+        """
+        Opens the chunk store that belongs to the index in the given Chroma directory
+        """
+        return cls(os.path.join(persist_directory, CHUNK_STORE_FILE_NAME), readonly=readonly)
+
+    @property
+    def connection(self):
+        """
+        One connection per thread, SQLite connections must not be shared across threads
+        """
+        connection = getattr(self._local, "connection", None)
+
+        if connection is None:
+            if self.readonly:
+                connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            else:
+                connection = sqlite3.connect(self.path)
+                connection.execute("PRAGMA journal_mode=WAL")
+
+            connection.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            self._local.connection = connection
+
+        return connection
+
+    def put_many(self, chunk_ids, chunks, positions, signatures=None):
+        """
+        Inserts or replaces chunks
+
+        Args:
+            chunk_ids (list): The ids of the chunks, the same ids as in Chroma.
+            chunks (list): The chunk Documents.
+            positions (list): The position of every chunk within its source file.
+            signatures (list, optional): The (MinHash signature, band keys) of every chunk, used for near duplicate lookups.
+        """
+        rows = [
+            (
+                chunk_id,
+                chunk.metadata.get("source", ""),
+                position,
+                chunk.metadata.get("page"),
+                chunk.page_content,
+                json.dumps(chunk.metadata, ensure_ascii=False),
+            )
+            for chunk_id, chunk, position in zip(chunk_ids, chunks, positions)
+        ]
+
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+            if signatures is not None:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO chunk_signatures VALUES (?, ?)",
+                    [(chunk_id, signature.tobytes()) for chunk_id, (signature, _) in zip(chunk_ids, signatures)],
+                )
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO chunk_bands VALUES (?, ?)",
+                    [
+                        (band_key, chunk_id)
+                        for chunk_id, (_, band_keys) in zip(chunk_ids, signatures)
+                        for band_key in band_keys
+                    ],
+                )
+
+    def delete_many(self, chunk_ids):
+        rows = [(chunk_id,) for chunk_id in chunk_ids]
+
+        with self.connection:
+            for table in ("chunks", "chunk_signatures", "chunk_bands", "chunk_sources"):
+                self.connection.executemany(f"DELETE FROM {table} WHERE chunk_id = ?", rows)
+
+    def find_signatures(self, band_keys):
+        """
+        Returns the (chunk id, signature) of the stored chunks sharing at least one band with a signature
+        """
+        placeholders = ",".join("?" * len(band_keys))
+        rows = self.connection.execute(
+            f"SELECT DISTINCT s.chunk_id, s.signature FROM chunk_bands b "
+            f"JOIN chunk_signatures s ON s.chunk_id = b.chunk_id WHERE b.band_key IN ({placeholders})",
+            band_keys,
+        )
+
+        return [(chunk_id, np.frombuffer(signature, dtype=np.uint32)) for chunk_id, signature in rows]
+
+    def add_source(self, chunk_id, source, page=None):
+        """
+        Records that a near duplicate of the chunk was dropped from another source
+        """
+        with self.connection:
+            self.connection.execute("INSERT INTO chunk_sources VALUES (?, ?, ?)", (chunk_id, source, page))
+
+    def delete_sources(self, source):
+        """
+        Forgets the duplicates that were dropped from a source, when it is removed or re-indexed
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM chunk_sources WHERE source = ?", (source,))
+
+    def get_sources(self, chunk_id):
+        """
+        Returns the (source, page) of the chunk followed by those of every near duplicate merged into it
+        """
+        rows = self.connection.execute(
+            "SELECT source, page FROM chunks WHERE chunk_id = ? "
+            "UNION ALL SELECT source, page FROM chunk_sources WHERE chunk_id = ?",
+            (chunk_id, chunk_id),
+        )
+
+        return rows.fetchall()
+
+    def count_merged(self):
+        return self.connection.execute("SELECT COUNT(*) FROM chunk_sources").fetchone()[0]
+
+    @staticmethod
+    def to_document(chunk_id, text, metadata):
+        return Document(id=chunk_id, page_content=text, metadata=json.loads(metadata))
+
+    def get(self, chunk_id):
+        """
+        Returns the chunk as a Document or None
+        """
+        row = self.connection.execute(
+            "SELECT chunk_id, text, metadata FROM chunks WHERE chunk_id = ?", (chunk_id,)
+        ).fetchone()
+
+        return self.to_document(*row) if row else None
+
+    def get_many(self, chunk_ids):
+        """
+        Returns the chunks in the order of the given ids, skipping unknown ids
+        """
+        found = {}
+
+        for start in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for row in self.connection.execute(
+                f"SELECT chunk_id, text, metadata FROM chunks WHERE chunk_id IN ({placeholders})", batch
+            ):
+                found[row[0]] = self.to_document(*row)
+
+        return [found[chunk_id] for chunk_id in chunk_ids if chunk_id in found]
+
+    def get_neighbours(self, chunk_id, before=1, after=1):
+        """
+        Returns the chunk together with the chunks around it in the same source, in reading order
+        """
+        row = self.connection.execute(
+            "SELECT source, position FROM chunks WHERE chunk_id = ?", (chunk_id,)
+        ).fetchone()
+
+        if row is None:
+            return []
+
+        source, position = row
+        rows = self.connection.execute(
+            "SELECT chunk_id, text, metadata FROM chunks WHERE source = ? AND position BETWEEN ? AND ? ORDER BY position",
+            (source, position - before, position + after),
+        )
+
+        return [self.to_document(*row) for row in rows]
+
+    def iter_source(self, source):
+        """
+        Yields the chunks of one source file in reading order
+        """
+        rows = self.connection.execute(
+            "SELECT chunk_id, text, metadata FROM chunks WHERE source = ? ORDER BY position", (source,)
+        )
+
+        for row in rows:
+            yield self.to_document(*row)
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def average_length(self):
+        return self.connection.execute("SELECT COALESCE(AVG(LENGTH(text)), 0) FROM chunks").fetchone()[0]
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
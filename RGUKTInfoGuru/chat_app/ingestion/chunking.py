@@ -0,0 +1,210 @@
+import re
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from .config import CHUNKING_STRATEGIES
+
+BULLET_RE = re.compile(r"^(?:[•◦▪●○■□➢►\-*–]|o(?=\s)|\(?\d{1,2}[.)](?!\d)|\(?[a-zA-Z][.)](?=\s)|Step \d+:)\s*")
+TABLE_GAP_RE = re.compile(r"\S(?:\s{2,}|\t|\s\|\s)\S")
+FIELD_RE = re.compile(r"^[^:]{1,40}:\s+\S")
+NUMBER_RE = re.compile(r"(?:Rs\.?|₹)?\s?\d[\d,./]*")
+# Table rows as pypdf extracts them: the serial number glued to the first cell, or an amount in a short line
+ROW_RE = re.compile(r"^\d{1,2}(?:-\d{1,2})?\s?[A-Z]|^.{0,100}(?:Rs\.?|₹)\s?\d[\d,]*(?:/-)?[^.]*$")
+SENTENCE_END = (".", "!", "?", ";")
+
+# A line at least this share of the longest line of its page was wrapped by the PDF renderer
+WRAP_RATIO = 0.75
+
+# This many short lines in a row are a list, a roster or a table column, not headings
+HEADING_RUN_AS_LIST = 3
+
+# Raised whenever the splitter changes the chunks it makes, the indexes are then rebuilt with it
+SPLITTER_VERSION = 2
+
+HEADING = "heading"
+ITEM = "item"
+ROW = "row"
+PARAGRAPH = "paragraph"
+
+
+def classify_line(line):
+    # "Email: ..." style fields are kept whole like list items
+    if BULLET_RE.match(line) or FIELD_RE.match(line):
+        return ITEM
+    if ROW_RE.match(line) or len(TABLE_GAP_RE.findall(line)) >= 2 or len(NUMBER_RE.findall(line)) >= 3:
+        return ROW
+    if len(line) <= 60 and len(line.split()) <= 8 and not line.endswith(SENTENCE_END + (",",)) and not any(
+        char in line for char in ",@"
+    ):
+        return HEADING
+    return PARAGRAPH
+
+
+def parse_blocks(text):
+    """
+    Splits extracted PDF text into (kind, text) blocks: headings, list items, table
+    rows and paragraphs. Lines the PDF renderer wrapped are joined back to the
+    block they continue, so a list item or row is never split in two.
+    """
+    lines = [line.strip() for line in text.splitlines()]
+    lines = [line for line in lines if line]
+
+    if not lines:
+        return []
+
+    wrap_width = max(len(line) for line in lines) * WRAP_RATIO
+    blocks = []
+    previous = None
+
+    for line in lines:
+        kind = classify_line(line)
+        continues = (
+            previous is not None
+            and len(previous) >= wrap_width
+            and not previous.endswith(SENTENCE_END)
+            and kind != ITEM
+        )
+
+        if continues and blocks and blocks[-1][0] != HEADING:
+            blocks[-1] = (blocks[-1][0], f"{blocks[-1][1]} {line}")
+        else:
+            blocks.append((kind, line))
+
+        previous = line
+
+    return list_heading_runs(blocks)
+
+
+def list_heading_runs(blocks):
+    """
+    Turns runs of heading-like blocks into list items under the first of them
+    """
+    result = []
+    start = 0
+
+    while start < len(blocks):
+        end = start
+        while end < len(blocks) and blocks[end][0] == HEADING:
+            end += 1
+
+        if end - start >= HEADING_RUN_AS_LIST:
+            result.append(blocks[start])
+            result.extend((ITEM, block) for _, block in blocks[start + 1:end])
+            start = end
+        elif end > start:
+            result.extend(blocks[start:end])
+            start = end
+        else:
+            result.append(blocks[start])
+            start += 1
+
+    return result
+
+
+class StructuredTextSplitter:
+    """
+    Chunks documents along their structure instead of at fixed character offsets.
+
+    Blocks are packed into chunks of at most chunk_size characters. A heading
+    starts a new chunk once the current one is half full, list items and table
+    rows are never cut, and a chunk that continues a section starts with the
+    section heading. The last blocks of a chunk, up to chunk_overlap characters,
+    are repeated at the start of the next chunk of the same section.
+    """
+
+    def __init__(self, chunk_size=1500, chunk_overlap=200):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.fallback = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    def split_documents(self, documents):
+        chunks = []
+        heading = None
+
+        # The section heading carries over to the next page, tables and lists often span pages
+        for document in documents:
+            page_chunks, heading = self.split_text(document.page_content, heading)
+
+            for text, section in page_chunks:
+                metadata = dict(document.metadata)
+                if section:
+                    metadata["section"] = section
+                chunks.append(Document(page_content=text, metadata=metadata))
+
+        return chunks
+
+    def split_text(self, text, heading=None):
+        """
+        Returns the (chunk text, section heading) pairs of the text and the heading in effect at its end
+        """
+        chunks = []
+        current = []
+        size = 0
+        # Blocks added since the last flush, the carried heading and overlap alone are not a chunk
+        fresh = 0
+
+        def flush(keep_overlap):
+            nonlocal current, size, fresh
+            if fresh:
+                chunks.append(("\n".join(block for _, block in current), heading))
+            fresh = 0
+
+            carried = []
+            if keep_overlap:
+                carried_size = 0
+                for kind, block in reversed(current):
+                    if kind == HEADING or carried_size + len(block) > self.chunk_overlap:
+                        break
+                    carried.insert(0, (kind, block))
+                    carried_size += len(block) + 1
+
+            current = ([(HEADING, heading)] if heading and keep_overlap else []) + carried
+            size = sum(len(block) + 1 for _, block in current)
+
+        for kind, block in parse_blocks(text):
+            if kind == HEADING:
+                if size >= self.chunk_size / 2 or size + len(block) > self.chunk_size:
+                    flush(keep_overlap=False)
+                heading = block
+                current.append((kind, block))
+                size += len(block) + 1
+                fresh += 1
+                continue
+
+            pieces = [block] if len(block) <= self.chunk_size else self.fallback.split_text(block)
+
+            for piece in pieces:
+                if size + len(piece) > self.chunk_size and current:
+                    flush(keep_overlap=True)
+
+                # The carried overlap, oldest block first, and then the heading make room for the piece
+                while current and size + len(piece) > self.chunk_size:
+                    position = 1 if len(current) > 1 and current[0][0] == HEADING else 0
+                    _, dropped = current.pop(position)
+                    size -= len(dropped) + 1
+
+                current.append((kind, piece))
+                size += len(piece) + 1
+                fresh += 1
+
+        flush(keep_overlap=False)
+        return chunks, heading
+
+
+def make_splitter(strategy):
+    """
+    Builds the splitter a chunking strategy describes
+    """
+    if strategy.get("splitter", "structured") == "recursive":
+        return RecursiveCharacterTextSplitter(chunk_size=strategy["chunk_size"], chunk_overlap=strategy["chunk_overlap"])
+
+    return StructuredTextSplitter(chunk_size=strategy["chunk_size"], chunk_overlap=strategy["chunk_overlap"])
+
+
+def get_strategy(relpath, strategies=CHUNKING_STRATEGIES):
+    """
+    Returns the chunking strategy of the top level dataset folder of the file
+    """
+    folder = relpath.split("/", 1)[0] if "/" in relpath else ""
+    return strategies.get(folder, strategies["default"])
@@ -0,0 +1,94 @@
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+DATASET_PATH = os.getenv("DATASET_PATH") or str(BASE_DIR / "rguktBasarDataset")
+CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH") or os.path.expanduser("~/chroma_db")
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+
+CHUNK_SIZE = 1500
+CHUNK_OVERLAP = 200
+
+# Chunking per top level dataset folder, "default" applies to the other folders. The "structured"
+# splitter keeps headings, list items and table rows whole, "recursive" cuts at character offsets.
+CHUNKING_STRATEGIES = {
+    "default": {"splitter": "structured", "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP},
+    # Faculty and lab listings, one entry per list item
+    "departments": {"splitter": "structured", "chunk_size": 1200, "chunk_overlap": 150},
+    # Long placement policies, numbered rules reference each other
+    "tnp": {"splitter": "structured", "chunk_size": 1800, "chunk_overlap": 300},
+    # Short procedures and eligibility tables
+    "scholarship": {"splitter": "structured", "chunk_size": 1000, "chunk_overlap": 100},
+}
+
+# Category of the chunks of each top level dataset folder, scraped folders included. Files of
+# other folders get the folder name, files at the top level "general".
+CATEGORIES = {
+    "about_rgukt": "about",
+    "rgukt-info": "about",
+    "facilities": "about",
+    "acadamic": "academic",
+    "academics": "academic",
+    "administration": "academic",
+    "departments": "departments",
+    "other_files": "departments",
+    "scholarship": "scholarship",
+    "tnp": "placements",
+    "training_and_placements": "placements",
+}
+
+# Department of a file, matched against the words of its name ("cseDept", "labs_ece", "me_peo_po")
+DEPARTMENT_FILE_WORDS = {
+    "cse": ["cse"],
+    "ece": ["ece"],
+    "eee": ["eee", "electrical"],
+    "mechanical": ["me", "mechanical"],
+    "civil": ["civil"],
+    "chemical": ["chemical"],
+    "mme": ["mme", "materials", "metallurgical", "metallurigical"],
+    "bioscience": ["bio", "bioscience"],
+    "chemistry": ["chemistry"],
+    "physics": ["physics"],
+    "mathematics": ["mathematics", "maths"],
+    "humanities": ["humanities"],
+    "management": ["management"],
+}
+
+# Names of the departments, used to route questions and to tag files that open with "Department of ..."
+DEPARTMENT_ALIASES = {
+    "cse": ["cse", "computer science", "computer engineering", "computers"],
+    "ece": ["ece", "electronics", "electronics and communication"],
+    "eee": ["eee", "electrical", "electrical and electronics"],
+    "mechanical": ["mechanical", "mech"],
+    "civil": ["civil"],
+    "chemical": ["chemical engineering", "chemical dept", "chemical department"],
+    "mme": ["mme", "metallurgy", "metallurgical", "materials"],
+    "bioscience": ["bioscience", "bio science", "biosciences", "biology", "biotechnology"],
+    "chemistry": ["chemistry"],
+    "physics": ["physics"],
+    "mathematics": ["mathematics", "maths", "math"],
+    "humanities": ["humanities"],
+    "management": ["management", "mba"],
+}
+
+# Written next to the Chroma files, records what the index was built from
+MANIFEST_FILE_NAME = "index_manifest.json"
+
+# Written next to the Chroma files, holds the raw text and metadata of every chunk
+CHUNK_STORE_FILE_NAME = "chunks.sqlite3"
+
+# Chunks at least this similar (estimated Jaccard over word shingles) to an indexed chunk are
+# merged into it instead of being embedded again, 0 turns near duplicate detection off
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+DEDUP_NUM_PERM = 128
+
+# Written next to the Chroma files by `manage.py build_faq`, the FAQ answers generated from this index
+FAQ_STORE_FILE_NAME = "faq_answers.json"
+
+# Written next to the Chroma files while a build runs, removed once it completes
+BUILD_CHECKPOINT_FILE_NAME = "build_checkpoint.json"
+BUILD_LOCK_FILE_NAME = "build.lock"
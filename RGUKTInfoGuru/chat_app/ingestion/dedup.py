@@ -0,0 +1,135 @@
+import hashlib
+import re
+
+import numpy as np
+
+# Mersenne prime used for the universal hash family, small enough that a * x + b fits in uint64
+_PRIME = (1 << 31) - 1
+_WORD_RE = re.compile(r"\w+")
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles. The share of equal positions in two
+    signatures estimates the Jaccard similarity of the two texts.
+    """
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        generator = np.random.RandomState(seed)
+        self.a = generator.randint(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self.b = generator.randint(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text):
+        words = _WORD_RE.findall(text.lower())
+
+        if len(words) <= self.shingle_size:
+            return {" ".join(words)}
+
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, text):
+        hashes = np.fromiter(
+            (
+                int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little") % _PRIME
+                for shingle in self.shingles(text)
+            ),
+            dtype=np.uint64,
+        )
+        return ((np.outer(self.a, hashes) + self.b[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+    @staticmethod
+    def similarity(signature, other):
+        return float(np.mean(signature == other))
+
+
+class NearDuplicateDetector:
+    """
+    Finds chunks that are near duplicates of an already indexed chunk.
+
+    Candidates are looked up with locality sensitive hashing over signature bands,
+    both among the chunks seen in this run and among the chunks already in the
+    chunk store, and kept as duplicates only when their estimated similarity is
+    at least the threshold. The duplicate is dropped and its source is recorded
+    on the chunk it duplicates, so provenance from every original is kept.
+
+    With indexed_chunk_ids, stored chunks outside that set are never matched, so
+    leftovers of an interrupted run (e.g. an earlier copy of the same file) can not
+    swallow the chunks that replace them.
+    """
+
+    def __init__(self, chunk_store, threshold=0.9, num_perm=128, bands=32, indexed_chunk_ids=None):
+        self.chunk_store = chunk_store
+        self.indexed_chunk_ids = indexed_chunk_ids
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets = {}
+        self._signatures = {}
+        self.checked = 0
+        self.dropped = 0
+
+    def band_keys(self, signature):
+        return [
+            f"{band}:{hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8).hexdigest()}"
+            for band in range(self.bands)
+        ]
+
+    def find_duplicate(self, signature, band_keys):
+        """
+        Returns the id of an indexed chunk the signature is a near duplicate of, or None
+        """
+        candidates = set()
+        for key in band_keys:
+            candidates.update(self._buckets.get(key, ()))
+
+        signatures = {
+            chunk_id: signature
+            for chunk_id, signature in self.chunk_store.find_signatures(band_keys)
+            if self.indexed_chunk_ids is None or chunk_id in self.indexed_chunk_ids
+        }
+        signatures.update({chunk_id: self._signatures[chunk_id] for chunk_id in candidates})
+
+        best_id, best_similarity = None, self.threshold
+        for chunk_id, other in signatures.items():
+            similarity = self.hasher.similarity(signature, other)
+            if similarity >= best_similarity:
+                best_id, best_similarity = chunk_id, similarity
+
+        return best_id
+
+    def filter(self, chunk_ids, chunks):
+        """
+        Drops the near duplicate chunks of one file.
+
+        Args:
+            chunk_ids (list): The ids of the chunks.
+            chunks (list): The chunk Documents.
+
+        Returns:
+            tuple: The kept (id, position, chunk, signature, band keys) tuples, and the ids of the chunks the dropped ones were merged into.
+        """
+        kept = []
+        merged_into = []
+
+        for position, (chunk_id, chunk) in enumerate(zip(chunk_ids, chunks)):
+            self.checked += 1
+            signature = self.hasher.signature(chunk.page_content)
+            band_keys = self.band_keys(signature)
+            duplicate_of = self.find_duplicate(signature, band_keys)
+
+            if duplicate_of is not None:
+                self.dropped += 1
+                merged_into.append(duplicate_of)
+                self.chunk_store.add_source(duplicate_of, chunk.metadata.get("source", ""), chunk.metadata.get("page"))
+                continue
+
+            self._signatures[chunk_id] = signature
+            for key in band_keys:
+                self._buckets.setdefault(key, []).append(chunk_id)
+
+            kept.append((chunk_id, position, chunk, signature, band_keys))
+
+        return kept, merged_into
@@ -0,0 +1,364 @@
+import argparse
+import hashlib
+import logging
+import os
+
+from .config import (
+    CATEGORIES, CHROMA_DB_PATH, CHUNK_STORE_FILE_NAME, CHUNKING_STRATEGIES, DATASET_PATH, DEDUP_NUM_PERM,
+    DEDUP_THRESHOLD, DEPARTMENT_ALIASES, DEPARTMENT_FILE_WORDS, EMBEDDING_MODEL_NAME, MANIFEST_FILE_NAME
+)
+from .chunk_store import ChunkStore
+from .chunking import SPLITTER_VERSION
+from .dedup import NearDuplicateDetector
+from .loader import file_sha256, iter_dataset_files
+from .manifest import IndexManifest
+from .pipeline import IngestionPipeline
+
+logger = logging.getLogger(__name__)
+
+# Chroma rejects very large delete calls, deletes are split into batches of this size
+WRITE_BATCH_SIZE = 256
+
+
+class IndexPlan:
+    """
+    The difference between the dataset on disk and what the manifest says is indexed.
+    """
+
+    def __init__(self):
+        self.added = []
+        self.changed = []
+        self.removed = []
+        self.dependent = []
+        self.unchanged = []
+        self.stale_chunk_ids = []
+        self.full_rebuild = False
+
+    @property
+    def to_index(self):
+        return self.added + self.changed + self.dependent
+
+    @property
+    def has_changes(self):
+        return bool(self.to_index or self.removed or self.stale_chunk_ids)
+
+    def summary(self):
+        """
+        Returns the plan as printable lines
+        """
+        lines = []
+
+        if self.full_rebuild:
+            lines.append("Index settings changed or no manifest found, every file is re-indexed.")
+
+        for label, entries in (
+            ("added", self.added), ("changed", self.changed), ("removed", self.removed), ("dependent", self.dependent)
+        ):
+            for entry in entries:
+                lines.append(f"  {label:<9} {entry['relpath']}")
+
+        if self.stale_chunk_ids:
+            lines.append(f"  {len(self.stale_chunk_ids)} chunks without a manifest entry are deleted")
+
+        lines.append(
+            f"{len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed, "
+            f"{len(self.dependent)} dependent, {len(self.unchanged)} unchanged"
+        )
+
+        return lines
+
+
+class IncrementalIndexer:
+    """
+    Keeps the Chroma index in sync with the dataset folder.
+
+    Every file is identified by its content hash. Only added or changed files are
+    parsed and embedded, the chunks of changed and removed files are deleted by id.
+    Chunk ids are derived from the file path, its content hash and the chunk
+    position, so the same input always produces the same ids.
+
+    Near duplicate chunks are merged into the chunk they duplicate. A file with
+    merged chunks depends on the files owning those chunks and is re-indexed
+    ("dependent") when any of them changes or is removed.
+    """
+
+    def __init__(self, dataset_path=DATASET_PATH, persist_directory=CHROMA_DB_PATH, embeddings=None, chunking=None,
+                 **pipeline_options):
+        self.dataset_path = dataset_path
+        self.chunking = chunking or CHUNKING_STRATEGIES
+        self.persist_directory = persist_directory
+        self.manifest = IndexManifest.load(os.path.join(persist_directory, MANIFEST_FILE_NAME))
+        self.pipeline_options = pipeline_options
+        self._embeddings = embeddings
+        self._vectordb = None
+        self._chunk_store = None
+
+    @property
+    def settings(self):
+        """
+        Index settings, changing any of them invalidates every indexed chunk
+        """
+        return {
+            "embedding_model": EMBEDDING_MODEL_NAME,
+            "chunking": self.chunking,
+            "splitter_version": SPLITTER_VERSION,
+            "categories": CATEGORIES,
+            "department_file_words": DEPARTMENT_FILE_WORDS,
+            "department_aliases": DEPARTMENT_ALIASES,
+            "chunk_store": CHUNK_STORE_FILE_NAME,
+            "dedup_threshold": DEDUP_THRESHOLD,
+            "dedup_num_perm": DEDUP_NUM_PERM,
+        }
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            from langchain_huggingface import HuggingFaceEmbeddings
+
+            self._embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+
+        return self._embeddings
+
+    @property
+    def vectordb(self):
+        if self._vectordb is None:
+            from langchain_chroma import Chroma
+
+            self._vectordb = Chroma(persist_directory=self.persist_directory, embedding_function=self.embeddings)
+
+        return self._vectordb
+
+    @property
+    def chunk_store(self):
+        if self._chunk_store is None:
+            self._chunk_store = ChunkStore.for_index(self.persist_directory)
+
+        return self._chunk_store
+
+    @staticmethod
+    def make_chunk_ids(relpath, sha256, count):
+        prefix = hashlib.sha1(f"{relpath}\0{sha256}".encode("utf-8")).hexdigest()[:24]
+        return [f"{prefix}-{index:05d}" for index in range(count)]
+
+    def plan(self):
+        """
+        Compares the dataset with the manifest without parsing or embedding anything
+        """
+        plan = IndexPlan()
+        indexed = dict(self.manifest.files)
+        plan.full_rebuild = not self.manifest.exists or self.manifest.settings != self.settings
+
+        if plan.full_rebuild:
+            plan.stale_chunk_ids = self.get_unmanaged_chunk_ids()
+
+        for relpath, file_path in iter_dataset_files(self.dataset_path):
+            entry = {"relpath": relpath, "path": file_path, "sha256": file_sha256(file_path)}
+            previous = indexed.pop(relpath, None)
+
+            if previous is None:
+                plan.added.append(entry)
+            elif plan.full_rebuild or previous["sha256"] != entry["sha256"]:
+                plan.changed.append(entry)
+            else:
+                plan.unchanged.append(entry)
+
+        plan.removed = [{"relpath": relpath} for relpath in sorted(indexed)]
+        self.add_dependents(plan)
+
+        return plan
+
+    def add_dependents(self, plan):
+        """
+        Moves unchanged files with chunks merged into a chunk that is about to be deleted to plan.dependent
+        """
+        deleted = {
+            chunk_id
+            for entry in plan.changed + plan.removed
+            for chunk_id in self.manifest.files.get(entry["relpath"], {}).get("chunk_ids", [])
+        }
+
+        while deleted:
+            newly_deleted = set()
+
+            for entry in list(plan.unchanged):
+                indexed = self.manifest.files[entry["relpath"]]
+
+                if deleted.intersection(indexed.get("merged_into", [])):
+                    plan.unchanged.remove(entry)
+                    plan.dependent.append(entry)
+                    newly_deleted.update(indexed["chunk_ids"])
+
+            deleted = newly_deleted
+
+    def get_unmanaged_chunk_ids(self):
+        """
+        Returns the ids of chunks in the collection the manifest does not know about,
+        e.g. an index created by Chroma.from_documents before the manifest existed.
+        """
+        if not os.path.isdir(self.persist_directory):
+            return []
+
+        known = set(self.manifest.all_chunk_ids())
+        return [chunk_id for chunk_id in self.vectordb.get(include=[])["ids"] if chunk_id not in known]
+
+    def get_partial_chunk_ids(self, relpaths):
+        """
+        Returns the ids of chunks of the given files the manifest does not know about,
+        written by a run that was interrupted before the files were recorded.
+        """
+        if not relpaths or not os.path.isdir(self.persist_directory):
+            return []
+
+        known = set(self.manifest.all_chunk_ids())
+        chunk_ids = []
+
+        for start in range(0, len(relpaths), WRITE_BATCH_SIZE):
+            found = self.vectordb.get(where={"source": {"$in": relpaths[start:start + WRITE_BATCH_SIZE]}}, include=[])
+            chunk_ids.extend(chunk_id for chunk_id in found["ids"] if chunk_id not in known)
+
+        return chunk_ids
+
+    def delete_chunks(self, chunk_ids):
+        for start in range(0, len(chunk_ids), WRITE_BATCH_SIZE):
+            self.vectordb.delete(ids=chunk_ids[start:start + WRITE_BATCH_SIZE])
+
+        self.chunk_store.delete_many(chunk_ids)
+
+    def forget_file(self, relpath):
+        """
+        Deletes the chunks of a file and the duplicates it contributed, and drops it from the manifest
+        """
+        chunk_ids = self.manifest.files.pop(relpath)["chunk_ids"]
+        self.delete_chunks(chunk_ids)
+        self.chunk_store.delete_sources(relpath)
+        self.manifest.save()
+        return chunk_ids
+
+    def record_file(self, entry, chunk_ids):
+        """
+        Records a fully written file in the manifest and saves it
+        """
+        merged_into = sorted(set(entry.get("merged_into", [])))
+        self.manifest.files[entry["relpath"]] = {"sha256": entry["sha256"], "chunk_ids": chunk_ids}
+
+        if merged_into:
+            self.manifest.files[entry["relpath"]]["merged_into"] = merged_into
+
+        self.manifest.save()
+        logger.info(f"Indexed {len(chunk_ids)} chunks from {entry['relpath']}")
+
+    def apply(self, plan, on_file_done=None):
+        """
+        Applies the plan to the index. The manifest is saved after every file, so an
+        interrupted run only redoes the files that were in flight.
+
+        Args:
+            plan (IndexPlan): The plan returned by plan().
+            on_file_done (callable, optional): Called with (entry, chunk_ids) after every file is recorded.
+
+        Returns:
+            dict: The number of files and chunks added and removed.
+        """
+        stats = {"files_indexed": 0, "files_removed": 0, "chunks_added": 0, "chunks_removed": 0}
+
+        if plan.stale_chunk_ids:
+            self.delete_chunks(plan.stale_chunk_ids)
+            stats["chunks_removed"] += len(plan.stale_chunk_ids)
+            self.manifest.save()
+
+        for entry in plan.removed:
+            chunk_ids = self.forget_file(entry["relpath"])
+            stats["files_removed"] += 1
+            stats["chunks_removed"] += len(chunk_ids)
+
+        for entry in plan.changed + plan.dependent:
+            chunk_ids = self.forget_file(entry["relpath"])
+            stats["chunks_removed"] += len(chunk_ids)
+
+        # Only recorded once no file indexed with the old settings is left in the manifest
+        if plan.full_rebuild:
+            self.manifest.settings = self.settings
+            self.manifest.save()
+
+        if plan.to_index:
+            relpaths = [entry["relpath"] for entry in plan.to_index]
+            partial_chunk_ids = self.get_partial_chunk_ids(relpaths)
+            if partial_chunk_ids:
+                logger.info(f"Deleting {len(partial_chunk_ids)} chunks left by an interrupted run")
+                self.delete_chunks(partial_chunk_ids)
+                stats["chunks_removed"] += len(partial_chunk_ids)
+
+            # Duplicates an interrupted run dropped from these files were recorded on other chunks
+            for relpath in relpaths:
+                self.chunk_store.delete_sources(relpath)
+
+            deduplicator = None
+            if DEDUP_THRESHOLD:
+                deduplicator = NearDuplicateDetector(
+                    self.chunk_store, threshold=DEDUP_THRESHOLD, num_perm=DEDUP_NUM_PERM,
+                    indexed_chunk_ids=set(self.manifest.all_chunk_ids()),
+                )
+
+            pipeline = IngestionPipeline(
+                self.vectordb, self.embeddings, self.chunking,
+                chunk_store=self.chunk_store, deduplicator=deduplicator, **self.pipeline_options
+            )
+            def file_done(entry, chunk_ids):
+                self.record_file(entry, chunk_ids)
+                if on_file_done is not None:
+                    on_file_done(entry, chunk_ids)
+
+            pipeline_stats = pipeline.run(
+                plan.to_index,
+                lambda entry, count: self.make_chunk_ids(entry["relpath"], entry["sha256"], count),
+                on_file_done=file_done,
+            )
+            stats["files_indexed"] += pipeline_stats.files
+            stats["files_failed"] = pipeline_stats.failed
+            stats["chunks_added"] += pipeline_stats.chunks
+            stats["chunks_merged"] = pipeline_stats.duplicates
+            stats["pipeline"] = pipeline_stats
+
+        return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally updates the Chroma index from the dataset folder.")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="Dataset folder to index.")
+    parser.add_argument("--db", default=CHROMA_DB_PATH, help="Chroma persist directory.")
+    parser.add_argument("--dry-run", action="store_true", help="Only show what would change.")
+    parser.add_argument("--parse-workers", type=int, default=None, help="PDF parsing processes, defaults to the CPU count.")
+    parser.add_argument("--embed-workers", type=int, default=2, help="Embedding threads.")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks embedded and written per batch.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+
+    indexer = IncrementalIndexer(
+        dataset_path=args.dataset,
+        persist_directory=args.db,
+        parse_workers=args.parse_workers,
+        embed_workers=args.embed_workers,
+        embed_batch_size=args.batch_size,
+    )
+    plan = indexer.plan()
+
+    for line in plan.summary():
+        print(line)
+
+    if args.dry_run or not plan.has_changes:
+        return
+
+    stats = indexer.apply(plan)
+    print(
+        f"Indexed {stats['files_indexed']} files ({stats['chunks_added']} chunks), "
+        f"removed {stats['files_removed']} files ({stats['chunks_removed']} chunks), "
+        f"merged {stats.get('chunks_merged', 0)} near duplicate chunks."
+    )
+
+    if "pipeline" in stats:
+        print(stats["pipeline"].summary())
+
+
+if __name__ == "__main__":
+    main()
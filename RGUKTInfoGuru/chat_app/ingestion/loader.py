@@ -0,0 +1,136 @@
+import hashlib
+import json
+import logging
+import os
+import re
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
+
+from .config import CATEGORIES, DEPARTMENT_ALIASES, DEPARTMENT_FILE_WORDS
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".json")
+
+# Splits file names at underscores, spaces and camel case: "cseDept" -> cse, dept; "ECE_PEO_PO" -> ece, peo, po
+NAME_WORD_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+# "DEPARTMENT OF CIVIL ENGINEERING", typos included, in the first lines of a file
+DEPARTMENT_HEADING_RE = re.compile(r"\bdepart\w*\s+of\s+([^\n]+)", re.IGNORECASE)
+
+
+def iter_dataset_files(base_path):
+    """
+    Yields (relative path, absolute path) of every supported file under the dataset, in a stable order.
+    Relative paths always use forward slashes so manifests are portable between machines.
+    """
+    for root, dirs, files in os.walk(base_path):
+        dirs.sort()
+        for file in sorted(files):
+            if file.lower().endswith(SUPPORTED_EXTENSIONS):
+                file_path = os.path.join(root, file)
+                yield os.path.relpath(file_path, base_path).replace(os.sep, "/"), file_path
+
+
+def file_sha256(file_path, block_size=1 << 20):
+    """
+    Returns the SHA-256 of the file content
+    """
+    digest = hashlib.sha256()
+
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def department_from_heading(text):
+    """
+    Returns the department a "Department of ..." heading names, the alias found first in the heading wins
+    """
+    match = DEPARTMENT_HEADING_RE.search(text)
+
+    if not match:
+        return None
+
+    heading = match.group(1).lower()
+    found = [
+        (heading.find(alias), department)
+        for department, aliases in DEPARTMENT_ALIASES.items()
+        for alias in aliases
+        if re.search(rf"\b{re.escape(alias)}\b", heading)
+    ]
+
+    return min(found)[1] if found else None
+
+
+def tag_file(relpath, docs=()):
+    """
+    Derives the category and department metadata of a file from its place in the dataset, or
+    for the department from the heading of its first page when the file name does not name one.
+    Files that do not belong to a department have no department key, Chroma metadata can not be None.
+    """
+    folder = relpath.split("/", 1)[0] if "/" in relpath else ""
+    tags = {"category": CATEGORIES.get(folder, folder or "general")}
+
+    name = os.path.splitext(os.path.basename(relpath))[0]
+    words = [word.lower() for word in NAME_WORD_RE.findall(name)]
+    department = next(
+        (department for word in words for department, file_words in DEPARTMENT_FILE_WORDS.items() if word in file_words),
+        None,
+    )
+
+    if department is None and docs:
+        department = department_from_heading(docs[0].page_content[:1000])
+
+    if department:
+        tags["department"] = department
+
+    return tags
+
+
+def load_text(file_path):
+    with open(file_path, encoding="utf-8") as f:
+        return [Document(page_content=f.read())]
+
+
+def load_json(file_path):
+    """
+    Loads a scraped JSON file, one document per page with the page URL in the metadata
+    """
+    with open(file_path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    return [Document(page_content=page["text"], metadata={"url": page["url"]}) for page in data["documents"]]
+
+
+def load_file(file_path, relpath):
+    """
+    Parses a dataset file into page documents whose source is the path relative to the dataset,
+    tagged with the category and department of the file. Returns None when the file can not be
+    parsed, it is then left out of the manifest and tried again by the next build.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+
+    try:
+        if extension == ".txt":
+            docs = load_text(file_path)
+        elif extension == ".json":
+            docs = load_json(file_path)
+        else:
+            docs = PyPDFLoader(file_path).load()
+    except Exception as e:
+        logger.error(f"Error loading {file_path}: {e}")
+        return None
+
+    if not docs:
+        logger.warning(f"No text extracted from {file_path}")
+
+    tags = tag_file(relpath, docs)
+
+    for doc in docs:
+        doc.metadata["source"] = relpath
+        doc.metadata.update(tags)
+
+    return docs
@@ -0,0 +1,59 @@
+import json
+import os
+
+
+class IndexManifest:
+    """
+    Records, for every indexed file, the content hash it was indexed at and the ids
+    of the chunks it produced, plus the settings the index was built with.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, data=None):
+        self.path = path
+        self.data = data or {"version": self.VERSION, "settings": {}, "files": {}}
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads the manifest, returning an empty one when the file does not exist yet
+        """
+        if not os.path.exists(path):
+            return cls(path)
+
+        with open(path, encoding="utf-8") as f:
+            return cls(path, json.load(f))
+
+    @property
+    def exists(self):
+        return os.path.exists(self.path)
+
+    @property
+    def files(self):
+        return self.data["files"]
+
+    @property
+    def settings(self):
+        return self.data["settings"]
+
+    @settings.setter
+    def settings(self, value):
+        self.data["settings"] = value
+
+    def all_chunk_ids(self):
+        return [chunk_id for entry in self.files.values() for chunk_id in entry["chunk_ids"]]
+
+    def save(self):
+        """
+        Writes the manifest atomically, a crash never leaves a half written file
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=1, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,240 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .chunking import get_strategy, make_splitter
+from .loader import load_file
+
+logger = logging.getLogger(__name__)
+
+
+def parse_and_split(file_path, relpath, strategy):
+    """
+    Parses one file and splits it into chunks with the given chunking strategy. Runs in a worker process.
+
+    Returns:
+        tuple: The chunks, None when the file could not be parsed, and the seconds spent.
+    """
+    started = time.perf_counter()
+    docs = load_file(file_path, relpath)
+    chunks = make_splitter(strategy).split_documents(docs) if docs is not None else None
+    return chunks, time.perf_counter() - started
+
+
+class PipelineStats:
+    """
+    Counters and per-stage timings of a pipeline run. Stage times are summed over
+    the workers of the stage, so they can exceed the wall time.
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.failed = 0
+        self.chunks = 0
+        self.duplicates = 0
+        self.parse_seconds = 0.0
+        self.embed_seconds = 0.0
+        self.write_seconds = 0.0
+        self.wall_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, **values):
+        with self._lock:
+            for key, value in values.items():
+                setattr(self, key, getattr(self, key) + value)
+
+    def summary(self):
+        rate = self.chunks / self.wall_seconds if self.wall_seconds else 0.0
+        summary = (
+            f"{self.files} files, {self.chunks} chunks in {self.wall_seconds:.1f}s ({rate:.1f} chunks/s); "
+            f"parse {self.parse_seconds:.1f}s, embed {self.embed_seconds:.1f}s, write {self.write_seconds:.1f}s"
+        )
+
+        if self.failed:
+            summary += f"; {self.failed} files could not be parsed, the next build retries them"
+
+        if self.duplicates:
+            shrink = 100 * self.duplicates / (self.chunks + self.duplicates)
+            summary += f"; {self.duplicates} near duplicate chunks merged ({shrink:.1f}% smaller)"
+
+        return summary
+
+
+class IngestionPipeline:
+    """
+    Parses files in a process pool, embeds their chunks in batches on several
+    threads and writes every batch to Chroma, and to the chunk store when one is
+    given, as soon as it is embedded. With a deduplicator, near duplicates of an
+    already indexed chunk are dropped before they are embedded.
+
+    Only a bounded number of parsed files and embedding batches are in flight at a
+    time, so peak memory does not grow with the size of the dataset.
+    """
+
+    def __init__(self, vectordb, embeddings, chunking, chunk_store=None, deduplicator=None,
+                 parse_workers=None, embed_workers=2, embed_batch_size=64, max_pending_batches=8):
+        self.vectordb = vectordb
+        self.chunk_store = chunk_store
+        self.deduplicator = deduplicator
+        self.embeddings = embeddings
+        self.chunking = chunking
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.embed_workers = embed_workers
+        self.embed_batch_size = embed_batch_size
+        self.max_pending_batches = max_pending_batches
+
+    def run(self, entries, make_chunk_ids, on_file_done=None):
+        """
+        Indexes the given files.
+
+        Args:
+            entries (list): Dicts with "relpath" and "path" of every file to index.
+            make_chunk_ids (callable): Returns the chunk ids of an entry given its chunk count.
+            on_file_done (callable, optional): Called with (entry, chunk_ids) once every chunk of the file is written.
+                When deduplicating, entry["merged_into"] holds the ids of the chunks its dropped duplicates were merged into.
+
+        Returns:
+            PipelineStats: The counters and timings of the run.
+        """
+        stats = PipelineStats()
+        started = time.perf_counter()
+        batches = queue.Queue(maxsize=self.max_pending_batches)
+        write_lock = threading.Lock()
+        progress_lock = threading.Lock()
+        pending = {}
+        errors = []
+
+        def finish_batch(relpath):
+            with progress_lock:
+                state = pending[relpath]
+                state["remaining"] -= 1
+                done = state["remaining"] == 0
+
+            if done and on_file_done is not None:
+                with write_lock:
+                    on_file_done(state["entry"], state["chunk_ids"])
+
+        def embed_worker():
+            while True:
+                batch = batches.get()
+
+                if batch is None:
+                    return
+
+                relpath, ids, positions, chunks, signatures = batch
+
+                try:
+                    if not errors:
+                        texts = [chunk.page_content for chunk in chunks]
+
+                        embed_started = time.perf_counter()
+                        vectors = self.embeddings.embed_documents(texts)
+                        stats.add(embed_seconds=time.perf_counter() - embed_started)
+
+                        with write_lock:
+                            write_started = time.perf_counter()
+                            self.vectordb._collection.upsert(
+                                ids=ids,
+                                embeddings=vectors,
+                                documents=texts,
+                                metadatas=[chunk.metadata for chunk in chunks],
+                            )
+                            if self.chunk_store is not None:
+                                self.chunk_store.put_many(ids, chunks, positions, signatures)
+                            stats.add(write_seconds=time.perf_counter() - write_started, chunks=len(chunks))
+
+                        finish_batch(relpath)
+                except Exception as e:
+                    logger.error(f"Error embedding chunks of {relpath}: {e}")
+                    errors.append(e)
+
+        threads = [
+            threading.Thread(target=embed_worker, name=f"embed-worker-{index}", daemon=True)
+            for index in range(self.embed_workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        def enqueue(entry, chunks):
+            chunk_ids = make_chunk_ids(entry, len(chunks))
+            positions = list(range(len(chunks)))
+            signatures = None
+
+            # Runs on the main thread only, so files are deduplicated against each other one at a time
+            if self.deduplicator is not None:
+                kept, entry["merged_into"] = self.deduplicator.filter(chunk_ids, chunks)
+                stats.add(duplicates=len(chunks) - len(kept))
+                chunk_ids = [chunk_id for chunk_id, _, _, _, _ in kept]
+                positions = [position for _, position, _, _, _ in kept]
+                chunks = [chunk for _, _, chunk, _, _ in kept]
+                signatures = [(signature, band_keys) for _, _, _, signature, band_keys in kept]
+
+            starts = range(0, len(chunks), self.embed_batch_size)
+
+            with progress_lock:
+                pending[entry["relpath"]] = {"entry": entry, "chunk_ids": chunk_ids, "remaining": len(starts)}
+
+            if not chunks and on_file_done is not None:
+                with write_lock:
+                    on_file_done(entry, chunk_ids)
+
+            for start in starts:
+                end = start + self.embed_batch_size
+                batches.put((
+                    entry["relpath"],
+                    chunk_ids[start:end],
+                    positions[start:end],
+                    chunks[start:end],
+                    signatures[start:end] if signatures is not None else None,
+                ))
+
+        # spawn instead of fork: the parent may already hold torch threads and open Chroma handles
+        context = multiprocessing.get_context("spawn")
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=context) as pool:
+                remaining = iter(entries)
+                in_flight = {}
+
+                def submit_next():
+                    entry = next(remaining, None)
+                    if entry is not None:
+                        future = pool.submit(
+                            parse_and_split, entry["path"], entry["relpath"], get_strategy(entry["relpath"], self.chunking)
+                        )
+                        in_flight[future] = entry
+
+                for _ in range(self.parse_workers * 2):
+                    submit_next()
+
+                while in_flight and not errors:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+
+                    for future in done:
+                        entry = in_flight.pop(future)
+                        chunks, parse_seconds = future.result()
+
+                        # Not reported as done, so it stays out of the manifest
+                        if chunks is None:
+                            stats.add(failed=1, parse_seconds=parse_seconds)
+                        else:
+                            stats.add(files=1, parse_seconds=parse_seconds)
+                            logger.info(f"Parsed {len(chunks)} chunks from {entry['relpath']}")
+                            enqueue(entry, chunks)
+
+                        submit_next()
+        finally:
+            for _ in threads:
+                batches.put(None)
+            for thread in threads:
+                thread.join()
+
+        if errors:
+            raise errors[0]
+
+        stats.wall_seconds = time.perf_counter() - started
+        return stats
@@ -0,0 +1,285 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import unicodedata
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from .config import BASE_DIR, DATASET_PATH
+
+logger = logging.getLogger(__name__)
+
+SOURCES_PATH = os.getenv("SCRAPER_SOURCES_PATH") or str(BASE_DIR / "trainModel" / "dataIngetion" / "sources.json")
+SCRAPER_CACHE_PATH = os.getenv("SCRAPER_CACHE_PATH") or os.path.expanduser("~/.cache/rgukt_scraper")
+USER_AGENT = "RGUKTInfoGuru-scraper/1.0"
+
+
+def normalize_text(text):
+    """
+    NFC-normalizes the text, condenses whitespace and drops empty lines
+    """
+    lines = (" ".join(line.split()) for line in unicodedata.normalize("NFC", text).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def extract_text(html, classes):
+    """
+    Returns the normalized text of the elements with any of the given classes
+    """
+    import bs4
+
+    soup = bs4.BeautifulSoup(html, "html.parser", parse_only=bs4.SoupStrainer(class_=classes))
+    return normalize_text(soup.get_text("\n"))
+
+
+class HttpCache:
+    """
+    On-disk HTTP cache keyed by URL. Keeps the body of the last 200 response with its
+    ETag and Last-Modified, which are sent back as conditional request headers.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.body")
+
+    def get(self, url):
+        """
+        Returns (headers dict, body bytes) or None
+        """
+        meta_path, body_path = self.paths(url)
+
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url, etag, last_modified, body):
+        meta_path, body_path = self.paths(url)
+        meta = {"url": url, "etag": etag, "last_modified": last_modified, "fetched_at": time.time()}
+
+        # Body first, so the metadata never points to a body that was not written
+        for path, data, mode in ((body_path, body, "wb"), (meta_path, json.dumps(meta), "w")):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, mode) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+
+class FetchResult:
+    """
+    The outcome of fetching one URL
+    """
+
+    def __init__(self, url, body=None, changed=False, error=None):
+        self.url = url
+        self.body = body
+        self.changed = changed
+        self.error = error
+
+
+class Scraper:
+    """
+    Scrapes the configured pages into the dataset folder as UTF-8 text or JSON.
+
+    Pages are fetched on a thread pool with at most per_host requests to the same
+    host at a time. Requests are conditional on the cached ETag/Last-Modified, and
+    a dataset file is only rewritten when one of its pages changed, so unchanged
+    pages are neither downloaded again nor re-indexed.
+    """
+
+    def __init__(self, sources, dataset_path=DATASET_PATH, cache_dir=SCRAPER_CACHE_PATH, output_format="txt",
+                 max_workers=8, per_host=2, timeout=20):
+        self.sources = sources
+        self.dataset_path = dataset_path
+        self.cache = HttpCache(cache_dir)
+        self.output_format = output_format
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self._host_limits = {}
+        self._host_lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, sources_path=SOURCES_PATH, **options):
+        with open(sources_path, encoding="utf-8") as f:
+            return cls(json.load(f), **options)
+
+    def host_limit(self, url):
+        host = urlsplit(url).netloc
+
+        with self._host_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_limits[host]
+
+    def fetch(self, url):
+        """
+        Fetches the URL, answering from the cache when the server says it is not modified
+        """
+        cached = self.cache.get(url)
+        request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+
+        if cached is not None:
+            meta, _ = cached
+            if meta.get("etag"):
+                request.add_header("If-None-Match", meta["etag"])
+            if meta.get("last_modified"):
+                request.add_header("If-Modified-Since", meta["last_modified"])
+
+        try:
+            with self.host_limit(url):
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    body = response.read()
+                    etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and cached is not None:
+                return FetchResult(url, body=cached[1])
+            logger.error(f"Error fetching {url}: HTTP {e.code}")
+            return FetchResult(url, error=e)
+        except (urllib.error.URLError, OSError) as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return FetchResult(url, body=cached[1] if cached else None, error=e)
+
+        changed = cached is None or cached[1] != body
+        if changed or etag != cached[0].get("etag") or last_modified != cached[0].get("last_modified"):
+            self.cache.put(url, etag, last_modified, body)
+
+        return FetchResult(url, body=body, changed=changed)
+
+    def output_path(self, folder, name):
+        return os.path.join(self.dataset_path, folder, f"{name}.{self.output_format}")
+
+    def render(self, name, sections):
+        """
+        Renders the (url, text) sections of one dataset file
+        """
+        if self.output_format == "json":
+            return json.dumps(
+                {"name": name, "documents": [{"url": url, "text": text} for url, text in sections]},
+                ensure_ascii=False,
+                indent=1,
+            )
+
+        return "\n\n".join(text for _, text in sections) + "\n"
+
+    def write(self, path, content):
+        """
+        Writes the file atomically, leaving it untouched when the content is the same
+
+        Returns:
+            bool: True when the file was written.
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                if f.read() == content:
+                    return False
+        except FileNotFoundError:
+            pass
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+        os.replace(tmp_path, path)
+        return True
+
+    def run(self):
+        """
+        Scrapes every configured dataset file
+
+        Returns:
+            dict: Counts of fetched, changed and failed pages and of written, unchanged and empty files.
+        """
+        stats = {"pages": 0, "pages_changed": 0, "pages_failed": 0, "files_written": 0, "files_unchanged": 0, "files_empty": 0}
+        targets = [
+            (folder, name, [url for url in details["urls"] if url.strip()], details["classes"])
+            for folder, files in self.sources.items()
+            for name, details in files.items()
+        ]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                (folder, name): [executor.submit(self.fetch, url) for url in urls]
+                for folder, name, urls, _ in targets
+            }
+
+            for folder, name, _, classes in targets:
+                results = [future.result() for future in futures[(folder, name)]]
+                path = self.output_path(folder, name)
+                stats["pages"] += len(results)
+                stats["pages_changed"] += sum(result.changed for result in results)
+                stats["pages_failed"] += sum(result.error is not None for result in results)
+
+                if os.path.exists(path) and not any(result.changed for result in results):
+                    stats["files_unchanged"] += 1
+                    continue
+
+                sections = []
+                for result in results:
+                    if result.body is None:
+                        continue
+
+                    text = extract_text(result.body, classes)
+                    if text:
+                        sections.append((result.url, text))
+                    else:
+                        logger.warning(f"No content found for {result.url}")
+
+                if not sections:
+                    logger.warning(f"No content found for {folder}/{name}, skipping")
+                    stats["files_empty"] += 1
+                    continue
+
+                if self.write(path, self.render(name, sections)):
+                    logger.info(f"Wrote {path}")
+                    stats["files_written"] += 1
+                else:
+                    stats["files_unchanged"] += 1
+
+        return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrapes the configured pages into the dataset folder.")
+    parser.add_argument("--sources", default=SOURCES_PATH, help="JSON file with the pages to scrape.")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="Dataset folder to write to.")
+    parser.add_argument("--cache", default=SCRAPER_CACHE_PATH, help="HTTP cache folder.")
+    parser.add_argument("--format", choices=("txt", "json"), default="txt", help="Output file format.")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent requests.")
+    parser.add_argument("--per-host", type=int, default=2, help="Concurrent requests to the same host.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+
+    scraper = Scraper.from_file(
+        args.sources,
+        dataset_path=args.dataset,
+        cache_dir=args.cache,
+        output_format=args.format,
+        max_workers=args.workers,
+        per_host=args.per_host,
+    )
+    stats = scraper.run()
+    print(
+        f"{stats['pages']} pages ({stats['pages_changed']} changed, {stats['pages_failed']} failed); "
+        f"{stats['files_written']} files written, {stats['files_unchanged']} unchanged, {stats['files_empty']} empty"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import shutil
+import time
+
+from .config import BUILD_CHECKPOINT_FILE_NAME, BUILD_LOCK_FILE_NAME, FAQ_STORE_FILE_NAME, MANIFEST_FILE_NAME
+
+CURRENT_LINK_NAME = "current"
+VERSIONS_DIR_NAME = "versions"
+
+
+class IndexVersions:
+    """
+    Blue/green layout of an index directory:
+
+        <root>/versions/<version>/   one complete Chroma index per build
+        <root>/current               symlink to the version being served
+
+    A new version is built next to the served one and published by replacing the
+    symlink, which is atomic, so readers never see a half written index. A root
+    without the symlink is a plain, unversioned index and is served as is.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.versions_dir = os.path.join(root, VERSIONS_DIR_NAME)
+        self.current_link = os.path.join(root, CURRENT_LINK_NAME)
+
+    @property
+    def is_versioned(self):
+        return os.path.islink(self.current_link)
+
+    def current_path(self):
+        """
+        Returns the directory of the served index
+        """
+        if self.is_versioned:
+            return os.path.realpath(self.current_link)
+
+        return self.root
+
+    def current_version(self):
+        return os.path.basename(self.current_path()) if self.is_versioned else None
+
+    def list_versions(self):
+        if not os.path.isdir(self.versions_dir):
+            return []
+
+        return sorted(name for name in os.listdir(self.versions_dir) if not name.startswith("."))
+
+    def path(self, version):
+        return os.path.join(self.versions_dir, version)
+
+    def pending(self):
+        """
+        Returns the path of a version whose build was interrupted before it was activated, or None
+        """
+        current = self.current_version()
+
+        for version in reversed(self.list_versions()):
+            if version == current:
+                return None
+            if os.path.exists(os.path.join(self.path(version), BUILD_CHECKPOINT_FILE_NAME)):
+                return self.path(version)
+
+        return None
+
+    def create(self):
+        """
+        Creates a new version seeded with a copy of the served index, so the build
+        that fills it only has to index what changed since.
+
+        Returns:
+            str: The directory of the new version.
+        """
+        version = time.strftime("%Y%m%d-%H%M%S")
+        path = self.path(version)
+        suffix = 1
+
+        while os.path.exists(path):
+            suffix += 1
+            path = self.path(f"{version}-{suffix}")
+
+        current = self.current_path()
+
+        if os.path.isdir(current) and os.listdir(current):
+            shutil.copytree(
+                current,
+                path,
+                ignore=shutil.ignore_patterns(
+                    VERSIONS_DIR_NAME, CURRENT_LINK_NAME, BUILD_LOCK_FILE_NAME, BUILD_CHECKPOINT_FILE_NAME,
+                    FAQ_STORE_FILE_NAME,
+                ),
+            )
+        else:
+            os.makedirs(path)
+
+        return path
+
+    def activate(self, path):
+        """
+        Points the current symlink at the version, atomically
+        """
+        tmp_link = os.path.join(self.root, f".{CURRENT_LINK_NAME}.{os.getpid()}")
+
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+
+        os.symlink(os.path.relpath(path, self.root), tmp_link)
+        os.replace(tmp_link, self.current_link)
+
+    def prune(self, keep=2):
+        """
+        Deletes all but the newest versions, never the served one
+
+        Returns:
+            list: The deleted versions.
+        """
+        current = self.current_version()
+        pruned = []
+
+        for version in self.list_versions()[:-keep] if keep else self.list_versions():
+            if version != current:
+                shutil.rmtree(self.path(version), ignore_errors=True)
+                pruned.append(version)
+
+        return pruned
+
+
+def resolve_index_path(root):
+    """
+    Returns the directory of the index to serve from a versioned or plain index root
+    """
+    return IndexVersions(root).current_path()
+
+
+def index_fingerprint(path):
+    """
+    Identifies the content of an index directory, it changes with every build that changes the index
+    """
+    try:
+        with open(os.path.join(path, MANIFEST_FILE_NAME), "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
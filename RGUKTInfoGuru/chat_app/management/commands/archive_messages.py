@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...dao.impl.archive_dao_impl import ArchiveDaoImpl
+
+
+class Command(BaseCommand):
+    help = "Moves the messages of inactive chats into compressed cold storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=getattr(settings, "MESSAGE_ARCHIVE_AFTER_DAYS", 180),
+            help="Archive chats without a new message for this many days.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of chats selected per batch.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many chats would be archived.",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Only report the hot vs cold row counts.",
+        )
+
+    def handle(self, *args, **options):
+        archive_dao = ArchiveDaoImpl()
+
+        if options["stats"]:
+            for key, value in archive_dao.get_stats().items():
+                self.stdout.write(f"{key}: {value}")
+            return
+
+        if options["dry_run"]:
+            count = archive_dao.get_inactive_chat_ids(options["days"]).count()
+            self.stdout.write(f"{count} chats inactive for {options['days']} days would be archived.")
+            return
+
+        archived = archive_dao.archive_inactive_chats(options["days"], batch_size=options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {archived['chats']} chats with {archived['messages']} messages.")
+        )
@@ -0,0 +1,66 @@
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...dao.impl.user_auth_dao_impl import UserAuthDaoImpl
+from ...models import User
+
+BENCH_PASSWORD = "Bench-Password-1!"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks logins per second through UserAuthDaoImpl.validate_user with the configured "
+        "PASSWORD_HASHER_PROFILE. Creates a throwaway user in the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=10.0, help="Duration of the run.")
+        parser.add_argument(
+            "--threads", type=int, default=os.cpu_count() or 1, help="Concurrent clients logging in."
+        )
+
+    def handle(self, *args, **options):
+        user_dao = UserAuthDaoImpl()
+        email = f"bench-{uuid.uuid4().hex}@example.com"
+        user_dao.create_user(email, BENCH_PASSWORD, "bench")
+
+        counts = {"ok": 0, "rejected": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options["seconds"]
+
+        def client():
+            while time.perf_counter() < deadline:
+                try:
+                    user_dao.validate_user(email, BENCH_PASSWORD)
+                    outcome = "ok"
+                except Exception:
+                    outcome = "rejected"
+
+                with lock:
+                    counts[outcome] += 1
+
+        try:
+            started = time.perf_counter()
+            threads = [threading.Thread(target=client) for _ in range(options["threads"])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            User.objects.filter(email=email).delete()
+
+        cores = min(user_dao.password_executor.max_workers, os.cpu_count() or 1)
+        per_second = counts["ok"] / elapsed
+
+        self.stdout.write(f"hasher profile:    {settings.PASSWORD_HASHER_PROFILE} ({settings.PASSWORD_HASHERS[0]})")
+        self.stdout.write(f"hash workers:      {user_dao.password_executor.max_workers}")
+        self.stdout.write(f"concurrency limit: {user_dao.password_executor.concurrency_limit}")
+        self.stdout.write(f"logins:            {counts['ok']} ok, {counts['rejected']} rejected in {elapsed:.1f}s")
+        self.stdout.write(f"logins/s:          {per_second:.1f}")
+        self.stdout.write(f"logins/s per core: {per_second / cores:.1f}")
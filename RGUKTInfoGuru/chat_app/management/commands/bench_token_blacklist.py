@@ -0,0 +1,109 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from ...models import User
+from ...tokens import EmailRefreshToken
+from ...utils.blacklist_filter import BlacklistFilter
+
+BENCH_JTI_PREFIX = "bench-"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks refresh token verification against a large token_blacklist table, "
+        "comparing the per-request blacklist query with the in-memory BlacklistFilter. "
+        "Inserts rows into the configured database, run it against a disposable one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Outstanding token rows to insert.")
+        parser.add_argument(
+            "--blacklisted-ratio", type=float, default=0.1, help="Share of the inserted rows that is blacklisted."
+        )
+        parser.add_argument("--iterations", type=int, default=5000, help="Token verifications per run.")
+        parser.add_argument("--batch-size", type=int, default=10000, help="Rows per bulk insert.")
+        parser.add_argument("--keep", action="store_true", help="Keep the inserted rows after the run.")
+
+    def handle(self, *args, **options):
+        self.populate(options["rows"], options["blacklisted_ratio"], options["batch_size"])
+
+        # A user is only created when the table is empty, and removed again with the benchmark rows
+        bench_user = None
+        user = User.objects.order_by("created_at").first()
+        if user is None:
+            user = bench_user = User.objects.create(
+                email=f"{BENCH_JTI_PREFIX}{uuid.uuid4().hex}@example.com", username="bench"
+            )
+
+        refresh_token = EmailRefreshToken.for_user(user)
+        raw_token = str(refresh_token)
+
+        try:
+            self.run("blacklist query", RefreshToken, raw_token, options["iterations"])
+
+            BlacklistFilter().refresh(force=True)
+            self.run("blacklist filter", EmailRefreshToken, raw_token, options["iterations"])
+        finally:
+            if not options["keep"]:
+                self.cleanup(refresh_token["jti"], bench_user)
+
+    def populate(self, rows, blacklisted_ratio, batch_size):
+        self.stdout.write(f"Inserting {rows} outstanding tokens...")
+
+        expires_at = aware_utcnow() + timedelta(days=1)
+        blacklist_every = max(int(1 / blacklisted_ratio), 1) if blacklisted_ratio > 0 else 0
+        started = time.perf_counter()
+
+        for offset in range(0, rows, batch_size):
+            tokens = OutstandingToken.objects.bulk_create(
+                [
+                    OutstandingToken(
+                        jti=f"{BENCH_JTI_PREFIX}{uuid.uuid4().hex}",
+                        token="",
+                        created_at=aware_utcnow(),
+                        expires_at=expires_at,
+                    )
+                    for _ in range(min(batch_size, rows - offset))
+                ]
+            )
+
+            if blacklist_every:
+                BlacklistedToken.objects.bulk_create(
+                    [BlacklistedToken(token=token) for token in tokens[::blacklist_every] if token.pk]
+                )
+
+        self.stdout.write(f"Inserted in {time.perf_counter() - started:.1f}s")
+
+    def run(self, label, token_class, raw_token, iterations):
+        started = time.perf_counter()
+
+        for _ in range(iterations):
+            token_class(raw_token)
+
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{label:>16}: {iterations / elapsed:10.0f} verifications/s "
+            f"({elapsed / iterations * 1_000_000:.1f} us per token)"
+        )
+
+    def cleanup(self, jti, bench_user):
+        """
+        Removes the inserted tokens, the token issued for the run and the user created for it
+        """
+        bench_tokens = OutstandingToken.objects.filter(jti__startswith=BENCH_JTI_PREFIX)
+        BlacklistedToken.objects.filter(token__in=bench_tokens)._raw_delete(DEFAULT_DB_ALIAS)
+        bench_tokens._raw_delete(DEFAULT_DB_ALIAS)
+        OutstandingToken.objects.filter(jti=jti).delete()
+
+        if bench_user is not None:
+            bench_user.delete()
+
+        self.stdout.write("Removed the benchmark rows.")
@@ -0,0 +1,139 @@
+import json
+import os
+from collections import deque
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def memory_kb(pid):
+    """
+    Returns the Rss, Pss and private (Private_Clean + Private_Dirty) memory of the process in kB. Pss
+    splits every shared page between the processes sharing it, so it adds up to what they really use.
+    """
+    usage = {}
+
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                usage[key] = int(value.split()[0])
+
+    return {
+        "rss": usage["Rss"],
+        "pss": usage["Pss"],
+        "private": usage["Private_Clean"] + usage["Private_Dirty"],
+    }
+
+
+def child_pids(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+class Command(BaseCommand):
+    help = (
+        "Starts gunicorn with gunicorn.conf.py for every worker count, with and without preload_app, "
+        "and reports the memory of the master and the workers once every worker is ready. Linux only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8], help="Worker counts to compare.")
+        parser.add_argument(
+            "--modes", nargs="+", choices=["preload", "no-preload"], default=["preload", "no-preload"]
+        )
+        parser.add_argument("--app", help="WSGI app to serve, the one in gunicorn.conf.py by default.")
+        parser.add_argument("--timeout", type=int, default=300, help="Seconds to wait for the workers to be ready.")
+        parser.add_argument("--json", dest="json_path", help="Also write the results to this file.")
+
+    def handle(self, *args, **options):
+        if not os.path.exists("/proc/self/smaps_rollup"):
+            raise CommandError("The memory benchmark reads /proc/<pid>/smaps_rollup and only runs on Linux")
+
+        results = []
+
+        for mode in options["modes"]:
+            for workers in options["workers"]:
+                self.stdout.write(f"Starting {workers} workers ({mode})...")
+                results.append({"mode": mode, "workers": workers, **self.measure(mode, workers, options)})
+
+        self.stdout.write(
+            f"{'mode':<11} {'workers':>7} {'total PSS MB':>12} {'total RSS MB':>12} "
+            f"{'master MB':>9} {'worker private MB':>17} {'boot s':>7}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['mode']:<11} {result['workers']:>7} {result['total_pss_kb'] / 1024:>12.0f} "
+                f"{result['total_rss_kb'] / 1024:>12.0f} {result['master']['pss'] / 1024:>9.0f} "
+                f"{result['avg_worker_private_kb'] / 1024:>17.0f} {result['boot_seconds']:>7.1f}"
+            )
+
+        if options["json_path"]:
+            with open(options["json_path"], "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=1)
+
+    def measure(self, mode, workers, options):
+        env = {
+            **os.environ,
+            "GUNICORN_WORKERS": str(workers),
+            "GUNICORN_PRELOAD": "1" if mode == "preload" else "0",
+            "GUNICORN_BIND": f"127.0.0.1:{free_port()}",
+            "PYTHONUNBUFFERED": "1",
+        }
+        if options["app"]:
+            env["GUNICORN_APP"] = options["app"]
+
+        started = time.monotonic()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+
+        try:
+            ready = 0
+            last_lines = deque(maxlen=20)
+            for line in process.stderr:
+                last_lines.append(line)
+                if " ready" in line and "Worker " in line:
+                    ready += 1
+                if ready == workers:
+                    break
+                if time.monotonic() - started > options["timeout"]:
+                    raise CommandError(f"Only {ready} of {workers} workers were ready after {options['timeout']}s")
+
+            if ready < workers:
+                raise CommandError(
+                    f"gunicorn exited with {process.wait()} before its workers were ready:\n{''.join(last_lines)}"
+                )
+
+            boot_seconds = time.monotonic() - started
+            # Lets the workers finish touching their pages after the ready line
+            time.sleep(2)
+
+            master = memory_kb(process.pid)
+            worker_usage = [memory_kb(pid) for pid in child_pids(process.pid)]
+        finally:
+            process.terminate()
+            process.wait()
+
+        return {
+            "boot_seconds": boot_seconds,
+            "master": master,
+            "workers_memory": worker_usage,
+            "total_pss_kb": master["pss"] + sum(usage["pss"] for usage in worker_usage),
+            "total_rss_kb": master["rss"] + sum(usage["rss"] for usage in worker_usage),
+            "avg_worker_private_kb": sum(usage["private"] for usage in worker_usage) / len(worker_usage),
+        }
@@ -0,0 +1,50 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from langchain_chroma import Chroma
+from langchain_groq import ChatGroq
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from ...agent.agent_executor import GROQ_API_KEY, build_rag_chain
+from ...agent.faq_store import FAQ_QUESTIONS_PATH, build_faq_store, load_faq_questions
+from ...agent.query_router import build_retriever, served_retriever_name
+from ...ingestion.config import CHROMA_DB_PATH, EMBEDDING_MODEL_NAME
+from ...ingestion.versions import resolve_index_path
+from ...utils.utils import MODELS
+
+
+class Command(BaseCommand):
+    help = (
+        "Answers the curated FAQ list with the RAG chain on an index and stores the vetted answers next to it. "
+        "`manage.py build_index` runs it after every build that changes the index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--index", help="Index folder, the served version by default.")
+        parser.add_argument("--questions", default=FAQ_QUESTIONS_PATH, help="Curated FAQ list.")
+        parser.add_argument("--model", default=MODELS[0], choices=MODELS, help="Model that writes the answers.")
+
+    def handle(self, *args, **options):
+        index_path = options["index"] or resolve_index_path(CHROMA_DB_PATH)
+
+        if not os.path.exists(index_path):
+            raise CommandError(f"No index found at {index_path}, run `manage.py build_index` first")
+
+        # Checked before the embedding model is loaded, ChatGroq only fails once it is created
+        if not GROQ_API_KEY:
+            raise CommandError("GROQ_API_KEY is not set, the FAQ answers are written by the LLM")
+
+        embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+        vectordb = Chroma(persist_directory=index_path, embedding_function=embeddings)
+        retriever = build_retriever(vectordb, served_retriever_name())
+        llm = ChatGroq(groq_api_key=GROQ_API_KEY, model_name=options["model"])
+
+        questions = load_faq_questions(options["questions"])
+        stored, rejected = build_faq_store(
+            index_path, questions, embeddings, build_rag_chain(llm, retriever), options["model"]
+        )
+
+        for title, reason in rejected:
+            self.stdout.write(self.style.WARNING(f"Not stored: {title} ({reason}), review the entry or its expected phrases"))
+
+        self.stdout.write(self.style.SUCCESS(f"Stored {stored} FAQ answers for the index at {index_path}."))
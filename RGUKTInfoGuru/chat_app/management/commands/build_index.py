@@ -0,0 +1,142 @@
+import os
+import shutil
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from ...ingestion.checkpoint import BuildCheckpoint, BuildLock, BuildLocked
+from ...ingestion.config import CHROMA_DB_PATH, DATASET_PATH
+from ...ingestion.indexer import IncrementalIndexer
+from ...ingestion.versions import IndexVersions
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds or updates the Chroma index at CHROMA_DB_PATH from the dataset folder. "
+        "Progress is checkpointed after every file, an interrupted build resumes where it stopped. "
+        "With --new-version (or once the index is versioned) the build goes to a new version directory "
+        "that is activated only when it completes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dataset", default=DATASET_PATH, help="Dataset folder to index.")
+        parser.add_argument("--db", default=CHROMA_DB_PATH, help="Chroma persist directory, the one the server loads.")
+        parser.add_argument("--dry-run", action="store_true", help="Only show what would change.")
+        parser.add_argument("--parse-workers", type=int, default=None, help="PDF parsing processes, defaults to the CPU count.")
+        parser.add_argument("--embed-workers", type=int, default=2, help="Embedding threads.")
+        parser.add_argument("--batch-size", type=int, default=64, help="Chunks embedded and written per batch.")
+        parser.add_argument("--new-version", action="store_true", help="Build into a new version and switch to it when done.")
+        parser.add_argument("--keep", type=int, default=2, help="Versions kept after a new version is activated.")
+        parser.add_argument("--skip-faq", action="store_true", help="Do not regenerate the FAQ answers of the index.")
+
+    def handle(self, *args, **options):
+        try:
+            with BuildLock(options["db"]):
+                self.build(options)
+        except BuildLocked as e:
+            raise CommandError(str(e))
+
+    def build(self, options):
+        versions = IndexVersions(options["db"])
+        blue_green = options["new_version"] or versions.is_versioned
+        persist_directory = options["db"]
+        created = False
+
+        if blue_green:
+            persist_directory = versions.pending()
+
+            if persist_directory is not None:
+                self.stdout.write(f"Resuming the build of the inactive version at {persist_directory}.")
+            elif options["dry_run"] or not IncrementalIndexer(options["dataset"], versions.current_path()).plan().has_changes:
+                persist_directory = versions.current_path()
+            else:
+                persist_directory = versions.create()
+                created = True
+                self.stdout.write(f"Building the new version at {persist_directory}.")
+
+        indexer = IncrementalIndexer(
+            dataset_path=options["dataset"],
+            persist_directory=persist_directory,
+            parse_workers=options["parse_workers"],
+            embed_workers=options["embed_workers"],
+            embed_batch_size=options["batch_size"],
+        )
+        checkpoint = BuildCheckpoint(persist_directory)
+        previous = None if created else checkpoint.load()
+
+        if created:
+            # Marks the version as pending, an interrupted build resumes into it instead of starting another one
+            checkpoint.start(0)
+
+        if previous:
+            self.stdout.write(
+                f"Resuming an interrupted build: {previous['files_done']} of {previous['total_files']} files "
+                f"({previous['chunks_done']} chunks) were already indexed."
+            )
+
+        plan = indexer.plan()
+
+        for line in plan.summary():
+            self.stdout.write(line)
+
+        if options["dry_run"]:
+            return
+
+        if not plan.has_changes:
+            checkpoint.finish()
+
+            if created:
+                shutil.rmtree(persist_directory)
+            elif blue_green and os.path.realpath(persist_directory) != versions.current_path():
+                self.activate(versions, persist_directory, options["keep"])
+
+            self.stdout.write(self.style.SUCCESS("Index is up to date."))
+            return
+
+        total = len(plan.to_index)
+        checkpoint.start(total, previous)
+
+        def file_done(entry, chunk_ids):
+            checkpoint.file_done(len(chunk_ids))
+            self.stdout.write(f"[{checkpoint.data['files_done']}/{total}] {entry['relpath']}: {len(chunk_ids)} chunks")
+
+        stats = indexer.apply(plan, on_file_done=file_done)
+        checkpoint.finish()
+
+        if "pipeline" in stats:
+            self.stdout.write(stats["pipeline"].summary())
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {stats['files_indexed']} files ({stats['chunks_added']} chunks), "
+                f"removed {stats['files_removed']} files ({stats['chunks_removed']} chunks)."
+            )
+        )
+
+        # Before the switch, so a new version is served with its FAQ answers from the first request
+        if not options["skip_faq"] and getattr(settings, "FAQ_ENABLED", True):
+            self.build_faq(persist_directory)
+
+        if blue_green:
+            self.activate(versions, persist_directory, options["keep"])
+
+    def build_faq(self, persist_directory):
+        try:
+            call_command("build_faq", index=persist_directory, stdout=self.stdout)
+        except Exception as e:
+            # The index is usable without them, first questions are then answered by the LLM
+            self.stdout.write(
+                self.style.WARNING(f"Could not regenerate the FAQ answers ({e}), run `manage.py build_faq` to retry.")
+            )
+
+    def activate(self, versions, persist_directory, keep):
+        versions.activate(persist_directory)
+        pruned = versions.prune(keep)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Activated version {versions.current_version()}, pruned {len(pruned)} old versions. Running servers "
+                f"switch on SIGHUP, POST /api/v1/index/reload or their next index watch poll."
+            )
+        )
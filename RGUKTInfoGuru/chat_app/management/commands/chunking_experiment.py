@@ -0,0 +1,104 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from ...evaluation.retrieval import GOLDEN_SET_PATH, evaluate_retrieval, load_golden_set
+from ...ingestion.config import CHUNKING_STRATEGIES, DATASET_PATH
+from ...ingestion.indexer import IncrementalIndexer
+
+# Compared when no --configs file is given
+PRESETS = {
+    # The original notebook setting
+    "fixed-2000": {"default": {"splitter": "recursive", "chunk_size": 2000, "chunk_overlap": 500}},
+    "structured": CHUNKING_STRATEGIES,
+    "structured-800": {"default": {"splitter": "structured", "chunk_size": 800, "chunk_overlap": 100}},
+}
+
+
+def directory_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, file))
+        for root, _, files in os.walk(path)
+        for file in files
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds a throwaway index per chunking config and reports index size, retrieval "
+        "recall on the golden set and the average prompt tokens of the retrieved context."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dataset", default=DATASET_PATH, help="Dataset folder to index.")
+        parser.add_argument(
+            "--configs",
+            help="JSON file mapping config names to chunking strategies, defaults to the built-in presets.",
+        )
+        parser.add_argument("--golden", default=GOLDEN_SET_PATH, help="Golden set JSON file.")
+        parser.add_argument("-k", type=int, default=4, help="Chunks retrieved per question.")
+        parser.add_argument("--workdir", help="Where the indexes are built, a temporary folder by default.")
+        parser.add_argument("--keep", action="store_true", help="Keep the built indexes.")
+        parser.add_argument("--parse-workers", type=int, default=None, help="PDF parsing processes.")
+        parser.add_argument("--json", dest="json_path", help="Also write the full results to this file.")
+
+    def handle(self, *args, **options):
+        configs = PRESETS
+
+        if options["configs"]:
+            with open(options["configs"], encoding="utf-8") as f:
+                configs = json.load(f)
+
+        golden_set = load_golden_set(options["golden"])
+        workdir = options["workdir"] or tempfile.mkdtemp(prefix="chunking-experiment-")
+        embeddings = None
+        results = {}
+
+        try:
+            for name, strategies in configs.items():
+                self.stdout.write(f"Building the index for {name}...")
+                persist_directory = os.path.join(workdir, name)
+                shutil.rmtree(persist_directory, ignore_errors=True)
+
+                indexer = IncrementalIndexer(
+                    dataset_path=options["dataset"],
+                    persist_directory=persist_directory,
+                    embeddings=embeddings,
+                    chunking=strategies,
+                    parse_workers=options["parse_workers"],
+                )
+                indexer.apply(indexer.plan())
+                # Loaded once and shared, every config is embedded with the same model
+                embeddings = indexer.embeddings
+
+                evaluation = evaluate_retrieval(
+                    lambda question, k: indexer.vectordb.similarity_search(question, k=k), golden_set, k=options["k"]
+                )
+                results[name] = {
+                    "chunks": indexer.chunk_store.count(),
+                    "avg_chunk_chars": indexer.chunk_store.average_length(),
+                    "index_bytes": directory_size(persist_directory),
+                    **evaluation,
+                }
+                indexer.chunk_store.close()
+        finally:
+            if not options["keep"]:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        self.stdout.write(
+            f"{'config':<20} {'chunks':>7} {'avg chars':>9} {'index MB':>9} "
+            f"{'recall@' + str(options['k']):>9} {'MRR':>6} {'hit rate':>9} {'prompt tok':>10}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<20} {result['chunks']:>7} {result['avg_chunk_chars']:>9.0f} "
+                f"{result['index_bytes'] / 1e6:>9.2f} {result['recall']:>9.3f} {result['mrr']:>6.3f} "
+                f"{result['hit_rate']:>9.3f} {result['avg_prompt_tokens']:>10.0f}"
+            )
+
+        if options["json_path"]:
+            with open(options["json_path"], "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=1)
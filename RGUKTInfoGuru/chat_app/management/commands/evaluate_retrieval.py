@@ -0,0 +1,74 @@
+import json
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from langchain_chroma import Chroma
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from ...agent.query_router import RETRIEVERS, build_retriever
+from ...evaluation.retrieval import GOLDEN_SET_PATH, evaluate_retrieval, load_golden_set
+from ...ingestion.config import CHROMA_DB_PATH, EMBEDDING_MODEL_NAME
+from ...ingestion.versions import resolve_index_path
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the golden set through the served retrievers without calling the LLM and reports "
+        "recall@k, MRR, p50/p99 retrieval latency and context tokens per query."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--index", help="Index folder, the served version by default.")
+        parser.add_argument(
+            "--retrievers", nargs="+", choices=RETRIEVERS, default=list(RETRIEVERS), help="Retrievers to compare."
+        )
+        parser.add_argument("-k", type=int, default=4, help="Chunks retrieved per question.")
+        parser.add_argument("--golden", default=GOLDEN_SET_PATH, help="Golden set JSON file.")
+        parser.add_argument(
+            "--json", dest="json_path", help="Write the full results to this file, '-' writes them to stdout."
+        )
+
+    def handle(self, *args, **options):
+        index_path = options["index"] or resolve_index_path(CHROMA_DB_PATH)
+
+        if not os.path.exists(index_path):
+            raise CommandError(f"No index found at {index_path}, run `manage.py build_index` first")
+
+        golden_set = load_golden_set(options["golden"])
+        embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+        vectordb = Chroma(persist_directory=index_path, embedding_function=embeddings)
+        # Loads the embedding model and the HNSW index so the first question is not timed with them
+        vectordb.similarity_search(golden_set[0]["question"], k=options["k"])
+
+        results = {
+            "index": index_path,
+            "version": os.path.basename(index_path),
+            "embedding_model": EMBEDDING_MODEL_NAME,
+            "retrievers": {},
+        }
+
+        for name in options["retrievers"]:
+            retriever = build_retriever(vectordb, name, k=options["k"])
+            results["retrievers"][name] = evaluate_retrieval(
+                lambda question, k: retriever.invoke(question), golden_set, k=options["k"]
+            )
+
+        if options["json_path"] == "-":
+            json.dump(results, sys.stdout, indent=1)
+            return
+
+        self.stdout.write(
+            f"{'retriever':<12} {'recall@' + str(options['k']):>9} {'MRR':>6} {'hit rate':>9} {'source hit':>10} "
+            f"{'p50 ms':>8} {'p99 ms':>8} {'tokens':>7}"
+        )
+        for name, result in results["retrievers"].items():
+            self.stdout.write(
+                f"{name:<12} {result['recall']:>9.3f} {result['mrr']:>6.3f} {result['hit_rate']:>9.3f} "
+                f"{result['source_hit_rate']:>10.3f} {result['latency_ms']['p50']:>8.1f} "
+                f"{result['latency_ms']['p99']:>8.1f} {result['avg_prompt_tokens']:>7.0f}"
+            )
+
+        if options["json_path"]:
+            with open(options["json_path"], "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=1)
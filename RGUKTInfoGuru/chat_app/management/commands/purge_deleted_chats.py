@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...dao.impl.chat_dao_impl import ChatDaoImpl
+
+
+class Command(BaseCommand):
+    help = "Permanently removes soft deleted chats and their messages in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=getattr(settings, "CHAT_PURGE_BATCH_SIZE", 1000),
+            help="Number of rows removed per DELETE statement.",
+        )
+
+    def handle(self, *args, **options):
+        purged = ChatDaoImpl().purge_deleted_chats(batch_size=options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Purged {purged['chats']} chats and {purged['messages']} messages.")
+        )
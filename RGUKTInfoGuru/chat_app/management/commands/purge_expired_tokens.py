@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...dao.impl.token_dao_impl import TokenDaoImpl
+
+
+class Command(BaseCommand):
+    help = "Removes expired outstanding and blacklisted JWT tokens in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=getattr(settings, "TOKEN_PURGE_BATCH_SIZE", 1000),
+            help="Number of rows removed per DELETE statement.",
+        )
+
+    def handle(self, *args, **options):
+        purged = TokenDaoImpl().purge_expired_tokens(batch_size=options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Purged {purged['outstanding']} outstanding and {purged['blacklisted']} blacklisted tokens."
+            )
+        )
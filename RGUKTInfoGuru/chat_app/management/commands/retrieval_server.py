@@ -0,0 +1,56 @@
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from langchain_chroma import Chroma
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from ...agent.retrieval_server import RetrievalServer
+from ...ingestion.config import CHROMA_DB_PATH, EMBEDDING_MODEL_NAME
+from ...ingestion.versions import resolve_index_path
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the retrieval server that embeds queries and searches the index for every Django worker. "
+        "Workers use it when RETRIEVAL_SERVER_SOCKET is set and retrieve in-process while it is down."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--socket", default=settings.RETRIEVAL_SERVER_SOCKET, help="Unix socket to listen on.")
+        parser.add_argument("--db", default=CHROMA_DB_PATH, help="Index root, the served version is followed.")
+        parser.add_argument("--batch-size", type=int, default=32, help="Most queries embedded together.")
+        parser.add_argument(
+            "--max-wait-ms", type=float, default=5, help="How long a query waits for others to share its batch."
+        )
+
+    def handle(self, *args, **options):
+        embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+        server = RetrievalServer(
+            socket_path=options["socket"],
+            index_root=options["db"],
+            embeddings=embeddings,
+            load_vectordb=lambda path: Chroma(persist_directory=path, embedding_function=embeddings),
+            batch_size=options["batch_size"],
+            max_wait_seconds=options["max_wait_ms"] / 1000,
+        )
+
+        signal.signal(signal.SIGHUP, lambda *args: threading.Thread(target=server.reload, daemon=True).start())
+        interval = getattr(settings, "INDEX_WATCH_INTERVAL_SECONDS", 0)
+
+        if interval:
+            def watch():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        if resolve_index_path(options["db"]) != server.index_path:
+                            server.reload()
+                    except Exception as e:
+                        self.stderr.write(f"Error reloading the index: {e}")
+
+            threading.Thread(target=watch, name="index-watch", daemon=True).start()
+
+        self.stdout.write(self.style.SUCCESS(f"Serving {server.index_path} on {options['socket']}"))
+        server.serve_forever()
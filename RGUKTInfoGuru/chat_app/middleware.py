@@ -0,0 +1,81 @@
+import re
+import uuid
+
+from django.middleware.gzip import GZipMiddleware
+
+from .utils.log import request_id_var
+
+# A client supplied id is kept when it is short and plain, anything else is replaced
+REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class RequestIdMiddleware:
+    """
+    Gives every request an id, taken from the X-Request-ID header or generated, that is
+    added to every log record of the request and returned in the X-Request-ID header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get("X-Request-ID", "")
+        if not REQUEST_ID_RE.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        request.request_id = request_id
+        token = request_id_var.set(request_id)
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            request_id_var.reset(token)
+            raise
+
+        # A streamed body is logged from while it is iterated, the id is kept until it ends or is closed
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.reset_after_async(response.streaming_content, token)
+            else:
+                response.streaming_content = self.reset_after(response.streaming_content, token)
+        else:
+            request_id_var.reset(token)
+
+        response["X-Request-ID"] = request_id
+        return response
+
+    @classmethod
+    def reset_after(cls, content, token):
+        try:
+            yield from content
+        finally:
+            cls.reset(token)
+
+    @classmethod
+    async def reset_after_async(cls, content, token):
+        try:
+            async for part in content:
+                yield part
+        finally:
+            cls.reset(token)
+
+    @staticmethod
+    def reset(token):
+        try:
+            request_id_var.reset(token)
+        except ValueError:
+            # Closed from another context, under ASGI, the id ends with the request's task there
+            pass
+
+
+class StreamingGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that leaves the streams marked X-Accel-Buffering: no uncompressed. gzip
+    holds small writes back until a block is full, a line answered early would wait for it.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming and response.get("X-Accel-Buffering") == "no":
+            return response
+
+        return super().process_response(request, response)
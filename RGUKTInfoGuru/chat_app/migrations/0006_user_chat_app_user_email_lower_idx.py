@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:40
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_app', '0005_chat_is_archived_alter_message_timestamp_archivedchat'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='chat_app_user_email_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-19 20:05
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_updated_at(apps, schema_editor):
+    """
+    Starts every chat at the time of its latest message, or its creation when it has none
+    """
+    Chat = apps.get_model('chat_app', 'Chat')
+    Message = apps.get_model('chat_app', 'Message')
+
+    latest_message = Message.objects.filter(chat_id=OuterRef('chat_id')).order_by('-timestamp').values('timestamp')[:1]
+    Chat.objects.update(updated_at=Coalesce(Subquery(latest_message), F('created_at')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_app', '0007_alter_user_created_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.6 on 2026-10-19 20:30
+
+import chat_app.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_app', '0008_chat_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', chat_app.models.UserManager()),
+            ],
+        ),
+    ]
@@ -1,9 +1,32 @@
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 import uuid
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth import hashers
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
+from .utils.password_executor import PasswordHashExecutor
 
 # Create your models here.
 
+class UserManager(BaseUserManager):
+    """
+    Looks users up by lower(email), so authenticate() and createsuperuser match emails case-insensitively
+    """
+
+    def get_by_natural_key(self, username):
+        user = (
+            self.alias(email_lower=Lower("email"))
+            .filter(email_lower=username.strip().lower())
+            .order_by("created_at")
+            .first()
+        )
+
+        if user is None:
+            raise self.model.DoesNotExist(f"No user with the email {username}")
+
+        return user
+
+
 class User(AbstractUser):
     """
    Custom user model using email for authentication.
@@ -12,20 +35,56 @@ class User(AbstractUser):
     username = models.CharField(max_length=50)
     email = models.EmailField(unique=True)
     avatar = models.TextField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
+    objects = UserManager()
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(Lower("email"), name="chat_app_user_email_lower_idx"),
+        ]
+
     def __str__(self):
         return self.email
 
+    def set_password(self, raw_password):
+        """
+        Hashes the password on the bounded PasswordHashExecutor pool
+        """
+        self.password = PasswordHashExecutor().run(hashers.make_password, raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """
+        Verifies the password on the bounded PasswordHashExecutor pool. A hash made with an
+        outdated hasher or iteration count is replaced and saved from the calling thread,
+        which owns the database connection.
+        """
+        if not PasswordHashExecutor().run(hashers.check_password, raw_password, self.password):
+            return False
+
+        preferred = hashers.get_hasher("default")
+        if hashers.identify_hasher(self.password).algorithm != preferred.algorithm or preferred.must_update(self.password):
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=["password"])
+
+        return True
+
 
 class Chat(models.Model):
     chat_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="chats")
     chat_name = models.CharField(max_length=255, default="New Chat")
     created_at = models.DateTimeField(auto_now_add=True)
+    is_deleted = models.BooleanField(default=False, db_index=True)
+    deleted_at = models.DateTimeField(blank=True, null=True)
+    is_archived = models.BooleanField(default=False)
+    # Bumped on every change of the chat or its messages, conditional GETs are answered from it
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.chat_name}"
@@ -39,9 +98,21 @@ class Message(models.Model):
         choices=[("user", "User"), ("assistant", "Assistant")],
     )
     content = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
 
     def __str__(self):
         return f"{self.role}: {self.content[:30]}"
 
 
+class ArchivedChat(models.Model):
+    """
+    Cold storage for the messages of an inactive chat, kept as one compressed blob.
+    """
+    chat = models.OneToOneField(Chat, primary_key=True, on_delete=models.CASCADE, related_name="archive")
+    payload = models.BinaryField()
+    message_count = models.PositiveIntegerField(default=0)
+    compressed_size = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.chat_id}: {self.message_count} messages"
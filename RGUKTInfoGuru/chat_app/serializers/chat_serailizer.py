@@ -1,5 +1,8 @@
+from django.conf import settings
 from rest_framework import serializers
 
+from ..utils.utils import MODELS
+
 
 class ChatSerializer(serializers.Serializer):
     """
@@ -10,9 +13,42 @@ class ChatSerializer(serializers.Serializer):
     message = serializers.CharField()
     model = serializers.CharField()
 
+class ChatSocketSerializer(serializers.Serializer):
+    """
+    Serializer for the questions asked over the chat websocket.
+    """
+    message = serializers.CharField()
+    chat_id = serializers.UUIDField(required=False, allow_null=True)
+    model = serializers.CharField(required=False)
+
+class ChatBatchSerializer(serializers.Serializer):
+    """
+    Serializer for asking many independent questions at once.
+    """
+    user_id = serializers.UUIDField()
+    messages = serializers.ListField(
+        child=serializers.CharField(), allow_empty=False, max_length=settings.BATCH_QUESTIONS_MAX
+    )
+    # Checked before the response starts, a streamed response can only report it in a 200
+    model = serializers.ChoiceField(choices=MODELS)
+    stateless = serializers.BooleanField(required=False, default=False)
+
 class ChatRenameSerializers(serializers.Serializer):
     """
     Serializer for handling chat requests.
     """
     chat_id = serializers.UUIDField() 
-    chat_name = serializers.CharField()
\ No newline at end of file
+    chat_name = serializers.CharField()
+
+class ChatBulkDeleteSerializer(serializers.Serializer):
+    """
+    Serializer for deleting many chats of a user.
+    """
+    chat_ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
+    delete_all = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        if not attrs.get("delete_all") and not attrs.get("chat_ids"):
+            raise serializers.ValidationError("Either chat_ids or delete_all is required.")
+
+        return attrs
@@ -84,3 +84,9 @@ class UserDataSerializer(serializers.Serializer):
     avatar = serializers.CharField(read_only=True)
     created_at = serializers.DateTimeField(read_only=True)
 
+
+class TokenBatchSerializer(serializers.Serializer):
+    """
+    Serializer for verifying many tokens at once.
+    """
+    tokens = serializers.ListField(child=serializers.CharField(), allow_empty=False, max_length=100)
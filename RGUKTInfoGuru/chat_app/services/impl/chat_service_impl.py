@@ -2,11 +2,12 @@ from ...dao.impl.user_auth_dao_impl import UserAuthDaoImpl
 from ...services.interface.chat_service_interface import ChatServiceInterface
 from ...exceptions import CustomException
 import logging
+from django.conf import settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from ...dao.impl.chat_dao_impl import ChatDaoImpl
 from ...agent.agent_executor import AgentExecutor
-from pprint import pformat
 from ...utils.response import remove_think_tags
+from ...utils.purge_worker import ChatPurgeWorker
 
 
 logger = logging.getLogger(__name__)
@@ -25,7 +26,12 @@ class ChatServiceImpl(ChatServiceInterface):
             self.initialized = True
             self.user_dao = UserAuthDaoImpl()
             self.chat_dao = ChatDaoImpl()
-            self.agent_executor = AgentExecutor.get_instance()
+            self.purge_worker = ChatPurgeWorker()
+
+    @property
+    def agent_executor(self):
+        # Built on first use, not by every process that imports the service
+        return AgentExecutor.get_instance()
 
     def generate_response(self, user_id, chat_id, message, model):
         """
@@ -38,7 +44,7 @@ class ChatServiceImpl(ChatServiceInterface):
         Response:
             str: The response of the Chatbot.
         """
-        logger.info(f"The user with id {user_id} is asking the chatbot with message '{message}'")
+        logger.info(f"The user with id {user_id} is asking the chatbot a message of {len(message)} characters")
 
         try:
             user = self.user_dao.get_user_by_id(user_id)
@@ -47,22 +53,21 @@ class ChatServiceImpl(ChatServiceInterface):
                 raise CustomException(detail="User not found",status_code=404)
 
             if chat_id is None:
-
-                chat_name = self.agent_executor.generate_chat_name(message)
-
-                chat = self.chat_dao.create_chat(user_id, chat_name)
+                chat, response = self.start_chat(user_id, message)
             else:
-                chat = self.chat_dao.get_chat_by_id(chat_id)
+                chat, response = self.chat_dao.get_chat_by_id(chat_id), None
 
-            response = self.agent_executor.execute(message, user_id, chat.chat_id, model)
+            if response is None:
+                response = self.agent_executor.execute(message, user_id, chat.chat_id, model)
             
-            logger.info(f"Response from the agent: {pformat(response)}")
-            logger.info(f"Response answer from the agent: {response['response']['answer']}")
-
-            self.chat_dao.save_message(chat, 'user', message)
-            self.chat_dao.save_message(chat, 'assistant', remove_think_tags(response['response']['answer']))
+            logger.info(f"Response from the agent ({response['source']}): {len(response['response']['answer'])} characters")
+            # The question and answer themselves only for a sample of the requests
+            logger.debug(
+                "Answered message",
+                extra={"payload": {"message": message, "answer": response['response']['answer']}, "sample": True},
+            )
 
-            messages = self.chat_dao.get_chat_messages(user_id, chat.chat_id)
+            messages = self.save_exchange(chat, message, remove_think_tags(response['response']['answer']))
 
             return {
                 "user_id": user.id,
@@ -73,6 +78,7 @@ class ChatServiceImpl(ChatServiceInterface):
                 "message": message,
                 "response": remove_think_tags(response['response']['answer']),
                 "time_taken_seconds": response['time_taken_seconds'],
+                "source": response['source'],
                 "messages": [
                     {
                         "role": msg.role,
@@ -80,7 +86,7 @@ class ChatServiceImpl(ChatServiceInterface):
                         "message_id": msg.message_id,
                         "created_at": msg.timestamp
                     }
-                    for msg in list(messages)[-2:]
+                    for msg in messages
                 ]
             }
 
@@ -88,6 +94,82 @@ class ChatServiceImpl(ChatServiceInterface):
             logger.info(f"An error occured in {str(e)}")
             raise CustomException(detail=str(e), status_code=404)
         
+    def generate_batch_responses(self, user_id, messages, model, stateless=False):
+        """
+        Answers many independent messages of the user, see AgentExecutor.execute_batch.
+        Unless stateless, every message and its answer are saved to a new chat named after the message.
+        The user is looked up before anything is answered, an unknown user fails before the response starts.
+
+        Returns:
+            generator: The result of every message, in the order they complete.
+        """
+        logger.info(f"The user with id {user_id} is asking the chatbot a batch of {len(messages)} messages")
+
+        user = self.user_dao.get_user_by_id(user_id)
+        if user is None:
+            logger.info("User is not found")
+            raise CustomException(detail="User not found", status_code=404)
+
+        return self.answer_batch(None if stateless else user, messages, model)
+
+    def answer_batch(self, user, messages, model):
+        """
+        Yields the result of every message of a batch as it completes, saved to chats of the user unless user is None
+        """
+        try:
+            max_concurrency = getattr(settings, "BATCH_QUESTIONS_CONCURRENCY", 8)
+
+            for index, response in self.agent_executor.execute_batch(messages, model, max_concurrency):
+                result = {"index": index, "message": messages[index]}
+
+                if isinstance(response, Exception):
+                    yield {**result, "error": str(response)}
+                    continue
+
+                answer = remove_think_tags(response['response']['answer'])
+                result.update(
+                    response=answer, source=response['source'], time_taken_seconds=response['time_taken_seconds']
+                )
+
+                if user is not None:
+                    chat = self.chat_dao.create_chat(user.id, messages[index][:255])
+                    self.save_exchange(chat, messages[index], answer)
+                    result["chat_id"] = chat.chat_id
+
+                yield result
+
+        except Exception as e:
+            logger.error(f"An error occured in answering a batch: {str(e)}")
+            yield {"error": str(e)}
+
+    def start_chat(self, user_id, message):
+        """
+        Creates the chat for its first question. The first question has no history, common
+        ones are answered from the FAQ answers and the chat is named after the FAQ entry.
+
+        Returns:
+            tuple: The chat and the FAQ response, None when the question is left to the llm.
+        """
+        response = self.agent_executor.answer_from_faq(message)
+
+        chat_name = response["chat_name"] if response is not None else self.agent_executor.generate_chat_name(message)
+
+        return self.chat_dao.create_chat(user_id, chat_name), response
+
+    def open_chat(self, user_id, chat_id):
+        """
+        Returns the chat of the user and its messages, to continue it
+        """
+        messages = list(self.chat_dao.get_chat_messages(user_id, chat_id))
+
+        return self.chat_dao.get_chat_by_id(chat_id), messages
+
+    def save_exchange(self, chat, message, answer):
+        """
+        Saves the question and its answer to the chat, returns the saved messages
+        """
+        return self.chat_dao.save_messages(chat, [('user', message), ('assistant', answer)])
+
     def get_chats_by_user_id(self, user_id):
         """
         Returns the Chats of the user
@@ -101,6 +183,18 @@ class ChatServiceImpl(ChatServiceInterface):
         except Exception as e:
             raise CustomException(detail=str(e), status_code=404)
 
+    def get_chats_version(self, user_id):
+        """
+        Returns the number of chats of the user and when the latest of them changed
+        """
+        return self.chat_dao.get_chats_version(user_id)
+
+    def get_chat_last_modified(self, user_id, chat_id):
+        """
+        Returns when the chat or its messages last changed, None when it is not found
+        """
+        return self.chat_dao.get_chat_last_modified(user_id, chat_id)
+
     def get_messages_by_chat_id(self, user_id, chat_id):
         """
         Returns the Messages of the Chat
@@ -144,7 +238,44 @@ class ChatServiceImpl(ChatServiceInterface):
 
         try:
             self.chat_dao.delete_chat(chat_id)
+            self.purge_worker.schedule()
         
         except Exception as e:
             logger.info(f"An error occured in deleting chat: {str(e)}")
             raise CustomException(detail=str(e), status_code=404)
+
+    def delete_chats(self, user_id, chat_ids=None):
+        """
+        Deletes many or all of the Chats of the user
+        """
+
+        try:
+            deleted = self.chat_dao.delete_chats_by_user(user_id, chat_ids)
+            self.purge_worker.schedule()
+
+            return {
+                "user_id": user_id,
+                "deleted_chats": deleted
+            }
+
+        except Exception as e:
+            logger.info(f"An error occured in deleting chats: {str(e)}")
+            raise CustomException(detail=str(e), status_code=404)
+
+    def reload_index(self, force=False):
+        """
+        Switches the served index to the version the current symlink points at
+        """
+
+        try:
+            return self.agent_executor.reload_index(force=force)
+
+        except Exception as e:
+            logger.error(f"An error occured in reloading the index: {str(e)}")
+            raise CustomException(detail=str(e), status_code=500)
+
+    def get_index_status(self):
+        """
+        Returns the served index version
+        """
+        return self.agent_executor.get_index_status()
@@ -2,10 +2,12 @@ from ..interface.user_auth_service_interface import UserAuthServiceInterface
 from ...dao.impl.user_auth_dao_impl import UserAuthDaoImpl
 from ...exceptions import CustomException
 import logging
-from rest_framework_simplejwt.tokens import RefreshToken
-from jwt import decode as jwt_decode
-
-from django.conf import settings
+from rest_framework import status
+from rest_framework_simplejwt.tokens import UntypedToken
+from rest_framework_simplejwt.settings import api_settings
+from ...tokens import EmailRefreshToken
+from ...utils.token_cache import VerifiedTokenCache
+from ...utils.token_purge_worker import TokenPurgeWorker
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +24,17 @@ class UserAuthServiceImpl(UserAuthServiceInterface):
             super().__init__(**kwargs)
             self.initialized = True
             self.user_auth_dao =UserAuthDaoImpl()
+            self.verified_tokens = VerifiedTokenCache()
+            self.token_purge_worker = TokenPurgeWorker()
+
+    @staticmethod
+    def get_overload_status(exception):
+        """
+        Keeps the 503 of a saturated password hashing pool, other errors use the default status
+        """
+        if getattr(exception, "status_code", None) == status.HTTP_503_SERVICE_UNAVAILABLE:
+            return status.HTTP_503_SERVICE_UNAVAILABLE
+        return None
 
     def signup(self, email:str, password: str):
         """
@@ -37,13 +50,15 @@ class UserAuthServiceImpl(UserAuthServiceInterface):
             return user
         except Exception as e:
             logger.info(f"Exception occured while creating a new user : {str(e)}")
-            raise CustomException(detail=str(e))
+            raise CustomException(detail=str(e), status_code=self.get_overload_status(e))
 
     def login(self, email: str, password:str):
         try:
             user = self.user_auth_dao.validate_user(email, password)
 
-            refresh = RefreshToken.for_user(user)
+            self.token_purge_worker.start()
+
+            refresh = EmailRefreshToken.for_user(user)
             access_token = str(refresh.access_token)
 
             return {
@@ -53,26 +68,54 @@ class UserAuthServiceImpl(UserAuthServiceInterface):
             }
         except Exception as e:
             logger.info(f"Exception occured while Logging in : {str(e)}")
-            raise CustomException(detail=str(e))
+            raise CustomException(detail=str(e), status_code=self.get_overload_status(e))
         
     def verify_token(self, token):
         """
         Verifies the JWT token and returns the user associated with it.
+
+        The answer comes from the signed claims, the database is only read for
+        tokens issued before the email claim was added.
         """
 
         try:
-            decoded = jwt_decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-            logger.info(f"Decoded token: {decoded}")
-            user_id = decoded.get("user_id")
+            data = self.verified_tokens.get(token)
+
+            if data is not None:
+                return data
+
+            decoded = UntypedToken(token)
+            user_id = decoded.get(api_settings.USER_ID_CLAIM)
             if not user_id:
                 raise CustomException("Invalid token: No user ID found")
 
-            user = self.user_auth_dao.get_user_by_id(user_id)
-            
-            return {
-                "userId": str(user.id),
-                "email": user.email, 
+            email = decoded.get("email")
+
+            if email is None:
+                email = self.user_auth_dao.get_user_by_id(user_id).email
+
+            data = {
+                "userId": str(user_id),
+                "email": email,
             }
+
+            self.verified_tokens.set(token, data, decoded["exp"])
+
+            return data
         except Exception as e:
             raise CustomException(str(e))
 
+    def verify_tokens(self, tokens):
+        """
+        Verifies many JWT tokens, one result per token in the given order.
+        """
+
+        results = []
+
+        for token in tokens:
+            try:
+                results.append({"valid": True, "data": self.verify_token(token)})
+            except Exception as e:
+                results.append({"valid": False, "message": str(e)})
+
+        return results
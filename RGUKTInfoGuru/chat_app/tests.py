@@ -1,3 +1,249 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .agent.query_router import QueryRouter
+from .ingestion.chunking import StructuredTextSplitter
+from .ingestion.scraper import Scraper
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """
+    Serves the pages of the test server. A page is a dict with the body and, optionally,
+    its etag and last_modified, which make the handler answer matching conditional requests with 304.
+    """
+
+    def do_GET(self):
+        server = self.server
+        page = server.pages.get(self.path)
+        host = self.headers["Host"]
+
+        with server.lock:
+            server.requests.append((self.path, dict(self.headers)))
+            server.active[host] = server.active.get(host, 0) + 1
+            server.max_active[host] = max(server.max_active.get(host, 0), server.active[host])
+
+        try:
+            time.sleep(server.delay)
+
+            if page is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+
+            etag, last_modified = page.get("etag"), page.get("last_modified")
+            if (etag and self.headers["If-None-Match"] == etag) or (
+                not etag and last_modified and self.headers["If-Modified-Since"] == last_modified
+            ):
+                self.send_response(304)
+                self.end_headers()
+                return
+
+            body = page["body"].encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+            if last_modified:
+                self.send_header("Last-Modified", last_modified)
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active[host] -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+def page(text, **validators):
+    return {"body": f'<html><body><div class="content"><p>{text}</p></div></body></html>', **validators}
+
+
+class ScraperTests(SimpleTestCase):
+    """
+    Runs the scraper against a local http.server
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+        cls.server.lock = threading.Lock()
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.port = cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.pages = {}
+        self.server.requests = []
+        self.server.active = {}
+        self.server.max_active = {}
+        self.server.delay = 0
+        self.tmp_dir = tempfile.mkdtemp()
+        self.dataset_path = os.path.join(self.tmp_dir, "dataset")
+        self.cache_dir = os.path.join(self.tmp_dir, "cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def url(self, path, host="127.0.0.1"):
+        return f"http://{host}:{self.port}{path}"
+
+    def scraper(self, urls, **options):
+        sources = {"about": {"campus": {"urls": urls, "classes": ["content"]}}}
+        return Scraper(sources, dataset_path=self.dataset_path, cache_dir=self.cache_dir, **options)
+
+    def read_output(self):
+        with open(os.path.join(self.dataset_path, "about", "campus.txt"), encoding="utf-8") as f:
+            return f.read()
+
+    def conditional_headers(self):
+        return [
+            (headers.get("If-None-Match"), headers.get("If-Modified-Since")) for _, headers in self.server.requests
+        ]
+
+    def test_etag_not_modified_is_answered_from_the_cache(self):
+        self.server.pages["/a"] = page("Hostel fee", etag='"v1"')
+
+        first = self.scraper([self.url("/a")]).run()
+        self.assertEqual(first["files_written"], 1)
+        self.assertEqual(self.read_output(), "Hostel fee\n")
+
+        self.server.requests = []
+        second = self.scraper([self.url("/a")]).run()
+
+        self.assertEqual(self.conditional_headers(), [('"v1"', None)])
+        self.assertEqual(second["pages_changed"], 0)
+        self.assertEqual(second["pages_failed"], 0)
+        self.assertEqual(second["files_unchanged"], 1)
+        self.assertEqual(self.read_output(), "Hostel fee\n")
+
+    def test_last_modified_not_modified_is_answered_from_the_cache(self):
+        last_modified = "Mon, 19 Oct 2026 10:00:00 GMT"
+        self.server.pages["/a"] = page("Exam dates", last_modified=last_modified)
+
+        self.scraper([self.url("/a")]).run()
+        self.server.requests = []
+        stats = self.scraper([self.url("/a")]).run()
+
+        self.assertEqual(self.conditional_headers(), [(None, last_modified)])
+        self.assertEqual(stats["pages_changed"], 0)
+        self.assertEqual(stats["files_unchanged"], 1)
+
+    def test_changed_page_is_written_again(self):
+        self.server.pages["/a"] = page("Old fee", etag='"v1"')
+        self.scraper([self.url("/a")]).run()
+
+        self.server.pages["/a"] = page("New fee", etag='"v2"')
+        stats = self.scraper([self.url("/a")]).run()
+
+        self.assertEqual(stats["pages_changed"], 1)
+        self.assertEqual(stats["files_written"], 1)
+        self.assertEqual(self.read_output(), "New fee\n")
+
+    def test_unchanged_page_without_validators_is_skipped(self):
+        self.server.pages["/a"] = page("Library hours")
+        self.scraper([self.url("/a")]).run()
+
+        path = os.path.join(self.dataset_path, "about", "campus.txt")
+        os.utime(path, (0, 0))
+        stats = self.scraper([self.url("/a")]).run()
+
+        # Downloaded again, but the same body does not rewrite the file
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(stats["pages_changed"], 0)
+        self.assertEqual(stats["files_unchanged"], 1)
+        self.assertEqual(os.path.getmtime(path), 0)
+
+    def test_requests_per_host_are_limited(self):
+        self.server.delay = 0.1
+        paths = [f"/page{index}" for index in range(6)]
+        for path in paths:
+            self.server.pages[path] = page(f"Text of {path}")
+
+        urls = [self.url(path) for path in paths] + [self.url(path, host="localhost") for path in paths]
+        stats = self.scraper(urls, max_workers=8, per_host=2).run()
+
+        self.assertEqual(stats["pages"], 12)
+        self.assertEqual(stats["pages_failed"], 0)
+        self.assertEqual(
+            self.server.max_active, {f"127.0.0.1:{self.port}": 2, f"localhost:{self.port}": 2}
+        )
+
+
+class StructuredTextSplitterTests(SimpleTestCase):
+    """
+    Every line of the text must end up in a chunk, and no chunk may exceed chunk_size
+    """
+
+    def assert_every_line_chunked(self, text, splitter):
+        chunks = [chunk for chunk, _ in splitter.split_text(text)[0]]
+        joined = "\n".join(chunks)
+
+        missing = [line.strip() for line in text.splitlines() if line.strip() and line.strip() not in joined]
+        self.assertEqual(missing, [])
+        self.assertLessEqual(max(len(chunk) for chunk in chunks), splitter.chunk_size)
+        return chunks
+
+    def test_roster_under_a_heading_is_kept(self):
+        text = "Faculty List\n" + "\n".join(f"Mr. Person{index} Assistant Professor" for index in range(40))
+
+        self.assert_every_line_chunked(text, StructuredTextSplitter(500, 50))
+
+    def test_list_of_short_lines_is_kept(self):
+        text = "\n".join(f"Dr. Name Number{index}" for index in range(200))
+
+        self.assert_every_line_chunked(text, StructuredTextSplitter(500, 50))
+
+    def test_sections_with_overlap_are_kept(self):
+        sections = []
+        for section in range(6):
+            sections.append(f"Section {section}")
+            sections.extend(
+                f"Students of year {section} attend lecture {index} on the campus of the university." for index in range(8)
+            )
+            sections.extend(f"- Item {index} of section {section}" for index in range(5))
+
+        text = "\n".join(sections)
+
+        for chunk_size, chunk_overlap in ((300, 80), (200, 150), (1500, 200)):
+            self.assert_every_line_chunked(text, StructuredTextSplitter(chunk_size, chunk_overlap))
+
+
+class QueryRouterTests(SimpleTestCase):
+    """
+    Department aliases that are also everyday words only route questions about a department
+    """
+
+    def setUp(self):
+        self.router = QueryRouter()
+
+    def test_everyday_words_do_not_route_to_a_department(self):
+        self.assertIsNone(self.router.route("Are computers available in the library?"))
+        self.assertEqual(self.router.route("Where can I get study materials for the exams?"), {"category": "academic"})
+        self.assertEqual(self.router.route("Who takes care of the management of the hostel?"), {"category": "about"})
+
+    def test_everyday_words_route_with_a_department_context(self):
+        self.assertEqual(self.router.route("Who is the HOD of the management department?"), {"department": "management"})
+        self.assertEqual(self.router.route("Which labs does the materials branch have?"), {"department": "mme"})
+        self.assertEqual(self.router.route("What courses are taught in computers engineering?"), {"department": "cse"})
+
+    def test_unambiguous_aliases_route_alone(self):
+        self.assertEqual(self.router.route("Tell me about the MBA programme"), {"department": "management"})
+        self.assertEqual(self.router.route("Who teaches computer science?"), {"department": "cse"})
+        self.assertEqual(
+            self.router.route("Compare cse and metallurgy"), {"department": {"$in": ["cse", "mme"]}}
+        )
@@ -0,0 +1,31 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .utils.blacklist_filter import BlacklistFilter
+
+
+class EmailRefreshToken(RefreshToken):
+    """
+    Refresh token that also carries the user's email. The claim is copied into
+    the access token, so token verification can answer without loading the user.
+
+    Blacklist checks go through the per-process BlacklistFilter instead of a
+    query on the token_blacklist tables.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token["email"] = user.email
+        return token
+
+    def check_blacklist(self):
+        if BlacklistFilter().contains(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        result = super().blacklist()
+        BlacklistFilter().add(self.payload[api_settings.JTI_CLAIM])
+        return result
@@ -0,0 +1,82 @@
+from django.conf import settings
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BlacklistFilter:
+    """
+    Per-process set of blacklisted refresh token jtis.
+
+    The set is topped up with the rows added since the last seen id at most once
+    every TOKEN_BLACKLIST_REFRESH_SECONDS, and rebuilt from scratch every
+    TOKEN_BLACKLIST_RELOAD_SECONDS so purged tokens leave it and rows committed out
+    of id order are picked up. Tokens blacklisted by this process are added right
+    away, tokens blacklisted by another process are seen after one refresh interval.
+    """
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        """
+        Implements the Singleton pattern to ensure only one instance is created.
+        """
+        if cls._instance is None:
+            cls._instance = super(BlacklistFilter, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, **kwargs):
+        if not hasattr(self, "initialized"):
+            super().__init__(**kwargs)
+            self.initialized = True
+            self.refresh_seconds = getattr(settings, "TOKEN_BLACKLIST_REFRESH_SECONDS", 5)
+            self.reload_seconds = getattr(settings, "TOKEN_BLACKLIST_RELOAD_SECONDS", 300)
+            self._jtis = set()
+            self._last_id = 0
+            self._refreshed_at = 0.0
+            self._reloaded_at = 0.0
+            self._lock = threading.Lock()
+
+    def contains(self, jti):
+        """
+        Returns True when the jti is blacklisted
+        """
+        self.refresh()
+        return jti in self._jtis
+
+    def add(self, jti):
+        self._jtis.add(jti)
+
+    def refresh(self, force=False):
+        """
+        Loads the blacklisted tokens added since the last refresh when it is due
+        """
+        now = time.monotonic()
+
+        if not force and now - self._refreshed_at < self.refresh_seconds:
+            return
+
+        with self._lock:
+            if not force and now - self._refreshed_at < self.refresh_seconds:
+                return
+
+            from ..dao.impl.token_dao_impl import TokenDaoImpl
+
+            full_reload = force or now - self._reloaded_at >= self.reload_seconds
+            after_id = 0 if full_reload else self._last_id
+            jtis = set() if full_reload else self._jtis
+            last_id = after_id
+
+            for row_id, jti in TokenDaoImpl().get_blacklisted_jtis(after_id).iterator(chunk_size=5000):
+                jtis.add(jti)
+                last_id = row_id
+
+            if full_reload:
+                self._jtis = jtis
+                self._reloaded_at = now
+                logger.debug(f"Reloaded {len(jtis)} blacklisted tokens")
+
+            self._last_id = last_id
+            self._refreshed_at = now
@@ -0,0 +1,177 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Set by RequestIdMiddleware for the request being served by the current thread
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+
+def truncate(text, limit):
+    """
+    Cuts the text to limit characters, noting how much was left out
+    """
+    if limit is None or len(text) <= limit:
+        return text
+
+    return f"{text[:limit]}... [{len(text) - limit} more characters]"
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Stamps every record with the id of the request it was logged in
+    """
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a rate share of the records logged with extra={"sample": True}, every other record passes.
+    Verbose payload logs are sampled so they cost nothing on most requests.
+    """
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if getattr(record, "sample", False):
+            return random.random() < self.rate
+
+        return True
+
+
+class TruncatingFormatter(logging.Formatter):
+    """
+    Text formatter that cuts the message to max_length characters, for the console.
+    Takes the format under its dictConfig name, format.
+    """
+
+    def __init__(self, format=None, datefmt=None, style="%", max_length=2000):
+        super().__init__(format, datefmt, style)
+        self.max_length = max_length
+
+    def formatMessage(self, record):
+        # A copy, the other handlers of the record still see the whole message
+        record = copy.copy(record)
+        record.message = truncate(record.message, self.max_length)
+        return super().formatMessage(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON object per line. The message and the payload, an object
+    logged with extra={"payload": ...}, are cut to max_length characters.
+    """
+
+    def __init__(self, max_length=2000):
+        super().__init__()
+        self.max_length = max_length
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": truncate(record.getMessage(), self.max_length),
+            "location": f"{record.module}.{record.funcName}:{record.lineno}",
+            "process": record.process,
+            "thread": record.threadName,
+        }
+
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            text = json.dumps(payload, default=str)
+            entry["payload"] = json.loads(text) if len(text) <= self.max_length else truncate(text, self.max_length)
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        return json.dumps(entry)
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Non-blocking handler: the logging thread only puts the record on a bounded queue, a
+    listener thread formats it and writes it to the handlers named in handlers. Records
+    logged while the queue is full are dropped and counted instead of blocking the request.
+
+    The handlers are looked up by name on the first record, once dictConfig created them. A
+    forked process gets a new queue and its own listener, the master's thread is not copied.
+    """
+
+    exception_formatter = logging.Formatter()
+
+    def __init__(self, handlers, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.handler_names = handlers
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        atexit.register(self.stop)
+
+    def start(self):
+        handlers = [_handler_by_name(name) for name in self.handler_names]
+
+        self.queue = queue.Queue(self.queue_size)
+        self._listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self._listener.start()
+        self._pid = os.getpid()
+
+    def stop(self):
+        """
+        Writes the queued records and stops the listener, registered with atexit
+        """
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+
+    def prepare(self, record):
+        # Only the arguments are merged on the logging thread, formatting is left to the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+
+        # Tracebacks hold frames that may be gone by the time the listener formats them
+        if record.exc_info:
+            record.exc_text = self.exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            with self.lock:
+                if self._pid != os.getpid():
+                    self.start()
+
+        super().emit(record)
+
+
+def _handler_by_name(name):
+    get_handler = getattr(logging, "getHandlerByName", None)
+
+    if get_handler is not None:
+        return get_handler(name)
+
+    # Python < 3.12 keeps the named handlers in a module dict only
+    return logging._handlers[name]
@@ -0,0 +1,271 @@
+import atexit
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_PREFIX = "messages-"
+
+
+class MessageWriter:
+    """
+    Write-behind persistence of chat messages, used when MESSAGE_WRITE_BEHIND is on.
+
+    queue() keeps the messages of an answer in memory and returns at once, a background
+    thread inserts everything queued meanwhile with one bulk_create per batch. Until then
+    ChatDaoImpl.get_chat_messages merges the pending messages into the stored ones.
+
+    Queued messages are appended to a journal segment of the writer first. Every flush
+    starts a new segment and deletes the ones it inserted, so the journal only holds what
+    is still pending. The pending messages are flushed when the process exits, the segments
+    of a process that died without it are inserted by the next writer that starts. Segment
+    names carry a random token of the writer, so a restarted process that gets the pid of
+    a dead one never writes to or deletes its segments.
+    """
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        """
+        Implements the Singleton pattern to ensure only one instance is created.
+        """
+        if cls._instance is None:
+            cls._instance = super(MessageWriter, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, **kwargs):
+        if not hasattr(self, "initialized"):
+            super().__init__(**kwargs)
+            self.initialized = True
+            self.batch_size = getattr(settings, "MESSAGE_WRITE_BATCH_SIZE", 500)
+            self.flush_interval = getattr(settings, "MESSAGE_WRITE_FLUSH_SECONDS", 0.2)
+            self.journal_dir = getattr(settings, "MESSAGE_JOURNAL_DIR", None)
+            self._reset()
+            atexit.register(self.close)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        # Insertion ordered, message_id -> unsaved Message
+        self._pending = {}
+        # The segment queue() appends to, and the closed ones whose messages are not all inserted yet
+        self._journal = None
+        self._journal_path = None
+        self._sealed = []
+        self._token = uuid.uuid4().hex[:12]
+        self._segments = itertools.count()
+        self._thread = None
+
+    def after_fork(self):
+        """
+        A forked worker starts with an empty queue, its own journal and its own thread
+        """
+        self._reset()
+
+    def queue(self, messages):
+        """
+        Queues unsaved Message objects for insertion, in order.
+        """
+        with self._lock:
+            self._write_journal(messages)
+
+            for message in messages:
+                self._pending[message.message_id] = message
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="message-writer", daemon=True)
+                self._thread.start()
+
+        self._wakeup.set()
+
+    def pending(self, chat_id):
+        """
+        Returns the queued messages of the chat that are not inserted yet
+        """
+        with self._lock:
+            return [message for message in self._pending.values() if message.chat_id == chat_id]
+
+    def flush(self):
+        """
+        Inserts every pending message, batch_size rows per transaction. Messages queued
+        meanwhile go to a new journal segment and are left for the next flush.
+
+        Returns:
+            int: The number of messages inserted.
+        """
+        written = 0
+
+        with self._flush_lock:
+            with self._lock:
+                # Every message of the sealed segments is pending now or inserted already
+                self._seal_journal()
+                messages = list(self._pending.values())
+
+            for start in range(0, len(messages), self.batch_size):
+                batch = messages[start:start + self.batch_size]
+                written += self._insert(batch)
+
+                with self._lock:
+                    for message in batch:
+                        self._pending.pop(message.message_id, None)
+
+            # Kept when an insert failed, the retry seals the segment after them and deletes all
+            for path in self._sealed:
+                os.remove(path)
+            self._sealed = []
+
+        return written
+
+    def close(self):
+        """
+        Flushes the pending messages before the process exits, registered with atexit
+        """
+        if not self._pending and self._journal is None and not self._sealed:
+            return
+
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"An error occured in flushing {len(self._pending)} messages, they stay in the journal: {str(e)}")
+
+    def _run(self):
+        try:
+            self.replay_journals()
+        except Exception as e:
+            logger.error(f"An error occured in replaying message journals: {str(e)}")
+
+        while True:
+            self._wakeup.wait()
+            # Lets the messages of concurrent answers join the batch
+            time.sleep(self.flush_interval)
+            self._wakeup.clear()
+
+            try:
+                close_old_connections()
+                written = self.flush()
+                logger.info(f"Inserted {written} queued messages")
+            except Exception as e:
+                logger.error(f"An error occured in inserting queued messages, retrying: {str(e)}")
+                time.sleep(1)
+                self._wakeup.set()
+            finally:
+                close_old_connections()
+
+    def _insert(self, messages):
+        from ..models import Chat, Message
+
+        with transaction.atomic():
+            chat_ids = {message.chat_id for message in messages}
+            existing = set(Chat.objects.filter(chat_id__in=chat_ids).values_list("chat_id", flat=True))
+            rows = [message for message in messages if message.chat_id in existing]
+
+            if len(rows) < len(messages):
+                logger.info(f"Dropped {len(messages) - len(rows)} queued messages of purged chats")
+
+            # A replayed journal may hold messages that were inserted before the crash
+            Message.objects.bulk_create(rows, ignore_conflicts=True)
+            Chat.objects.filter(chat_id__in=existing).update(updated_at=timezone.now())
+
+        return len(rows)
+
+    def _write_journal(self, messages):
+        if not self.journal_dir:
+            return
+
+        if self._journal is None:
+            os.makedirs(self.journal_dir, exist_ok=True)
+            self._journal_path = os.path.join(
+                self.journal_dir, f"{JOURNAL_PREFIX}{os.getpid()}-{self._token}-{next(self._segments)}.jsonl"
+            )
+            self._journal = open(self._journal_path, "x", encoding="utf-8")
+
+        for message in messages:
+            self._journal.write(
+                json.dumps(
+                    {
+                        "message_id": str(message.message_id),
+                        "chat_id": str(message.chat_id),
+                        "role": message.role,
+                        "content": message.content,
+                        "timestamp": message.timestamp.isoformat(),
+                    }
+                )
+                + "\n"
+            )
+
+        # Survives a crash of the process, not of the machine
+        self._journal.flush()
+
+    def _seal_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._sealed.append(self._journal_path)
+            self._journal = self._journal_path = None
+
+    def replay_journals(self):
+        """
+        Inserts the messages journaled by processes that exited without flushing them, one segment at a time.
+        A segment with the pid of this process but another token was left by a dead process the pid was reused from.
+        """
+        from ..models import Message
+
+        if not self.journal_dir or not os.path.isdir(self.journal_dir):
+            return
+
+        for name in os.listdir(self.journal_dir):
+            if not name.startswith(JOURNAL_PREFIX) or not name.endswith(".jsonl"):
+                continue
+
+            # messages-<pid>-<token>-<segment>.jsonl, or messages-<pid>-<segment>.jsonl before tokens were added
+            parts = name[len(JOURNAL_PREFIX):-len(".jsonl")].split("-")
+            pid, token = int(parts[0]), parts[1] if len(parts) == 3 else None
+
+            if pid == os.getpid():
+                if token == self._token:
+                    continue
+            elif _process_alive(pid):
+                continue
+
+            path = os.path.join(self.journal_dir, name)
+            messages = []
+
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        # The line the process was writing when it died
+                        continue
+
+                    row["message_id"] = uuid.UUID(row["message_id"])
+                    row["chat_id"] = uuid.UUID(row["chat_id"])
+                    row["timestamp"] = parse_datetime(row["timestamp"])
+                    messages.append(Message(**row))
+
+            for start in range(0, len(messages), self.batch_size):
+                self._insert(messages[start:start + self.batch_size])
+
+            os.remove(path)
+            logger.info(f"Replayed {len(messages)} messages from the journal {path}")
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
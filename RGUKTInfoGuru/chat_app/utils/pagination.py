@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Cursor pagination over users, newest first. The cursor is a position in the
+    created_at ordering, so every page is one indexed range query regardless of
+    how deep the client pages.
+    """
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    ordering = "-created_at"
@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from rest_framework import status
+from ..exceptions import CustomException
+import os
+import threading
+
+
+class PasswordHashExecutor:
+    """
+    Bounded pool for password hashing.
+
+    PBKDF2 spends its time in hashlib, which releases the GIL, so a few threads
+    hash in parallel while the number of hashes in flight per process is capped by
+    LOGIN_CONCURRENCY_LIMIT. When the cap is reached for longer than
+    LOGIN_QUEUE_TIMEOUT_SECONDS the call fails fast with a 503 instead of piling up
+    behind the CPU. The calling thread still waits for its hash, so the pool caps how
+    many hashes run at once rather than freeing request threads.
+    """
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        """
+        Implements the Singleton pattern to ensure only one instance is created.
+        """
+        if cls._instance is None:
+            cls._instance = super(PasswordHashExecutor, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, **kwargs):
+        if not hasattr(self, "initialized"):
+            super().__init__(**kwargs)
+            self.initialized = True
+            self.max_workers = getattr(settings, "PASSWORD_HASH_WORKERS", None) or os.cpu_count() or 1
+            self.concurrency_limit = getattr(settings, "LOGIN_CONCURRENCY_LIMIT", None) or self.max_workers * 2
+            self.queue_timeout = getattr(settings, "LOGIN_QUEUE_TIMEOUT_SECONDS", 0.5)
+            self.after_fork()
+
+    def after_fork(self):
+        """
+        Creates the pool, again in a forked worker: a pool copied from the master has no threads left
+        and would never run the submitted hashes
+        """
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(self.concurrency_limit)
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Runs the hashing function on the pool and returns its result
+        """
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise CustomException(
+                detail="Too many login attempts right now, please try again shortly",
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        try:
+            return self._executor.submit(fn, *args, **kwargs).result()
+        finally:
+            self._slots.release()
@@ -0,0 +1,101 @@
+import gc
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Tokenizers started in the master would otherwise warn and fall back to one thread in every worker
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+_state = {"master": False}
+
+
+def mark_master():
+    """
+    Called by gunicorn.conf.py before the app is preloaded, the process only loads state for its workers
+    """
+    _state["master"] = True
+
+
+def in_master():
+    return _state["master"]
+
+
+def _torch():
+    # Only configured when the embedding model already imported it
+    return sys.modules.get("torch")
+
+
+def warm_up():
+    """
+    Finishes loading the shared read-only state in the master and freezes it.
+
+    One embedding call allocates the lazily created model buffers, so workers do not
+    each allocate their own copy. Torch runs it on one thread, an OpenMP pool started
+    before fork is not usable in the workers. gc.freeze() moves everything loaded so far
+    out of the collector's reach, collections in the workers would otherwise write to
+    every object header and unshare the pages.
+    """
+    from ..agent.agent_executor import AgentExecutor
+
+    torch = _torch()
+    if torch is not None:
+        torch.set_num_threads(1)
+
+    agent_executor = AgentExecutor.get_instance()
+    agent_executor.embeddings.embed_query("warm up")
+
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preloaded the app in the master process {os.getpid()}, {gc.get_freeze_count()} objects frozen")
+
+
+def before_fork():
+    """
+    Closes the master's database connections, a forked worker must never reuse the socket
+    """
+    from django.db import connections
+
+    connections.close_all()
+
+
+def after_fork(workers):
+    """
+    Re-creates in a new worker everything that can not be shared across fork: the Groq
+    HTTP clients, the Chroma client, locks and the background threads of the singletons
+    the master created. Torch gets its share of the CPUs.
+    """
+    from django.conf import settings
+    from django.db import connections
+
+    from ..agent.agent_executor import AgentExecutor
+    from .message_writer import MessageWriter
+    from .password_executor import PasswordHashExecutor
+    from .purge_worker import ChatPurgeWorker
+    from .token_purge_worker import TokenPurgeWorker
+
+    _state["master"] = False
+
+    # Inherited connection objects are dropped without closing them, the master owns the sockets
+    for connection in connections.all(initialized_only=True):
+        connection.connection = None
+
+    torch = _torch()
+    if torch is not None:
+        threads = getattr(settings, "TORCH_THREADS_PER_WORKER", None) or max(1, (os.cpu_count() or 1) // workers)
+        torch.set_num_threads(threads)
+
+    for singleton in (AgentExecutor, PasswordHashExecutor, ChatPurgeWorker, TokenPurgeWorker, MessageWriter):
+        instance = singleton._instance
+        if instance is not None and hasattr(instance, "initialized"):
+            instance.after_fork()
+
+
+def worker_ready():
+    """
+    Starts the index reload triggers of the worker, once gunicorn installed its own signal handlers
+    """
+    from ..agent.agent_executor import AgentExecutor
+
+    AgentExecutor.get_instance().install_reload_triggers()
@@ -0,0 +1,71 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class ChatPurgeWorker:
+    """
+    Background thread that purges soft deleted chats in batches.
+
+    Deleting a chat only flags it, the heavy DELETE statements run here so the
+    request that asked for the deletion returns immediately.
+    """
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        """
+        Implements the Singleton pattern to ensure only one instance is created.
+        """
+        if cls._instance is None:
+            cls._instance = super(ChatPurgeWorker, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, **kwargs):
+        if not hasattr(self, "initialized"):
+            super().__init__(**kwargs)
+            self.initialized = True
+            self.batch_size = getattr(settings, "CHAT_PURGE_BATCH_SIZE", 1000)
+            self._wakeup = threading.Event()
+            self._lock = threading.Lock()
+            self._thread = None
+
+    def schedule(self):
+        """
+        Wakes the worker up, starting its thread on first use.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="chat-purge-worker", daemon=True)
+                self._thread.start()
+
+        self._wakeup.set()
+
+    def after_fork(self):
+        """
+        A forked worker inherits the thread object but not the thread, it starts its own on the next schedule
+        """
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _run(self):
+        from ..dao.impl.chat_dao_impl import ChatDaoImpl
+
+        chat_dao = ChatDaoImpl()
+
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+
+            try:
+                close_old_connections()
+                chat_dao.purge_deleted_chats(batch_size=self.batch_size)
+            except Exception as e:
+                logger.error(f"An error occured in purging deleted chats: {str(e)}")
+            finally:
+                close_old_connections()
@@ -2,6 +2,8 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework import status
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
 import re
 
 class CustomResponse:
@@ -37,4 +39,45 @@ class CustomResponse:
 def remove_think_tags(text):
         pattern = r'<think>.*?</think>'
         cleaned_text = re.sub(pattern, '', text, flags=re.DOTALL)
-        return cleaned_text.strip()
\ No newline at end of file
+        return cleaned_text.strip()
+
+
+def visible_answer(text):
+    """
+    Returns the part of a partially generated answer that can be shown: without the think
+    blocks, and up to a think block or tag that is still being generated.
+    """
+    text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL)
+
+    start = text.find('<think>')
+    if start != -1:
+        text = text[:start]
+
+    for length in range(len('<think>') - 1, 0, -1):
+        if text.endswith('<think>'[:length]):
+            text = text[:-length]
+            break
+
+    return text.lstrip()
+
+
+class ThreadedStreamingHttpResponse(StreamingHttpResponse):
+    """
+    StreamingHttpResponse over a synchronous iterator that also streams under ASGI. Django
+    reads a synchronous iterator there into a list before sending anything, this response
+    takes one part at a time from the iterator instead. WSGI servers iterate it as usual.
+
+    The parts are read on the thread the request's sync code runs on, so a queryset
+    iterator keeps its database connection, and the event loop is never blocked.
+    """
+
+    async def __aiter__(self):
+        parts = iter(self.streaming_content)
+        end = object()
+        read = sync_to_async(next)
+
+        while True:
+            part = await read(parts, end)
+            if part is end:
+                return
+            yield part
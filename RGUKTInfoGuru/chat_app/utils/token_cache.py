@@ -0,0 +1,63 @@
+from collections import OrderedDict
+from django.conf import settings
+import threading
+import time
+
+
+class VerifiedTokenCache:
+    """
+    In-process LRU cache of recently verified tokens. An entry never outlives the
+    expiry of its token, so a cached answer is always one the signature check
+    would still give.
+    """
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        """
+        Implements the Singleton pattern to ensure only one instance is created.
+        """
+        if cls._instance is None:
+            cls._instance = super(VerifiedTokenCache, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, **kwargs):
+        if not hasattr(self, "initialized"):
+            super().__init__(**kwargs)
+            self.initialized = True
+            self.max_size = getattr(settings, "VERIFIED_TOKEN_CACHE_SIZE", 10000)
+            self._entries = OrderedDict()
+            self._lock = threading.Lock()
+
+    def get(self, token):
+        """
+        Returns the cached verification result of the token or None
+        """
+        with self._lock:
+            entry = self._entries.get(token)
+
+            if entry is None:
+                return None
+
+            data, expires_at = entry
+
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+
+            self._entries.move_to_end(token)
+            return data
+
+    def set(self, token, data, expires_at):
+        """
+        Caches the verification result of the token until its expiry timestamp
+        """
+        if expires_at <= time.time():
+            return
+
+        with self._lock:
+            self._entries[token] = (data, expires_at)
+            self._entries.move_to_end(token)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
@@ -0,0 +1,70 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class TokenPurgeWorker:
+    """
+    Background thread that removes expired outstanding and blacklisted tokens
+    every TOKEN_PURGE_INTERVAL_SECONDS.
+    """
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        """
+        Implements the Singleton pattern to ensure only one instance is created.
+        """
+        if cls._instance is None:
+            cls._instance = super(TokenPurgeWorker, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, **kwargs):
+        if not hasattr(self, "initialized"):
+            super().__init__(**kwargs)
+            self.initialized = True
+            self.interval = getattr(settings, "TOKEN_PURGE_INTERVAL_SECONDS", 3600)
+            self.batch_size = getattr(settings, "TOKEN_PURGE_BATCH_SIZE", 1000)
+            self._lock = threading.Lock()
+            self._thread = None
+
+    def start(self):
+        """
+        Starts the worker thread if it is not running yet.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="token-purge-worker", daemon=True)
+                self._thread.start()
+
+    def after_fork(self):
+        """
+        Restarts the worker thread in a forked process when the master had started it
+        """
+        started = self._thread is not None
+        self._lock = threading.Lock()
+        self._thread = None
+
+        if started:
+            self.start()
+
+    def _run(self):
+        from ..dao.impl.token_dao_impl import TokenDaoImpl
+
+        token_dao = TokenDaoImpl()
+
+        while True:
+            time.sleep(self.interval)
+
+            try:
+                close_old_connections()
+                token_dao.purge_expired_tokens(batch_size=self.batch_size)
+            except Exception as e:
+                logger.error(f"An error occured in purging expired tokens: {str(e)}")
+            finally:
+                close_old_connections()
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.cache import cache
+
+
+class UserCache:
+    """
+    Short lived cache of User rows shared by the JWT authentication class and
+    UserAuthDaoImpl.get_user_by_id. Entries are dropped whenever the user is saved
+    or deleted (see chat_app.signals), in every worker only when the cache backend is
+    shared, see REDIS_URL. QuerySet.update() sends no signals, code that changes users
+    with it has to call invalidate() for each of them.
+    """
+
+    _instance = None
+    key_prefix = "chat_app:user:"
+
+    def __new__(cls, *args, **kwargs):
+        """
+        Implements the Singleton pattern to ensure only one instance is created.
+        """
+        if cls._instance is None:
+            cls._instance = super(UserCache, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, **kwargs):
+        if not hasattr(self, "initialized"):
+            super().__init__(**kwargs)
+            self.initialized = True
+            self.ttl = getattr(settings, "USER_CACHE_TTL", 60)
+
+    def make_key(self, user_id):
+        return f"{self.key_prefix}{user_id}"
+
+    def get(self, user_id):
+        """
+        Returns the cached user or None
+        """
+        return cache.get(self.make_key(user_id))
+
+    def set(self, user):
+        cache.set(self.make_key(user.pk), user, self.ttl)
+
+    def invalidate(self, user_id):
+        cache.delete(self.make_key(user_id))
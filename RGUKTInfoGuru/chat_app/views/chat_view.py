@@ -1,14 +1,47 @@
 from rest_framework.viewsets import ViewSet
-from ..utils.response import CustomResponse
+from ..utils.response import CustomResponse, ThreadedStreamingHttpResponse
 from rest_framework.decorators import action
 from rest_framework import status
-from ..serializers.chat_serailizer import ChatSerializer, ChatRenameSerializers
+from ..serializers.chat_serailizer import ChatSerializer, ChatRenameSerializers, ChatBulkDeleteSerializer, ChatBatchSerializer
 from rest_framework.permissions import IsAuthenticated
 from ..services.impl.chat_service_impl import ChatServiceImpl
+from ..authentication import ClaimsJWTAuthentication
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+# Polled listings are answered with 304 Not Modified from one small query when nothing changed
+
+def chats_version(request, user_id=None):
+    if not hasattr(request, "chats_version"):
+        request.chats_version = ChatServiceImpl().get_chats_version(user_id)
+    return request.chats_version
+
+
+def chats_etag(request, user_id=None):
+    version = chats_version(request, user_id)
+    last_modified = version["last_modified"]
+    return f"{version['count']}-{int(last_modified.timestamp() * 1e6) if last_modified else 0}"
+
+
+def chats_last_modified(request, user_id=None):
+    return chats_version(request, user_id)["last_modified"]
+
+
+def chat_last_modified(request, user_id=None, chat_id=None):
+    if not hasattr(request, "chat_last_modified"):
+        request.chat_last_modified = ChatServiceImpl().get_chat_last_modified(user_id, chat_id)
+    return request.chat_last_modified
+
+
+def chat_etag(request, user_id=None, chat_id=None):
+    last_modified = chat_last_modified(request, user_id, chat_id)
+    return f"{chat_id}-{int(last_modified.timestamp() * 1e6)}" if last_modified else None
+
 class ChatViewSet(ViewSet):
     """
     This view take care of Chat Process
@@ -16,6 +49,7 @@ class ChatViewSet(ViewSet):
 
     _instance = None
     permission_classes = [IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
@@ -59,7 +93,7 @@ class ChatViewSet(ViewSet):
                 message = data["message"]
                 model = data["model"]
 
-                logger.info(f"The user with user id {user_id} is asking the chatbot with message {message} using model {model}")
+                logger.info(f"The user with user id {user_id} is asking the chatbot a message of {len(message)} characters using model {model}")
                 
 
                 result = self.chat_service.generate_response(user_id, chat_id, message, model)
@@ -71,7 +105,46 @@ class ChatViewSet(ViewSet):
             
         return self.Response(data=serializer.errors, message="Error Occured", status_code=404)
 
+    @action(methods=['post'], detail=False)
+    def batch_chat(self, request):
+        """
+        Answers many independent questions of the user at once
+        Request Params:
+            user_id: Identifies the user
+            messages: The messages to be asked the Chatbot
+            model: The model that answers
+            stateless: Does not save the questions and answers to chats when true
+
+        Response:
+            NDJSON, one line per message as soon as it is answered, with its index in messages
+        """
+
+        serializer = ChatBatchSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return self.Response(data=serializer.errors, message="Error Occured", status_code=404)
+
+        data = serializer.validated_data
+
+        try:
+            results = self.chat_service.generate_batch_responses(
+                data["user_id"], data["messages"], data["model"], data["stateless"]
+            )
+        except Exception as e:
+            logger.debug(f"An error Occured in ChatViewSet: {str(e)}")
+            return self.Response(message=str(e), status_code=404)
+
+        encoder = DjangoJSONEncoder()
+
+        response = ThreadedStreamingHttpResponse(
+            (encoder.encode(result) + "\n" for result in results), content_type="application/x-ndjson"
+        )
+        # Every line is sent as soon as it is answered, by proxies and by StreamingGZipMiddleware too
+        response["X-Accel-Buffering"] = "no"
+        return response
+
     @action(methods=['get'], detail=False)
+    @method_decorator(condition(etag_func=chats_etag, last_modified_func=chats_last_modified))
     def get_chats_by_user_id(self, request, user_id=None):
         """
         Returns the Chats of the user
@@ -107,6 +180,7 @@ class ChatViewSet(ViewSet):
             return self.Response(message=str(e), status_code=404)
 
     @action(methods=['get'], detail=False)
+    @method_decorator(condition(etag_func=chat_etag, last_modified_func=chat_last_modified))
     def get_messages_by_chat_id(self, request, user_id=None, chat_id=None):
         """
         Returns the Messages of the chat
@@ -197,11 +271,36 @@ class ChatViewSet(ViewSet):
             logger.info(f"An error Occured in ChatViewSet: {str(e)}")
             return self.Response(message=str(e), status_code=404)
 
+    def delete_chats(self, request, user_id=None):
+        """
+        Deletes many or all of the chats of the user
+        Request Params:
+            user_id: Identifies the user
+            chat_ids: The chats to delete
+            delete_all: Deletes all the chats of the user when true
 
+        Response:
+            data: The number of deleted chats
+            message: The message of the response
+            status_code: The status code of the response
+        """
 
+        if user_id is None:
+            return self.Response(message="User ID is required", status_code=404)
 
+        serializer = ChatBulkDeleteSerializer(data=request.data)
 
+        if serializer.is_valid():
+            data = serializer.validated_data
 
+            try:
+                chat_ids = None if data["delete_all"] else data["chat_ids"]
 
+                result = self.chat_service.delete_chats(user_id, chat_ids)
 
+                return self.Response(data=result, message="Chats are successfully deleted", status_code=200)
+            except Exception as e:
+                logger.info(f"An error Occured in ChatViewSet: {str(e)}")
+                return self.Response(message=str(e), status_code=404)
 
+        return self.Response(data=serializer.errors, message="Error Occured", status_code=404)
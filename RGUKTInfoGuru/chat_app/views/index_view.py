@@ -0,0 +1,39 @@
+from rest_framework.viewsets import ViewSet
+from rest_framework.permissions import IsAdminUser
+from ..utils.response import CustomResponse
+from ..services.impl.chat_service_impl import ChatServiceImpl
+from ..authentication import CachedJWTAuthentication
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class IndexViewSet(ViewSet):
+    """
+    Admin endpoints of the served vector index
+    """
+
+    permission_classes = [IsAdminUser]
+    authentication_classes = [CachedJWTAuthentication]
+
+    def status(self, request):
+        """
+        Returns the served index version and the requests running on it
+        """
+        return CustomResponse()(data=ChatServiceImpl().get_index_status(), message="Index status", status_code=200)
+
+    def reload(self, request):
+        """
+        Switches to the index version the current symlink points at, without restarting the worker
+        Request Params:
+            force: Reload even when the version did not change
+        """
+        force = str(request.data.get("force", "")).lower() in ("1", "true", "yes")
+
+        try:
+            result = ChatServiceImpl().reload_index(force=force)
+            message = "Index is reloaded" if result["reloaded"] else "Index is already up to date"
+            return CustomResponse()(data=result, message=message, status_code=200)
+        except Exception as e:
+            logger.error(f"An error occured in reloading the index: {str(e)}")
+            return CustomResponse()(message=str(e), status_code=500)
@@ -1,20 +1,52 @@
+from django.conf import settings
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from ..authentication import CachedJWTAuthentication
 from ..models import User
 from ..serializers.user_authentication_serializer import UserDataSerializer
 from ..utils.response import CustomResponse
+from ..utils.pagination import UserCursorPagination
+from ..utils.export import stream_rows
 from rest_framework import status
 
+EXPORT_FORMATS = ("ndjson", "csv")
+USER_EXPORT_FIELDS = ["id", "email", "username", "avatar", "created_at"]
+
 class UserViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]  # Restrict access to authenticated users
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     def list(self, request):
         """
-        Fetch all user details (Only for authenticated users)
+        Fetch user details page by page (Only for authenticated users)
+        Request Params:
+            cursor: The cursor of the page, taken from the previous response
+            page_size: The number of users per page
+            export: "ndjson" or "csv" streams every user instead of a single page
         """
 
-        users = User.objects.all()
+        export_format = request.query_params.get("export")
+
+        if export_format is not None:
+            if export_format not in EXPORT_FORMATS:
+                return CustomResponse()(message=f"export must be one of {', '.join(EXPORT_FORMATS)}", status_code=status.HTTP_400_BAD_REQUEST)
+
+            return stream_rows(
+                User.objects.order_by("created_at"),
+                USER_EXPORT_FIELDS,
+                export_format,
+                "users",
+                chunk_size=getattr(settings, "USER_EXPORT_CHUNK_SIZE", 2000),
+            )
+
+        paginator = UserCursorPagination()
+        users = paginator.paginate_queryset(User.objects.all(), request, view=self)
         serializer = UserDataSerializer(users, many=True)
-        return CustomResponse()(serializer.data, status_code=status.HTTP_200_OK)
\ No newline at end of file
+
+        data = {
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
+            "results": serializer.data,
+        }
+
+        return CustomResponse()(data, status_code=status.HTTP_200_OK)
@@ -1,11 +1,12 @@
 from rest_framework.viewsets import ViewSet
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from ..serializers.user_authentication_serializer import SignupSerializer, UserDataSerializer, LoginSerializer
+from ..serializers.user_authentication_serializer import SignupSerializer, UserDataSerializer, LoginSerializer, TokenBatchSerializer
 from ..services.impl.user_auth_service_impl import UserAuthServiceImpl
 from ..utils.response import CustomResponse
+from ..authentication import ClaimsJWTAuthentication
 from rest_framework.decorators import action
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
+from ..tokens import EmailRefreshToken
 
 import logging
 
@@ -16,6 +17,7 @@ class AuthenticationView(ViewSet):
     This view take care of Authentication process.
     """
     permission_classes = [AllowAny]
+    authentication_classes = [ClaimsJWTAuthentication]
     _instance = None
 
     def __new__(cls, *args, **kwargs):
@@ -32,6 +34,15 @@ class AuthenticationView(ViewSet):
 
             logger.info("AuthenticationView is initialized successfully")
 
+    @staticmethod
+    def get_error_status(exception):
+        """
+        Returns 503 when the login capacity is exhausted so clients can retry, 404 otherwise
+        """
+        if getattr(exception, "status_code", None) == status.HTTP_503_SERVICE_UNAVAILABLE:
+            return status.HTTP_503_SERVICE_UNAVAILABLE
+        return 404
+
     @action(methods=['post'], detail=False)
     def signup(self, request):
         """
@@ -60,7 +71,7 @@ class AuthenticationView(ViewSet):
                 return self.Response(data=result.data,message="User is successfully created", success=True, status_code=201)
 
             except Exception as e:
-                return self.Response(message=str(e), success=False,status_code=404)
+                return self.Response(message=str(e), success=False,status_code=self.get_error_status(e))
 
         return self.Response(data=serializer.errors,message="Error occured", status_code=404)
 
@@ -90,7 +101,7 @@ class AuthenticationView(ViewSet):
                 return self.Response(result, message="Successfully Login", success=True, status_code=200)
             except Exception as e:
                 print(f"The message is {str(e)}")
-                return self.Response(message=str(e), success=False,status_code=404)
+                return self.Response(message=str(e), success=False,status_code=self.get_error_status(e))
 
         return self.Response(data=serializer.errors,message="Error occured", status_code=404)
 
@@ -105,7 +116,7 @@ class AuthenticationView(ViewSet):
             if not refresh_token:
                 return self.Response(message="Refresh token is missing", status_code=status.HTTP_400_BAD_REQUEST)
 
-            token = RefreshToken(refresh_token)
+            token = EmailRefreshToken(refresh_token)
             token.blacklist()
 
             return self.Response(message="Logged out successfully", status_code=status.HTTP_205_RESET_CONTENT)
@@ -130,8 +141,16 @@ class AuthenticationView(ViewSet):
             logger.info(f"Token is invalid {str(e)}")
             return self.Response(message=str(e), status_code=status.HTTP_401_UNAUTHORIZED)
 
+    @action(methods=['post'], detail=False)
+    def verify_tokens(self, request):
+        """
+        Verifies many tokens in one request
+        """
 
+        serializer = TokenBatchSerializer(data=request.data)
 
+        if serializer.is_valid():
+            data = self.auth_service.verify_tokens(serializer.validated_data["tokens"])
+            return self.Response(message="Tokens are verified", data=data, status_code=status.HTTP_200_OK)
 
-
-
+        return self.Response(data=serializer.errors, message="Error occured", status_code=status.HTTP_400_BAD_REQUEST)
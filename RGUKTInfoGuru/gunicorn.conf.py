@@ -0,0 +1,53 @@
+"""
+Gunicorn settings for serving RGUKTInfoGuru with several workers.
+
+    gunicorn -c gunicorn.conf.py
+
+With preload_app the master loads Django, the embedding model and the index once and
+forks the workers from it, so the model memory is shared copy-on-write instead of being
+loaded by every worker. See chat_app/utils/prefork.py for what each worker re-creates.
+`manage.py benchmark_workers` compares the memory of both modes.
+
+With RETRIEVAL_SERVER_SOCKET set the workers do not load the model at all, they query
+`manage.py retrieval_server` instead and only load it in-process while the server is down.
+
+The chat websocket (chat_app/consumers.py) needs the ASGI app on uvicorn workers:
+
+    GUNICORN_APP=RGUKTInfoGuru.asgi:application GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py
+"""
+import multiprocessing
+import os
+
+from chat_app.utils import prefork
+
+wsgi_app = os.getenv("GUNICORN_APP", "RGUKTInfoGuru.wsgi:application")
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") != "0"
+# Answers wait on the LLM, a slow Groq call must not get the worker killed
+timeout = 120
+
+if preload_app:
+    prefork.mark_master()
+
+
+def when_ready(server):
+    if preload_app:
+        prefork.warm_up()
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        prefork.before_fork()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        prefork.after_fork(server.cfg.workers)
+
+
+def post_worker_init(worker):
+    # Runs after gunicorn reset the signal handlers of the worker
+    prefork.worker_ready()
+    worker.log.info(f"Worker {worker.pid} ready")